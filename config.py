@@ -11,6 +11,67 @@ class Config:
     
     # Telegram Bot
     BOT_TOKEN: str = os.getenv("BOT_TOKEN", "8459447990:AAE9yPVgoi6MicC1xa5Lc8SzhVT51k6y-yQ")
+    # Custom Bot API server (local Bot API or a fake server for tests); empty uses api.telegram.org
+    TELEGRAM_API_URL: str = os.getenv("TELEGRAM_API_URL", "")
+    FAKE_TELEGRAM_PORT: int = int(os.getenv("FAKE_TELEGRAM_PORT", "8081"))  # fake_telegram_server.py
+    
+    # Webhook mode (webhook.py)
+    WEBHOOK_BASE_URL: str = os.getenv("WEBHOOK_BASE_URL", "")  # public URL, e.g. https://bot.example.com
+    WEBHOOK_PATH: str = os.getenv("WEBHOOK_PATH", "/telegram/webhook")
+    WEBHOOK_SECRET: str = os.getenv("WEBHOOK_SECRET", "")  # required; 1-256 characters of A-Z, a-z, 0-9, _ and -
+    WEBHOOK_HOST: str = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+    WEBHOOK_PORT: int = int(os.getenv("WEBHOOK_PORT", "8080"))
+    WEBHOOK_SSL_CERT: str = os.getenv("WEBHOOK_SSL_CERT", "")  # optional, for local TLS termination
+    WEBHOOK_SSL_KEY: str = os.getenv("WEBHOOK_SSL_KEY", "")
+    WEBHOOK_MAX_CONCURRENCY: int = int(os.getenv("WEBHOOK_MAX_CONCURRENCY", "64"))
+    
+    # Multi-worker runtime (workers.py)
+    BOT_WORKERS: int = int(os.getenv("BOT_WORKERS") or os.cpu_count() or 1)
+    WORKER_MAX_CONCURRENCY: int = int(os.getenv("WORKER_MAX_CONCURRENCY", "32"))  # updates running at once
+    WORKER_MAX_PENDING: int = int(os.getenv("WORKER_MAX_PENDING", "1000"))  # updates scheduled (running or waiting)
+    
+    # Throttling (token buckets: rate = tokens per second, burst = bucket size)
+    THROTTLE_RATE: float = float(os.getenv("THROTTLE_RATE", "3"))
+    THROTTLE_BURST: int = int(os.getenv("THROTTLE_BURST", "10"))
+    THROTTLE_PAGINATION_RATE: float = float(os.getenv("THROTTLE_PAGINATION_RATE", "1"))
+    THROTTLE_PAGINATION_BURST: int = int(os.getenv("THROTTLE_PAGINATION_BURST", "3"))
+    THROTTLE_BULK_RATE: float = float(os.getenv("THROTTLE_BULK_RATE", "0.1"))
+    THROTTLE_BULK_BURST: int = int(os.getenv("THROTTLE_BULK_BURST", "2"))
+    THROTTLE_BULK_GLOBAL_RATE: float = float(os.getenv("THROTTLE_BULK_GLOBAL_RATE", "1"))
+    THROTTLE_BULK_GLOBAL_BURST: int = int(os.getenv("THROTTLE_BULK_GLOBAL_BURST", "10"))
+    
+    # Outbound send scheduler (Telegram limits: ~30 msg/s overall, ~1 msg/s per chat, 20 msg/min per group)
+    SEND_GLOBAL_RATE: float = float(os.getenv("SEND_GLOBAL_RATE", "30"))
+    SEND_CHAT_RATE: float = float(os.getenv("SEND_CHAT_RATE", "1"))
+    SEND_CHAT_BURST: int = int(os.getenv("SEND_CHAT_BURST", "3"))
+    SEND_GROUP_RATE: float = float(os.getenv("SEND_GROUP_RATE", str(20 / 60)))
+    SEND_GROUP_BURST: int = int(os.getenv("SEND_GROUP_BURST", "3"))
+    SEND_MAX_RETRIES: int = int(os.getenv("SEND_MAX_RETRIES", "3"))
+    # Part of SEND_GLOBAL_RATE reserved for the web dashboard; the bot processes share the rest
+    DASHBOARD_SEND_SHARE: float = float(os.getenv("DASHBOARD_SEND_SHARE", "0.2"))
+    
+    # Submission export (bots may upload up to 50 MB to api.telegram.org, 2000 MB to a local Bot API)
+    EXPORT_PART_MAX_BYTES: int = int(os.getenv("EXPORT_PART_MAX_BYTES", str(48 * 1024 * 1024)))
+    EXPORT_TEMP_DIR: str = os.getenv("EXPORT_TEMP_DIR", "")  # empty uses the system temp directory
+    # Read submission files from this directory (named by file id) instead of the Bot API, for local runs
+    EXPORT_FILES_DIR: str = os.getenv("EXPORT_FILES_DIR", "")
+    # The watermark stays this many seconds behind the export, so submissions committed late are not skipped
+    EXPORT_WATERMARK_MARGIN: float = float(os.getenv("EXPORT_WATERMARK_MARGIN", "120"))
+    
+    # Per-process caches (invalidated through PostgreSQL NOTIFY; the TTL is a safety net)
+    OWNERSHIP_CACHE_TTL: float = float(os.getenv("OWNERSHIP_CACHE_TTL", "600"))
+    
+    # Admin audit log (entries are buffered and written in batches)
+    AUDIT_LOG_FLUSH_INTERVAL: float = float(os.getenv("AUDIT_LOG_FLUSH_INTERVAL", "2"))
+    AUDIT_LOG_BATCH_SIZE: int = int(os.getenv("AUDIT_LOG_BATCH_SIZE", "100"))
+    AUDIT_LOG_MAX_PENDING: int = int(os.getenv("AUDIT_LOG_MAX_PENDING", "10000"))
+    AUDIT_LOG_MAX_ATTEMPTS: int = int(os.getenv("AUDIT_LOG_MAX_ATTEMPTS", "5"))  # Then entries are written one by one
+    
+    # Channel publication outbox (approved services/requests are posted by a background worker)
+    PUBLICATION_POLL_INTERVAL: float = float(os.getenv("PUBLICATION_POLL_INTERVAL", "30"))
+    PUBLICATION_BATCH_SIZE: int = int(os.getenv("PUBLICATION_BATCH_SIZE", "20"))
+    PUBLICATION_LEASE: float = float(os.getenv("PUBLICATION_LEASE", "120"))  # seconds a claimed post is reserved
+    PUBLICATION_RETRY_MAX_DELAY: float = float(os.getenv("PUBLICATION_RETRY_MAX_DELAY", "900"))
     
     # Database
     DB_HOST: str = os.getenv("DB_HOST", "127.0.0.1")
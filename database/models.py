@@ -4,10 +4,10 @@ from enum import Enum as PyEnum
 from typing import Optional
 from sqlalchemy import (
     Column, Integer, String, Boolean, DateTime, Text, 
-    ForeignKey, Numeric, Enum as SQLEnum, JSON, BigInteger
+    ForeignKey, Numeric, Enum as SQLEnum, JSON, BigInteger, Index
 )
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from database.base import Base
 
 
@@ -108,6 +108,9 @@ class User(Base):
 class VerificationCode(Base):
     """Email verification code model."""
     __tablename__ = "verification_codes"
+    __table_args__ = (
+        Index("idx_verification_codes_user", "user_id", "is_used"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -123,6 +126,11 @@ class VerificationCode(Base):
 class Service(Base):
     """Service model (provided by students)."""
     __tablename__ = "services"
+    __table_args__ = (
+        Index("idx_services_provider_created", "provider_id", "created_at"),
+        Index("idx_services_status_created", "status", "created_at"),
+        Index("idx_services_created", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     provider_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -148,6 +156,11 @@ class Service(Base):
 class ServiceRequest(Base):
     """Service request model (requested by users)."""
     __tablename__ = "service_requests"
+    __table_args__ = (
+        Index("idx_service_requests_requester_created", "requester_id", "created_at"),
+        Index("idx_service_requests_status_created", "status", "created_at"),
+        Index("idx_service_requests_created", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     requester_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -172,6 +185,23 @@ class ServiceRequest(Base):
 class ContactRequest(Base):
     """Contact request model."""
     __tablename__ = "contact_requests"
+    __table_args__ = (
+        Index("idx_contact_requests_requester_service", "requester_id", "service_id"),
+        Index("idx_contact_requests_provider_service_request", "provider_id", "service_request_id"),
+        Index("idx_contact_requests_provider_status", "provider_id", "status"),
+        Index("idx_contact_requests_status", "status"),
+        Index("idx_contact_requests_service", "service_id"),
+        Index("idx_contact_requests_service_request", "service_request_id"),
+        # At most one pending request per user and service / per provider and service request
+        Index(
+            "uq_contact_requests_pending_service", "requester_id", "service_id",
+            unique=True, postgresql_where=text("status = 'PENDING' AND service_id IS NOT NULL")
+        ),
+        Index(
+            "uq_contact_requests_pending_offer", "provider_id", "service_request_id",
+            unique=True, postgresql_where=text("status = 'PENDING' AND service_request_id IS NOT NULL")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     requester_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -192,9 +222,12 @@ class ContactRequest(Base):
 class AdminLog(Base):
     """Admin action log model."""
     __tablename__ = "admin_logs"
+    __table_args__ = (
+        Index("idx_admin_logs_admin_created", "admin_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    admin_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    admin_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # NULL for the dashboard's configured login
     action_type = Column(String(100), nullable=False)
     target_type = Column(String(50), nullable=True)  # "user", "service", "request", etc.
     target_id = Column(Integer, nullable=True)
@@ -205,6 +238,25 @@ class AdminLog(Base):
     admin = relationship("User", back_populates="admin_logs")
 
 
+class PublicationOutbox(Base):
+    """Channel posts waiting to be published for approved services and requests."""
+    __tablename__ = "publication_outbox"
+    __table_args__ = (
+        Index("uq_publication_outbox_item", "item_type", "item_id", unique=True),
+        Index("idx_publication_outbox_due", "next_attempt_at", postgresql_where=text("published_at IS NULL")),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    item_type = Column(String(20), nullable=False)  # "service" or "request"
+    item_id = Column(Integer, nullable=False)
+    channel_message_id = Column(Integer, nullable=True)  # Set once, by the worker that published the post
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)  # Also the claim lease
+    published_at = Column(DateTime(timezone=True), nullable=True)  # NULL while pending
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
 class Specialization(Base):
     """Specialization model for managing available specializations."""
     __tablename__ = "specializations"
@@ -297,6 +349,14 @@ class TeacherSubject(Base):
 class Lecture(Base):
     """Lecture model - محاضرة مرتبطة بمادة وأستاذ."""
     __tablename__ = "lectures"
+    __table_args__ = (
+        Index("idx_lectures_display_order", "teacher_subject_id", "display_order"),
+        Index("idx_lectures_drafts", "teacher_subject_id", postgresql_where=text("is_draft")),
+        Index(
+            "uq_lectures_subject_file", "teacher_subject_id", "file_unique_id",
+            unique=True, postgresql_where=text("file_unique_id IS NOT NULL")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     teacher_subject_id = Column(Integer, ForeignKey("teacher_subjects.id"), nullable=False, index=True)
@@ -306,7 +366,9 @@ class Lecture(Base):
     file_type = Column(String(50), nullable=False)  # document, photo, video, audio, voice, video_note
     file_name = Column(String(500), nullable=True)  # اسم الملف الأصلي
     file_size = Column(Integer, nullable=True)  # حجم الملف بالبايت
+    file_unique_id = Column(String(100), nullable=True)  # Telegram file_unique_id (NULL for files uploaded before deduplication)
     display_order = Column(Integer, default=0, nullable=False)  # ترتيب الملف في المحاضرة
+    is_draft = Column(Boolean, default=False, server_default="false", nullable=False)  # مرفوع ولم يُنشر بعد
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
@@ -317,6 +379,14 @@ class Lecture(Base):
 class Assignment(Base):
     """Assignment model - وظيفة مرتبطة بمادة وأستاذ."""
     __tablename__ = "assignments"
+    __table_args__ = (
+        Index("idx_assignments_display_order", "teacher_subject_id", "display_order"),
+        Index("idx_assignments_drafts", "teacher_subject_id", postgresql_where=text("is_draft")),
+        Index(
+            "uq_assignments_subject_file", "teacher_subject_id", "file_unique_id",
+            unique=True, postgresql_where=text("file_unique_id IS NOT NULL")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     teacher_subject_id = Column(Integer, ForeignKey("teacher_subjects.id"), nullable=False, index=True)
@@ -326,7 +396,9 @@ class Assignment(Base):
     file_type = Column(String(50), nullable=False)  # document, photo, video, audio, voice, video_note
     file_name = Column(String(500), nullable=True)  # اسم الملف الأصلي
     file_size = Column(Integer, nullable=True)  # حجم الملف بالبايت
+    file_unique_id = Column(String(100), nullable=True)  # Telegram file_unique_id (NULL for files uploaded before deduplication)
     display_order = Column(Integer, default=0, nullable=False)  # ترتيب الملف في الوظيفة
+    is_draft = Column(Boolean, default=False, server_default="false", nullable=False)  # مرفوع ولم يُنشر بعد
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
@@ -338,6 +410,10 @@ class Assignment(Base):
 class AssignmentSubmission(Base):
     """Assignment submission model - حل الوظيفة من الطالب."""
     __tablename__ = "assignment_submissions"
+    __table_args__ = (
+        Index("uq_assignment_submissions_student_assignment", "student_id", "assignment_id", unique=True),
+        Index("idx_assignment_submissions_assignment_updated", "assignment_id", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
@@ -354,4 +430,20 @@ class AssignmentSubmission(Base):
     # Relationships
     student = relationship("User", back_populates="assignment_submissions")
     assignment = relationship("Assignment", back_populates="student_submissions")
-    subject = relationship("Subject", back_populates="assignment_submissions")
\ No newline at end of file
+    subject = relationship("Subject", back_populates="assignment_submissions")
+
+
+class SubmissionExportWatermark(Base):
+    """Last submission export of a teacher for a subject - آخر تنزيل لحلول الطلاب."""
+    __tablename__ = "submission_export_watermarks"
+    __table_args__ = (
+        Index("uq_submission_export_watermarks_teacher_subject", "teacher_id", "subject_id", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    teacher_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    subject_id = Column(Integer, ForeignKey("subjects.id"), nullable=False)
+    exported_until = Column(DateTime(timezone=True), nullable=False)  # updated_at of the newest exported submission
+    failed_submission_ids = Column(JSON, nullable=False, server_default=text("'[]'"))  # Retried by the next export
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -0,0 +1,98 @@
+"""Cross-process change notifications over PostgreSQL LISTEN/NOTIFY.
+
+Every bot process (polling, webhook, each worker) and the dashboard keep
+their own in-memory caches. Writers call `notify` inside their transaction,
+so the message is delivered on commit; each process runs one
+NotificationListener that forwards payloads to the registered handlers.
+After a reconnect handlers receive None, meaning "anything may have changed".
+"""
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Optional[str]], None]
+
+
+async def notify(session: AsyncSession, channel: str, payload: str = "") -> None:
+    """Queue a notification; it is sent when the session's transaction commits."""
+    await session.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": channel, "payload": payload}
+    )
+
+
+class NotificationListener:
+    """Keep a dedicated connection listening on the subscribed channels."""
+
+    RECONNECT_DELAY = 5
+
+    def __init__(self, dsn: str = ""):
+        self.dsn = dsn or config.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+        self.handlers: Dict[str, List[Handler]] = {}
+        self.task: Optional[asyncio.Task] = None
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        """Call `handler(payload)` for every notification on `channel`."""
+        self.handlers.setdefault(channel, []).append(handler)
+
+    def dispatch(self, channel: str, payload: Optional[str]) -> None:
+        """Run the handlers of a channel."""
+        for handler in self.handlers.get(channel, []):
+            try:
+                handler(payload)
+            except Exception as e:
+                logger.error(f"Error handling notification on {channel}: {e}", exc_info=True)
+
+    def on_notification(self, connection, pid, channel: str, payload: str) -> None:
+        self.dispatch(channel, payload)
+
+    async def run(self) -> None:
+        """Listen until cancelled, reconnecting after connection loss."""
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                for channel in self.handlers:
+                    await connection.add_listener(channel, self.on_notification)
+                # Notifications sent while disconnected are lost
+                for channel in self.handlers:
+                    self.dispatch(channel, None)
+
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await closed.wait()
+                logger.warning("Notification listener connection closed, reconnecting...")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Notification listener error: {e}")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(self.RECONNECT_DELAY)
+
+    async def start(self) -> None:
+        """Start listening in the background."""
+        if self.handlers and (self.task is None or self.task.done()):
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop listening."""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+
+listener = NotificationListener()
@@ -0,0 +1,128 @@
+"""Fake Telegram Bot API server for running the bot locally.
+
+Answers every Bot API method with a plausible result and logs the call, so
+the bot can run without reaching Telegram. Point the bot at it with
+TELEGRAM_API_URL=http://localhost:8081 (FAKE_TELEGRAM_PORT).
+
+The webhook registered with setWebhook is remembered, and updates posted to
+/updates are forwarded to it with the secret token header, e.g.:
+
+    curl -X POST localhost:8081/updates -d '{"message": {"text": "/start"}}'
+
+Missing update_id, message_id, date, chat and from fields are filled in.
+"""
+import itertools
+import json
+import logging
+import time
+
+from aiohttp import ClientSession, web
+
+from config import config
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+FAKE_USER_ID = 1000
+
+# Methods whose result is the sent or edited message
+MESSAGE_PREFIXES = ("send", "edit", "forward", "copy", "stop")
+
+
+class FakeTelegram:
+    """State of the fake server: the registered webhook and message counters."""
+
+    def __init__(self):
+        self.webhook_url = ""
+        self.secret_token = ""
+        self.update_ids = itertools.count(1)
+        self.message_ids = itertools.count(1)
+
+    def message(self, chat_id, params: dict) -> dict:
+        """Build the message returned by a send or edit method."""
+        result = {
+            "message_id": int(params.get("message_id") or next(self.message_ids)),
+            "date": int(time.time()),
+            "chat": {"id": int(chat_id or FAKE_USER_ID), "type": "private"},
+        }
+        if "text" in params:
+            result["text"] = params["text"]
+        if "caption" in params:
+            result["caption"] = params["caption"]
+        return result
+
+    def result(self, method: str, params: dict):
+        """Return the result of one Bot API method."""
+        name = method.lower()
+        if name == "getme":
+            return {"id": 1, "is_bot": True, "first_name": "Fake Bot", "username": "fake_bot"}
+        if name == "setwebhook":
+            self.webhook_url = params.get("url", "")
+            self.secret_token = params.get("secret_token", "")
+            return True
+        if name == "deletewebhook":
+            self.webhook_url = ""
+            return True
+        if name == "getwebhookinfo":
+            return {"url": self.webhook_url, "has_custom_certificate": False, "pending_update_count": 0}
+        if name == "getupdates":
+            return []
+        if name == "getfile":
+            file_id = params.get("file_id", "file")
+            return {"file_id": file_id, "file_unique_id": file_id, "file_path": f"documents/{file_id}"}
+        if name.startswith(MESSAGE_PREFIXES):
+            return self.message(params.get("chat_id"), params)
+        return True
+
+    async def handle_method(self, request: web.Request) -> web.Response:
+        """Answer a Bot API call."""
+        method = request.match_info["method"]
+        if request.content_type == "application/json":
+            params = await request.json()
+        else:
+            # Uploaded files are read and dropped
+            params = {key: value for key, value in (await request.post()).items() if isinstance(value, str)}
+        logger.info(f"{method} {json.dumps(params, ensure_ascii=False)[:500]}")
+        return web.json_response({"ok": True, "result": self.result(method, params)})
+
+    async def handle_file(self, request: web.Request) -> web.Response:
+        """Serve placeholder contents for a file download."""
+        return web.Response(body=f"fake file {request.match_info['path']}\n".encode())
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        """Forward an update to the registered webhook."""
+        if not self.webhook_url:
+            return web.Response(status=409, text="No webhook registered")
+
+        update = await request.json()
+        update.setdefault("update_id", next(self.update_ids))
+        for key in ("message", "edited_message"):
+            if key in update:
+                message = update[key]
+                message.setdefault("message_id", next(self.message_ids))
+                message.setdefault("date", int(time.time()))
+                message.setdefault("chat", {"id": FAKE_USER_ID, "type": "private"})
+                message.setdefault("from", {"id": FAKE_USER_ID, "is_bot": False, "first_name": "Test"})
+
+        headers = {SECRET_HEADER: self.secret_token} if self.secret_token else {}
+        async with ClientSession() as session:
+            async with session.post(self.webhook_url, json=update, headers=headers) as response:
+                return web.Response(status=response.status, text=await response.text())
+
+
+def create_app() -> web.Application:
+    """Create the fake Bot API application."""
+    fake = FakeTelegram()
+    app = web.Application()
+    app.router.add_post("/updates", fake.handle_update)
+    app.router.add_route("*", "/bot{token}/{method}", fake.handle_method)
+    app.router.add_get("/file/bot{token}/{path:.+}", fake.handle_file)
+    return app
+
+
+if __name__ == "__main__":
+    web.run_app(create_app(), host="127.0.0.1", port=config.FAKE_TELEGRAM_PORT)
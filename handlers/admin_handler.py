@@ -1,5 +1,5 @@
 """Admin handler."""
-from typing import cast, Sequence
+from typing import cast
 
 from aiogram import Router, F, Bot
 from aiogram.types import Message, CallbackQuery
@@ -13,6 +13,8 @@ from repositories.user_repository import UserRepository
 from repositories.service_repository import ServiceRepository
 from repositories.request_repository import ServiceRequestRepository
 from repositories.admin_repository import AdminRepository
+from repositories.publication_repository import PublicationRepository
+from services.audit_log import audit_log
 from config import config
 
 router = Router()
@@ -168,76 +170,24 @@ async def admin_approve_item(callback: CallbackQuery, db_session: AsyncSession,
             await callback.answer("هذه الخدمة ليست في انتظار الموافقة.", show_alert=True)
             return
 
-        from services.service_service import ServiceService
+        # The status change and the outbox row are committed together;
+        # the channel post is sent by the background publisher
+        service.status = ServiceStatus.PUBLISHED  # type: ignore[assignment]
+        await PublicationRepository(db_session).enqueue("service", item_id)
+        audit_log.log(user.id, "approve_service", "service", item_id, {"source": "bot"})  # type: ignore[arg-type]
 
-        service_service = ServiceService(db_session)
-
-        try:
-            service_text = f"🎯 {service.title}\n\n"
-            service_text += f"📝 {service.description}\n\n"
-            service_text += f"💰 السعر: {service_service.format_price(service)}\n"
-            service_text += f"🎓 التخصص: {service.specialization}\n"
-            service_text += f"✅ طالب معتمد"
-
-            from handlers.keyboards import get_service_contact_keyboard
-
-            # تصحيح type hint للـ id
-            keyboard = get_service_contact_keyboard(int(service.id))  # type: ignore[arg-type]
-
-            if service.media_file_id:
-                # تصحيح type hint للـ media_file_id
-                media_id = str(service.media_file_id)  # type: ignore[arg-type]
-
-                if str(service.media_type) == "photo":
-                    sent_message = await bot.send_photo(
-                        config.SERVICES_CHANNEL_ID,
-                        media_id,
-                        caption=service_text,
-                        reply_markup=keyboard,
-                    )
-                else:  # video
-                    sent_message = await bot.send_video(
-                        config.SERVICES_CHANNEL_ID,
-                        media_id,
-                        caption=service_text,
-                        reply_markup=keyboard,
-                    )
-            else:
-                sent_message = await bot.send_message(
-                    config.SERVICES_CHANNEL_ID,
-                    service_text,
-                    reply_markup=keyboard,
-                )
-
-            # تعيين القيم بشكل صحيح
-            service.channel_message_id = sent_message.message_id  # type: ignore[assignment]
-            service.status = ServiceStatus.PUBLISHED  # type: ignore[assignment]
-            await service_repo.update(service)
-
-            provider = service.provider
+        # تحقق من نوع الرسالة قبل التعديل
+        if isinstance(callback.message, TelegramMessage):
             try:
-                await bot.send_message(
-                    provider.telegram_id,
-                    f"✅ تم قبول وموافقة خدمتك '{service.title}' وتم نشرها في القناة!",
-                )
+                await bot.delete_message(config.ADMIN_GROUP_ID, callback.message.message_id)
             except Exception:
                 pass
 
-            # تحقق من نوع الرسالة قبل التعديل
-            if isinstance(callback.message, TelegramMessage):
-                try:
-                    await bot.delete_message(config.ADMIN_GROUP_ID, callback.message.message_id)
-                except Exception:
-                    pass
-
-            await callback.answer("✅ تم قبول الخدمة ونشرها!", show_alert=True)
+        await callback.answer("✅ تم قبول الخدمة وسيتم نشرها في القناة.", show_alert=True)
 
-            # تحقق من نوع الرسالة قبل edit_text
-            if isinstance(callback.message, TelegramMessage):
-                await callback.message.edit_text("✅ تم قبول الخدمة ونشرها في القناة.")
-
-        except Exception as e:
-            await callback.answer(f"خطأ في النشر: {e}", show_alert=True)
+        # تحقق من نوع الرسالة قبل edit_text
+        if isinstance(callback.message, TelegramMessage):
+            await callback.message.edit_text("✅ تم قبول الخدمة وسيتم نشرها في القناة.")
 
     elif item_type == "request":
         request_repo = ServiceRequestRepository(db_session)
@@ -252,67 +202,22 @@ async def admin_approve_item(callback: CallbackQuery, db_session: AsyncSession,
             await callback.answer("هذا الطلب ليس في انتظار الموافقة.", show_alert=True)
             return
 
-        from services.request_service import RequestService
-
-        request_service = RequestService(db_session)
-
-        try:
-            # allowed_specializations قد تكون Column[Any] في الموديل، نستخدم cast هنا
-            allowed_specs = cast(Sequence[str] | None, request.allowed_specializations)
-            if allowed_specs:
-                specs_str = ", ".join(allowed_specs)
-            else:
-                specs_str = "غير محددة"
-
-            request_text = "📋 طلب خدمة\n\n"
-            request_text += f"📌 {request.title}\n\n"
-            request_text += f"📝 {request.description}\n\n"
-            request_text += f"🎓 التخصصات المطلوبة: {specs_str}\n"
-            if request.preferred_gender:
-                gender_names = {"male": "ذكر", "female": "أنثى"}
-                gender_text = gender_names.get(str(request.preferred_gender), str(request.preferred_gender))
-                request_text += f"⚧️ الجنس المفضل: {gender_text}\n"
-            request_text += f"💰 الميزانية: {request_service.format_budget(request)}"
-
-            from handlers.keyboards import get_request_offer_keyboard
-
-            # تصحيح type hint للـ id
-            keyboard = get_request_offer_keyboard(int(request.id))  # type: ignore[arg-type]
-
-            sent_message = await bot.send_message(
-                config.REQUESTS_CHANNEL_ID,
-                request_text,
-                reply_markup=keyboard,
-            )
-
-            request.channel_message_id = sent_message.message_id  # type: ignore[assignment]
-            request.status = RequestStatus.PUBLISHED  # type: ignore[assignment]
-            await request_repo.update(request)
+        request.status = RequestStatus.PUBLISHED  # type: ignore[assignment]
+        await PublicationRepository(db_session).enqueue("request", item_id)
+        audit_log.log(user.id, "approve_request", "request", item_id, {"source": "bot"})  # type: ignore[arg-type]
 
-            requester = request.requester
+        # تحقق من نوع الرسالة قبل الحذف
+        if isinstance(callback.message, TelegramMessage):
             try:
-                await bot.send_message(
-                    requester.telegram_id,
-                    f"✅ تم قبول طلبك '{request.title}' وتم نشره في القناة!",
-                )
+                await bot.delete_message(config.ADMIN_GROUP_ID, callback.message.message_id)
             except Exception:
                 pass
 
-            # تحقق من نوع الرسالة قبل الحذف
-            if isinstance(callback.message, TelegramMessage):
-                try:
-                    await bot.delete_message(config.ADMIN_GROUP_ID, callback.message.message_id)
-                except Exception:
-                    pass
-
-            await callback.answer("✅ تم قبول الطلب ونشره!", show_alert=True)
-
-            # تحقق من نوع الرسالة قبل edit_text
-            if isinstance(callback.message, TelegramMessage):
-                await callback.message.edit_text("✅ تم قبول الطلب ونشره في القناة.")
+        await callback.answer("✅ تم قبول الطلب وسيتم نشره في القناة.", show_alert=True)
 
-        except Exception as e:
-            await callback.answer(f"خطأ في النشر: {e}", show_alert=True)
+        # تحقق من نوع الرسالة قبل edit_text
+        if isinstance(callback.message, TelegramMessage):
+            await callback.message.edit_text("✅ تم قبول الطلب وسيتم نشره في القناة.")
 
 
 @router.callback_query(F.data.startswith("admin_reject:"))
@@ -347,6 +252,7 @@ async def admin_reject_item(callback: CallbackQuery, db_session: AsyncSession, u
 
         service.status = ServiceStatus.REJECTED  # type: ignore[assignment]
         await service_repo.update(service)
+        audit_log.log(user.id, "reject_service", "service", item_id, {"source": "bot"})  # type: ignore[arg-type]
 
         provider = service.provider
         try:
@@ -385,6 +291,7 @@ async def admin_reject_item(callback: CallbackQuery, db_session: AsyncSession, u
 
         request.status = RequestStatus.REJECTED  # type: ignore[assignment]
         await request_repo.update(request)
+        audit_log.log(user.id, "reject_request", "request", item_id, {"source": "bot"})  # type: ignore[arg-type]
 
         requester = request.requester
         try:
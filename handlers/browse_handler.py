@@ -12,6 +12,7 @@ from handlers.keyboards import (
     get_pagination_keyboard
 )
 from handlers.common import require_auth
+from handlers.state_codec import pack_ids, count_ids, slice_ids
 from sqlalchemy.ext.asyncio import AsyncSession
 from database.models import User, ServiceStatus
 from repositories.service_repository import ServiceRepository
@@ -136,7 +137,7 @@ async def process_price_filter(message: Message, state: FSMContext, db_session:
     
     # Store services and pagination state
     await state.update_data(
-        services=[s.id for s in services],
+        services=pack_ids(s.id for s in services),
         page=1,
         specialization=specialization,
         min_price=min_price,
@@ -155,10 +156,10 @@ async def show_services_page(
 ):
     """Show a page of services."""
     data = await state.get_data()
-    service_ids = data.get("services", [])
+    packed_ids = data.get("services")
     
     # Calculate pagination
-    total_services = len(service_ids)
+    total_services = count_ids(packed_ids)
     total_pages = (total_services + SERVICES_PER_PAGE - 1) // SERVICES_PER_PAGE
     
     if page < 1 or page > total_pages:
@@ -167,7 +168,7 @@ async def show_services_page(
     # Get services for this page
     start_idx = (page - 1) * SERVICES_PER_PAGE
     end_idx = start_idx + SERVICES_PER_PAGE
-    page_service_ids = service_ids[start_idx:end_idx]
+    page_service_ids = slice_ids(packed_ids, start_idx, end_idx)
     
     service_repo = ServiceRepository(db_session)
     service_service = ServiceService(db_session)
@@ -1,8 +1,13 @@
 """Common utilities and middleware."""
 
-from typing import Callable, Dict, Any, Awaitable, Optional
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Any, Awaitable, List, Optional, Set, Tuple
 from aiogram import BaseMiddleware
-from aiogram.types import TelegramObject, User as TgUser, Message, CallbackQuery
+from aiogram.types import TelegramObject, User as TgUser, Message, CallbackQuery, Update
+from config import config
+from services.rate_limit import TokenBucket
 from sqlalchemy.ext.asyncio import AsyncSession
 from database.base import AsyncSessionLocal
 from repositories.user_repository import UserRepository
@@ -44,6 +49,210 @@ class UserMiddleware(BaseMiddleware):
         return await handler(event, data)
 
 
+# Releases the per-user lock of the update being handled (set by UserLockMiddleware)
+user_lock_release: ContextVar[Optional[Callable[[], None]]] = ContextVar("user_lock_release", default=None)
+
+
+def release_user_lock() -> None:
+    """Let the user's next updates run while this handler keeps working.
+
+    Call it before a long bulk delivery (file batches, exports), once the
+    handler no longer reads or changes the user's state, so taps sent
+    meanwhile are answered right away instead of waiting for the delivery.
+    """
+    release = user_lock_release.get()
+    if release is not None:
+        release()
+
+
+# Claims a bulk operation for the user of the update being handled (set by UserLockMiddleware)
+user_bulk_claim: ContextVar[Optional[Callable[[str], bool]]] = ContextVar("user_bulk_claim", default=None)
+
+
+def claim_bulk_operation(operation: str) -> bool:
+    """Mark a bulk delivery of the user as running until the handler returns.
+
+    Call it before `release_user_lock`. Returns False while the same
+    operation started by an earlier tap is still running; the handler should
+    then answer that it is already in progress instead of starting it again.
+    """
+    claim = user_bulk_claim.get()
+    return claim is None or claim(operation)
+
+
+class UserLockMiddleware(BaseMiddleware):
+    """Middleware to process updates of the same user one at a time.
+
+    Different users still run in parallel. Locks are created on demand and
+    dropped as soon as nobody holds or waits for them. A handler may release
+    its lock early with `release_user_lock`; the bulk operations it claimed
+    with `claim_bulk_operation` stay marked as running until it returns.
+    """
+
+    def __init__(self):
+        self.locks: Dict[int, asyncio.Lock] = {}
+        self.waiters: Dict[int, int] = {}
+        self.in_flight: Set[Tuple[int, str]] = set()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        tg_user: Optional[TgUser] = data.get("event_from_user")
+        if tg_user is None:
+            return await handler(event, data)
+
+        key = tg_user.id
+        lock = self.locks.get(key)
+        if lock is None:
+            lock = self.locks[key] = asyncio.Lock()
+        self.waiters[key] = self.waiters.get(key, 0) + 1
+
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                lock.release()
+
+        claimed: List[Tuple[int, str]] = []
+
+        def claim(operation: str) -> bool:
+            item = (key, operation)
+            if item in self.in_flight:
+                return False
+            self.in_flight.add(item)
+            claimed.append(item)
+            return True
+
+        try:
+            await lock.acquire()
+            token = user_lock_release.set(release)
+            claim_token = user_bulk_claim.set(claim)
+            try:
+                return await handler(event, data)
+            finally:
+                user_bulk_claim.reset(claim_token)
+                user_lock_release.reset(token)
+                self.in_flight.difference_update(claimed)
+                release()
+        finally:
+            self.waiters[key] -= 1
+            if not self.waiters[key]:
+                del self.waiters[key]
+                del self.locks[key]
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Middleware to rate-limit updates per user and per handler group.
+
+    Every user has a general bucket; callbacks of a throttled group (e.g.
+    bulk file deliveries) also use a per-user bucket of that group and may
+    use a bucket shared by all users. Messages carrying a file skip the
+    general bucket, so a teacher forwarding a batch of files or albums does
+    not lose any. Throttled updates are answered right away (messages at
+    most once per notice period) and never reach the database middlewares.
+    """
+
+    GROUPS: Dict[str, Tuple[str, ...]] = {
+        "pagination": ("browse:page:", "records:page:", "student_lecture_subject:", "student_lectures:page:"),
+        "bulk": (
+            "student_lecture_all:",
+            "student_assignment_subject:",
+            "teacher_download_submissions:",
+        ),
+    }
+    SWEEP_THRESHOLD = 10000
+
+    def __init__(self):
+        self.limits: Dict[str, Tuple[float, int]] = {
+            "default": (config.THROTTLE_RATE, config.THROTTLE_BURST),
+            "pagination": (config.THROTTLE_PAGINATION_RATE, config.THROTTLE_PAGINATION_BURST),
+            "bulk": (config.THROTTLE_BULK_RATE, config.THROTTLE_BULK_BURST),
+            # Replies to throttled messages, so a flood is not answered message by message
+            "notice": (1 / 10, 1),
+        }
+        self.global_limits: Dict[str, Tuple[float, int]] = {
+            "bulk": (config.THROTTLE_BULK_GLOBAL_RATE, config.THROTTLE_BULK_GLOBAL_BURST),
+        }
+        self.buckets: Dict[Tuple[str, int], TokenBucket] = {}
+        self.global_buckets: Dict[str, TokenBucket] = {
+            group: TokenBucket(rate, burst) for group, (rate, burst) in self.global_limits.items()
+        }
+
+    def get_group(self, callback_data: Optional[str]) -> Optional[str]:
+        """Find the handler group of a callback."""
+        if not callback_data:
+            return None
+        for group, prefixes in self.GROUPS.items():
+            if callback_data.startswith(prefixes):
+                return group
+        return None
+
+    def get_bucket(self, group: str, user_id: int) -> TokenBucket:
+        """Get or create the bucket of a user for a group."""
+        bucket = self.buckets.get((group, user_id))
+        if bucket is None:
+            if len(self.buckets) >= self.SWEEP_THRESHOLD:
+                self.sweep()
+            rate, burst = self.limits[group]
+            bucket = self.buckets[(group, user_id)] = TokenBucket(rate, burst)
+        return bucket
+
+    def sweep(self) -> None:
+        """Forget buckets that have fully refilled."""
+        now = time.monotonic()
+        for key in [key for key, bucket in self.buckets.items() if bucket.is_full(now)]:
+            del self.buckets[key]
+
+    def allow(self, user_id: int, group: Optional[str], general: bool = True) -> bool:
+        """Check all buckets that apply to an update; take a token only if every one has it."""
+        now = time.monotonic()
+        buckets = [self.get_bucket("default", user_id)] if general else []
+        if group is not None:
+            buckets.append(self.get_bucket(group, user_id))
+            if group in self.global_buckets:
+                buckets.append(self.global_buckets[group])
+
+        if not all(bucket.available(now) for bucket in buckets):
+            return False
+        for bucket in buckets:
+            bucket.consume(now)
+        return True
+
+    def has_file(self, message: Optional[Message]) -> bool:
+        """Check whether a message carries an uploaded file."""
+        return message is not None and any((
+            message.document, message.photo, message.video,
+            message.audio, message.voice, message.video_note
+        ))
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        tg_user: Optional[TgUser] = data.get("event_from_user")
+        if tg_user is None or not isinstance(event, Update):
+            return await handler(event, data)
+
+        callback = event.callback_query
+        group = self.get_group(callback.data) if callback else None
+
+        if self.allow(tg_user.id, group, general=not self.has_file(event.message)):
+            return await handler(event, data)
+
+        if callback:
+            await callback.answer("⏳ طلبات كثيرة، يرجى الانتظار قليلاً ثم المحاولة مجدداً.")
+        elif event.message and self.get_bucket("notice", tg_user.id).consume(time.monotonic()):
+            await event.message.answer("⏳ رسائل كثيرة، تم تجاهل بعضها. يرجى الانتظار قليلاً ثم إعادة إرسالها.")
+        return None
+
+
 def require_auth(handler):
     """Decorator to require authentication and email verification."""
     @wraps(handler)
@@ -0,0 +1,129 @@
+"""Delivery of stored course files (lectures, assignments) to a chat."""
+from typing import List, Optional, Sequence
+
+from aiogram import Bot
+from aiogram.types import InputMediaAudio, InputMediaDocument, InputMediaPhoto, InputMediaVideo
+
+from services.send_scheduler import bulk_delivery
+
+
+FILE_TYPE_EMOJIS = {
+    "document": "📄",
+    "photo": "🖼️",
+    "video": "🎥",
+    "audio": "🎵",
+    "voice": "🎤",
+    "video_note": "📹"
+}
+
+# sendMediaGroup only mixes photos with videos; documents and audio go in their own groups
+MEDIA_GROUP_KINDS = {
+    "document": "document",
+    "photo": "visual",
+    "video": "visual",
+    "audio": "audio"
+}
+MEDIA_GROUP_LIMIT = 10
+
+INPUT_MEDIA_TYPES = {
+    "document": InputMediaDocument,
+    "photo": InputMediaPhoto,
+    "video": InputMediaVideo,
+    "audio": InputMediaAudio
+}
+
+
+def build_caption(label: str, idx: int, total: int, file_type: str, file_name: Optional[str] = None) -> str:
+    """Build the caption of one delivered file."""
+    caption = f"{FILE_TYPE_EMOJIS.get(file_type, '📄')} {label} {idx}/{total}"
+    if file_type == "document" and file_name:
+        caption += f" - {file_name}"
+    return caption
+
+
+def format_file_size(size: int) -> str:
+    """Format a file size in bytes for display."""
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.0f} KB"
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def group_files(files: Sequence) -> List[list]:
+    """Split files into batches of consecutive, media-group compatible files."""
+    batches: List[list] = []
+    current_kind = None
+
+    for file in files:
+        kind = MEDIA_GROUP_KINDS.get(file.file_type)
+        if (
+            kind is not None
+            and kind == current_kind
+            and len(batches[-1]) < MEDIA_GROUP_LIMIT
+        ):
+            batches[-1].append(file)
+        else:
+            batches.append([file])
+        current_kind = kind
+
+    return batches
+
+
+async def send_single(bot: Bot, chat_id: int, file_type: str, file_id: str, caption: str) -> None:
+    """Send one file with the Bot API method matching its type."""
+    if file_type == "photo":
+        await bot.send_photo(chat_id=chat_id, photo=file_id, caption=caption)
+    elif file_type == "video":
+        await bot.send_video(chat_id=chat_id, video=file_id, caption=caption)
+    elif file_type == "audio":
+        await bot.send_audio(chat_id=chat_id, audio=file_id, caption=caption)
+    elif file_type == "voice":
+        await bot.send_voice(chat_id=chat_id, voice=file_id, caption=caption)
+    elif file_type == "video_note":
+        await bot.send_video_note(chat_id=chat_id, video_note=file_id)
+    else:
+        # Fallback: send as document
+        await bot.send_document(chat_id=chat_id, document=file_id, caption=caption)
+
+
+async def send_files(bot: Bot, chat_id: int, files: Sequence, label: str) -> int:
+    """Send files in order, batching compatible ones into media groups.
+
+    `files` are rows with file_id, file_type and file_name (Lecture,
+    Assignment). Returns the number of files delivered.
+    """
+    total = len(files)
+    sent_count = 0
+    idx = 0
+
+    with bulk_delivery():
+        for batch in group_files(files):
+            captions = [
+                build_caption(label, idx + offset, total, file.file_type, file.file_name)
+                for offset, file in enumerate(batch, 1)
+            ]
+            idx += len(batch)
+
+            if len(batch) > 1:
+                media = [
+                    INPUT_MEDIA_TYPES[file.file_type](media=file.file_id, caption=caption)
+                    for file, caption in zip(batch, captions)
+                ]
+                try:
+                    await bot.send_media_group(chat_id=chat_id, media=media)
+                    sent_count += len(batch)
+                    continue
+                except Exception as e:
+                    # One bad file fails the whole group; retry the files one by one
+                    print(f"Error sending media group: {e}")
+
+            for file, caption in zip(batch, captions):
+                try:
+                    await send_single(bot, chat_id, file.file_type, file.file_id, caption)
+                    sent_count += 1
+                except Exception as e:
+                    # Log error but continue sending other files
+                    print(f"Error sending file {file.file_id}: {e}")
+
+    return sent_count
@@ -1,8 +1,41 @@
-"""Keyboard builders."""
+"""Keyboard builders.
+
+Static menus are built once. Keyboards built from reference data
+(specializations, subjects) are cached by their content in a bounded LRU,
+so a dashboard edit produces a new key and stale ones age out.
+
+aiogram markups are NOT frozen, so the cached markup is never handed out:
+every call returns a deep copy (`cached_markup`), which is still much
+cheaper than running the builder, and a caller may change its copy freely.
+"""
+from functools import lru_cache, wraps
+from typing import Callable, FrozenSet, Optional, Tuple, TypeVar
+
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder, ReplyKeyboardBuilder
 
+# Distinct reference-data keyboards kept per builder (teacher multi-select adds one per selection)
+REFERENCE_KEYBOARD_CACHE_SIZE = 256
+
+Markup = TypeVar("Markup", InlineKeyboardMarkup, ReplyKeyboardMarkup)
+
+
+def cached_markup(maxsize: Optional[int] = None) -> Callable[[Callable[..., Markup]], Callable[..., Markup]]:
+    """Cache a keyboard builder, returning a deep copy of the cached markup on every call."""
+    def decorator(build: Callable[..., Markup]) -> Callable[..., Markup]:
+        cached = lru_cache(maxsize=maxsize)(build)
 
+        @wraps(build)
+        def wrapper(*args, **kwargs) -> Markup:
+            return cached(*args, **kwargs).model_copy(deep=True)
+
+        wrapper.cache_info = cached.cache_info
+        wrapper.cache_clear = cached.cache_clear
+        return wrapper
+    return decorator
+
+
+@cached_markup()
 def get_start_keyboard() -> ReplyKeyboardMarkup:
     """Get start menu keyboard."""
     builder = ReplyKeyboardBuilder()
@@ -20,6 +53,12 @@ def get_main_menu_keyboard(profile_completed: bool = False, user_role: str = "US
         user_role: User role - "VISITOR", "TEACHER", "ADMIN", "USER"
         is_student: Whether user is a student (for USER role)
     """
+    return _build_main_menu_keyboard(bool(profile_completed), str(user_role), bool(is_student))
+
+
+@cached_markup()
+def _build_main_menu_keyboard(profile_completed: bool, user_role: str, is_student: bool) -> ReplyKeyboardMarkup:
+    """Build the main menu once per (profile, role, student) combination."""
     builder = ReplyKeyboardBuilder()
     
     # Common for all roles
@@ -52,6 +91,7 @@ def get_main_menu_keyboard(profile_completed: bool = False, user_role: str = "US
     return builder.as_markup(resize_keyboard=True)
 
 
+@cached_markup()
 def get_jobs_menu_keyboard() -> ReplyKeyboardMarkup:
     """Get jobs submenu keyboard."""
     builder = ReplyKeyboardBuilder()
@@ -63,6 +103,7 @@ def get_jobs_menu_keyboard() -> ReplyKeyboardMarkup:
     return builder.as_markup(resize_keyboard=True)
 
 
+@cached_markup()
 def get_cancel_keyboard() -> ReplyKeyboardMarkup:
     """Get cancel keyboard."""
     builder = ReplyKeyboardBuilder()
@@ -70,6 +111,7 @@ def get_cancel_keyboard() -> ReplyKeyboardMarkup:
     return builder.as_markup(resize_keyboard=True)
 
 
+@cached_markup()
 def get_yes_no_keyboard() -> InlineKeyboardMarkup:
     """Get yes/no keyboard."""
     builder = InlineKeyboardBuilder()
@@ -121,6 +163,12 @@ def get_pagination_keyboard(page: int, total_pages: int, prefix: str, extra_data
 
 def get_specialization_keyboard(specializations: list[str]) -> InlineKeyboardMarkup:
     """Get specialization selection keyboard."""
+    return _build_specialization_keyboard(tuple(specializations))
+
+
+@cached_markup(REFERENCE_KEYBOARD_CACHE_SIZE)
+def _build_specialization_keyboard(specializations: Tuple[str, ...]) -> InlineKeyboardMarkup:
+    """Build the keyboard once per distinct content."""
     builder = InlineKeyboardBuilder()
     for spec in specializations:
         builder.add(InlineKeyboardButton(text=spec, callback_data=f"select_spec:{spec}"))
@@ -130,6 +178,12 @@ def get_specialization_keyboard(specializations: list[str]) -> InlineKeyboardMar
 
 def get_specialization_keyboard_with_ids(specs: list[tuple[int, str]]) -> InlineKeyboardMarkup:
     """Get specialization selection keyboard using IDs."""
+    return _build_specialization_keyboard_with_ids(tuple(specs))
+
+
+@cached_markup(REFERENCE_KEYBOARD_CACHE_SIZE)
+def _build_specialization_keyboard_with_ids(specs: Tuple[Tuple[int, str], ...]) -> InlineKeyboardMarkup:
+    """Build the keyboard once per distinct content."""
     builder = InlineKeyboardBuilder()
     for spec_id, spec_name in specs:
         # Use ID instead of name for callback_data to avoid encoding issues
@@ -138,6 +192,7 @@ def get_specialization_keyboard_with_ids(specs: list[tuple[int, str]]) -> Inline
     return builder.as_markup()
 
 
+@cached_markup()
 def get_admin_menu_keyboard() -> ReplyKeyboardMarkup:
     """Get admin menu keyboard."""
     builder = ReplyKeyboardBuilder()
@@ -166,6 +221,7 @@ def get_admin_approval_keyboard(item_id: int, item_type: str) -> InlineKeyboardM
     return builder.as_markup()
 
 
+@cached_markup()
 def get_profile_keyboard(profile_completed: bool = False, has_contact_accounts: bool = False) -> InlineKeyboardMarkup:
     """Get profile view keyboard with edit buttons and contact accounts."""
     builder = InlineKeyboardBuilder()
@@ -203,6 +259,7 @@ def get_profile_keyboard(profile_completed: bool = False, has_contact_accounts:
     return builder.as_markup()
 
 
+@cached_markup()
 def get_verification_retry_keyboard() -> ReplyKeyboardMarkup:
     """Get keyboard for verification code retry options."""
     builder = ReplyKeyboardBuilder()
@@ -212,6 +269,7 @@ def get_verification_retry_keyboard() -> ReplyKeyboardMarkup:
     return builder.as_markup(resize_keyboard=True)
 
 
+@cached_markup()
 def get_role_selection_keyboard() -> ReplyKeyboardMarkup:
     """Get keyboard for role selection during registration."""
     builder = ReplyKeyboardBuilder()
@@ -222,6 +280,7 @@ def get_role_selection_keyboard() -> ReplyKeyboardMarkup:
     return builder.as_markup(resize_keyboard=True)
 
 
+@cached_markup()
 def get_gender_keyboard() -> ReplyKeyboardMarkup:
     """Get keyboard for gender selection."""
     builder = ReplyKeyboardBuilder()
@@ -231,6 +290,7 @@ def get_gender_keyboard() -> ReplyKeyboardMarkup:
     return builder.as_markup(resize_keyboard=True)
 
 
+@cached_markup()
 def get_skip_keyboard() -> ReplyKeyboardMarkup:
     """Get keyboard with skip option."""
     builder = ReplyKeyboardBuilder()
@@ -241,6 +301,12 @@ def get_skip_keyboard() -> ReplyKeyboardMarkup:
 
 def get_single_specialization_keyboard(specs: list[tuple[int, str]]) -> InlineKeyboardMarkup:
     """Get specialization selection keyboard for single selection (students)."""
+    return _build_single_specialization_keyboard(tuple(specs))
+
+
+@cached_markup(REFERENCE_KEYBOARD_CACHE_SIZE)
+def _build_single_specialization_keyboard(specs: Tuple[Tuple[int, str], ...]) -> InlineKeyboardMarkup:
+    """Build the keyboard once per distinct content."""
     builder = InlineKeyboardBuilder()
     for spec_id, spec_name in specs:
         builder.add(InlineKeyboardButton(text=spec_name, callback_data=f"reg_spec:{spec_id}"))
@@ -250,7 +316,15 @@ def get_single_specialization_keyboard(specs: list[tuple[int, str]]) -> InlineKe
 
 def get_multi_specialization_keyboard(specs: list[tuple[int, str]], selected_ids: list[int] = None) -> InlineKeyboardMarkup:
     """Get specialization selection keyboard for multiple selection (teachers)."""
-    selected_ids = selected_ids or []
+    return _build_multi_specialization_keyboard(tuple(specs), frozenset(selected_ids or []))
+
+
+@cached_markup(REFERENCE_KEYBOARD_CACHE_SIZE)
+def _build_multi_specialization_keyboard(
+    specs: Tuple[Tuple[int, str], ...],
+    selected_ids: FrozenSet[int]
+) -> InlineKeyboardMarkup:
+    """Build the keyboard once per distinct content."""
     builder = InlineKeyboardBuilder()
     
     for spec_id, spec_name in specs:
@@ -271,7 +345,15 @@ def get_multi_specialization_keyboard(specs: list[tuple[int, str]], selected_ids
 
 def get_subjects_keyboard(subjects: list[tuple[int, str]], selected_ids: list[int] = None) -> InlineKeyboardMarkup:
     """Get subjects selection keyboard for teachers (multiple selection)."""
-    selected_ids = selected_ids or []
+    return _build_subjects_keyboard(tuple(subjects), frozenset(selected_ids or []))
+
+
+@cached_markup(REFERENCE_KEYBOARD_CACHE_SIZE)
+def _build_subjects_keyboard(
+    subjects: Tuple[Tuple[int, str], ...],
+    selected_ids: FrozenSet[int]
+) -> InlineKeyboardMarkup:
+    """Build the keyboard once per distinct content."""
     builder = InlineKeyboardBuilder()
     
     for subject_id, subject_name in subjects:
@@ -293,6 +375,7 @@ def get_subjects_keyboard(subjects: list[tuple[int, str]], selected_ids: list[in
     return builder.as_markup()
 
 
+@cached_markup()
 def get_social_media_keyboard() -> InlineKeyboardMarkup:
     """Get social media links keyboard."""
     builder = InlineKeyboardBuilder()
@@ -320,6 +403,7 @@ def get_social_media_keyboard() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cached_markup()
 def get_teacher_panel_keyboard() -> ReplyKeyboardMarkup:
     """Get teacher control panel keyboard."""
     builder = ReplyKeyboardBuilder()
@@ -331,6 +415,7 @@ def get_teacher_panel_keyboard() -> ReplyKeyboardMarkup:
     return builder.as_markup(resize_keyboard=True)
 
 
+@cached_markup()
 def get_e_learning_keyboard() -> ReplyKeyboardMarkup:
     """Get e-learning menu keyboard for students."""
     builder = ReplyKeyboardBuilder()
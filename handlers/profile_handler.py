@@ -12,7 +12,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from database.models import User, Gender, ContactAccount
 from services.profile_service import ProfileService
 from repositories.user_repository import UserRepository
-from repositories.specialization_repository import SpecializationRepository
+from services.reference_cache import reference_cache
 
 
 router = Router()
@@ -97,8 +97,7 @@ async def view_profile(message: Message, user: User, db_session: AsyncSession, *
         
         # Get specialization name from specialization_id
         if user.specialization_id:
-            spec_repo = SpecializationRepository(db_session)
-            specialization = await spec_repo.get_by_id(user.specialization_id)
+            specialization = await reference_cache.get_specialization(user.specialization_id)
             if specialization:
                 profile_text += f"   • <b>التخصص:</b> {specialization.name}\n"
             else:
@@ -224,8 +223,7 @@ async def process_student_id(message: Message, state: FSMContext, db_session: As
     await state.update_data(student_id=student_id)
     
     # Get active specializations from database
-    spec_repo = SpecializationRepository(db_session)
-    specializations = await spec_repo.get_all_active()
+    specializations = await reference_cache.get_specializations()
     
     if not specializations:
         await message.answer(
@@ -271,8 +269,7 @@ async def process_specialization_selection(callback: CallbackQuery, state: FSMCo
         return
     
     # Verify specialization exists and is active
-    spec_repo = SpecializationRepository(db_session)
-    specialization = await spec_repo.get_by_id(spec_id)
+    specialization = await reference_cache.get_specialization(spec_id)
     
     if not specialization:
         await callback.answer("⚠️ هذا الاختصاص غير موجود.", show_alert=True)
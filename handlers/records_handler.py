@@ -1,16 +1,21 @@
 """Records handler (Your Records)."""
 from aiogram import Router, F
-from aiogram.types import Message, FSInputFile
+from aiogram.types import Message, CallbackQuery, FSInputFile, InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.context import FSMContext
-from handlers.keyboards import get_main_menu_keyboard, get_jobs_menu_keyboard, get_social_media_keyboard, get_teacher_panel_keyboard
+from handlers.keyboards import (
+    get_main_menu_keyboard, get_jobs_menu_keyboard, get_social_media_keyboard, get_teacher_panel_keyboard,
+    get_pagination_keyboard
+)
 from handlers.common import require_auth, require_teacher
 from sqlalchemy.ext.asyncio import AsyncSession
-from database.models import User, ServiceStatus, RequestStatus, ContactRequestStatus
+from database.models import User, ServiceStatus, RequestStatus, ContactRequest, ContactRequestStatus
 from repositories.service_repository import ServiceRepository
 from repositories.request_repository import ServiceRequestRepository
 from repositories.contact_repository import ContactRequestRepository
 from services.service_service import ServiceService
 from services.request_service import RequestService
+from typing import Dict, Optional, Tuple
 import os
 
 router = Router()
@@ -119,96 +124,175 @@ async def show_teacher_panel(message: Message, user: User):
     )
 
 
+SERVICE_STATUS_EMOJI = {
+    ServiceStatus.DRAFT: "📝",
+    ServiceStatus.PUBLISHED: "✅",
+    ServiceStatus.REMOVED: "❌",
+    ServiceStatus.COMPLETED: "✔️",
+    ServiceStatus.CONTACT_ACCEPTED: "🤝",
+    ServiceStatus.EXPIRED: "⏰"
+}
+
+REQUEST_STATUS_EMOJI = {
+    RequestStatus.DRAFT: "📝",
+    RequestStatus.PUBLISHED: "✅",
+    RequestStatus.REMOVED: "❌",
+    RequestStatus.COMPLETED: "✔️",
+    RequestStatus.CONTACT_ACCEPTED: "🤝",
+    RequestStatus.EXPIRED: "⏰"
+}
+
+CONTACT_STATUS_EMOJI = {
+    ContactRequestStatus.PENDING: "⏳",
+    ContactRequestStatus.ACCEPTED: "✅",
+    ContactRequestStatus.REJECTED: "❌"
+}
+
+# Section key -> (title, records per page)
+RECORD_SECTIONS: Dict[str, Tuple[str, int]] = {
+    "services": ("📤 الخدمات المقدمة", 10),
+    "requests": ("📥 طلبات الخدمات", 10),
+    "sent": ("📤 طلبات التواصل المرسلة", 5),
+    "received": ("📥 طلبات التواصل المستلمة", 5),
+}
+
+
+async def count_records(db_session: AsyncSession, user_id: int) -> Dict[str, int]:
+    """Count the user's records of every section."""
+    sent, received = await ContactRequestRepository(db_session).count_by_user(user_id)
+    return {
+        "services": await ServiceRepository(db_session).count_by_provider(user_id),
+        "requests": await ServiceRequestRepository(db_session).count_by_requester(user_id),
+        "sent": sent,
+        "received": received,
+    }
+
+
+async def count_section(db_session: AsyncSession, user_id: int, section: str) -> int:
+    """Count the user's records of one section."""
+    if section == "services":
+        return await ServiceRepository(db_session).count_by_provider(user_id)
+    if section == "requests":
+        return await ServiceRequestRepository(db_session).count_by_requester(user_id)
+    # Sent and received come from the same row set in one query
+    sent, received = await ContactRequestRepository(db_session).count_by_user(user_id)
+    return sent if section == "sent" else received
+
+
+def contact_title(contact: ContactRequest) -> str:
+    """Get the title of the service or request a contact request is about."""
+    if contact.service:
+        return contact.service.title
+    if contact.service_request:
+        return contact.service_request.title
+    return "غير متاح"
+
+
+async def format_records(db_session: AsyncSession, user_id: int, section: str, skip: int, limit: int) -> str:
+    """Format one page of a records section."""
+    text = ""
+    
+    if section == "services":
+        service_service = ServiceService(db_session)
+        for service in await ServiceRepository(db_session).get_by_provider(user_id, skip, limit):
+            text += f"{SERVICE_STATUS_EMOJI.get(service.status, '📌')} {service.title} - {service.status.value}\n"
+            text += f"   السعر: {service_service.format_price(service)}\n"
+    
+    elif section == "requests":
+        request_service = RequestService(db_session)
+        for req in await ServiceRequestRepository(db_session).get_by_requester(user_id, skip, limit):
+            text += f"{REQUEST_STATUS_EMOJI.get(req.status, '📌')} {req.title} - {req.status.value}\n"
+            text += f"   الميزانية: {request_service.format_budget(req)}\n"
+    
+    elif section == "sent":
+        for contact in await ContactRequestRepository(db_session).get_sent(user_id, skip, limit):
+            text += f"{CONTACT_STATUS_EMOJI.get(contact.status, '📌')} {contact_title(contact)} - {contact.status.value}\n"
+    
+    elif section == "received":
+        for contact in await ContactRequestRepository(db_session).get_received(user_id, skip, limit):
+            requester_name = contact.requester.full_name or "غير معروف"
+            text += (
+                f"{CONTACT_STATUS_EMOJI.get(contact.status, '📌')} {contact_title(contact)} "
+                f"من {requester_name} - {contact.status.value}\n"
+            )
+    
+    return text
+
+
+async def build_records_summary(db_session: AsyncSession, user_id: int) -> Tuple[str, Optional[InlineKeyboardMarkup]]:
+    """Build the records summary: counts and the first page of every section."""
+    counts = await count_records(db_session, user_id)
+    records_text = "📊 سجلاتك\n\n"
+    
+    builder = InlineKeyboardBuilder()
+    has_more = False
+    
+    for section, (title, page_size) in RECORD_SECTIONS.items():
+        total = counts[section]
+        if not total:
+            continue
+        
+        records_text += f"{title} ({total}):\n"
+        records_text += await format_records(db_session, user_id, section, 0, page_size)
+        if total > page_size:
+            records_text += f"... و {total - page_size} المزيد\n"
+            builder.add(InlineKeyboardButton(text=f"{title} - المزيد", callback_data=f"records:page:2:{section}"))
+            has_more = True
+        records_text += "\n"
+    
+    if not any(counts.values()):
+        records_text += "لم يتم العثور على سجلات. ابدأ بتقديم خدمة أو تقديم طلب!"
+    
+    builder.adjust(1)
+    return records_text, builder.as_markup() if has_more else None
+
+
 @router.message(F.text == "سجلاتك")
 @require_auth
 async def show_records(message: Message, db_session: AsyncSession, user: User):
-    """Show user's records."""
-    records_text = "📊 سجلاتك\n\n"
+    """Show a summary of the user's records."""
+    user_id: int = user.id  # type: ignore[assignment]
+    records_text, keyboard = await build_records_summary(db_session, user_id)
     
-    # Services provided
-    service_repo = ServiceRepository(db_session)
+    await message.answer(records_text, reply_markup=keyboard or get_jobs_menu_keyboard())
+
+
+@router.callback_query(F.data == "records:summary")
+@require_auth
+async def show_records_summary(callback: CallbackQuery, db_session: AsyncSession, user: User):
+    """Return from a records section to the summary."""
     user_id: int = user.id  # type: ignore[assignment]
-    services = await service_repo.get_by_provider(user_id)
+    records_text, keyboard = await build_records_summary(db_session, user_id)
     
-    if services:
-        records_text += f"📤 الخدمات المقدمة ({len(services)}):\n"
-        service_service = ServiceService(db_session)
-        for service in services[:10]:  # Show first 10
-            status_emoji = {
-                ServiceStatus.DRAFT: "📝",
-                ServiceStatus.PUBLISHED: "✅",
-                ServiceStatus.REMOVED: "❌",
-                ServiceStatus.COMPLETED: "✔️",
-                ServiceStatus.CONTACT_ACCEPTED: "🤝",
-                ServiceStatus.EXPIRED: "⏰"
-            }
-            records_text += f"{status_emoji.get(service.status, '📌')} {service.title} - {service.status.value}\n"
-            records_text += f"   السعر: {service_service.format_price(service)}\n"
-        if len(services) > 10:
-            records_text += f"... و {len(services) - 10} المزيد\n"
-        records_text += "\n"
+    await callback.message.edit_text(records_text, reply_markup=keyboard)
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith("records:page:"))
+@require_auth
+async def show_records_page(callback: CallbackQuery, db_session: AsyncSession, user: User):
+    """Show one page of a records section."""
+    parts = callback.data.split(":")
+    page = int(parts[2])
+    section = parts[3]
     
-    # Service requests
-    request_repo = ServiceRequestRepository(db_session)
-    requests = await request_repo.get_by_requester(user_id)
+    if section not in RECORD_SECTIONS:
+        await callback.answer("خطأ في البيانات.", show_alert=True)
+        return
     
-    if requests:
-        records_text += f"📥 طلبات الخدمات ({len(requests)}):\n"
-        request_service = RequestService(db_session)
-        for req in requests[:10]:  # Show first 10
-            status_emoji = {
-                RequestStatus.DRAFT: "📝",
-                RequestStatus.PUBLISHED: "✅",
-                RequestStatus.REMOVED: "❌",
-                RequestStatus.COMPLETED: "✔️",
-                RequestStatus.CONTACT_ACCEPTED: "🤝",
-                RequestStatus.EXPIRED: "⏰"
-            }
-            records_text += f"{status_emoji.get(req.status, '📌')} {req.title} - {req.status.value}\n"
-            records_text += f"   الميزانية: {request_service.format_budget(req)}\n"
-        if len(requests) > 10:
-            records_text += f"... و {len(requests) - 10} المزيد\n"
-        records_text += "\n"
+    user_id: int = user.id  # type: ignore[assignment]
+    title, page_size = RECORD_SECTIONS[section]
+    total = await count_section(db_session, user_id, section)
+    total_pages = max(1, (total + page_size - 1) // page_size)
+    page = min(max(page, 1), total_pages)
     
-    # Contact requests
-    contact_repo = ContactRequestRepository(db_session)
-    contacts = await contact_repo.get_by_user(user_id)
+    records_text = f"{title} ({total}) - صفحة {page}/{total_pages}\n\n"
+    records_text += await format_records(db_session, user_id, section, (page - 1) * page_size, page_size)
     
-    if contacts:
-        sent_contacts = [c for c in contacts if c.requester_id == user_id]
-        received_contacts = [c for c in contacts if c.provider_id == user_id]
-        
-        if sent_contacts:
-            records_text += f"📤 طلبات التواصل المرسلة ({len(sent_contacts)}):\n"
-            for contact in sent_contacts[:5]:
-                status_emoji = {
-                    ContactRequestStatus.PENDING: "⏳",
-                    ContactRequestStatus.ACCEPTED: "✅",
-                    ContactRequestStatus.REJECTED: "❌"
-                }
-                service_name = contact.service.title if contact.service else (contact.service_request.title if contact.service_request else "غير متاح")
-                records_text += f"{status_emoji.get(contact.status, '📌')} {service_name} - {contact.status.value}\n"
-            if len(sent_contacts) > 5:
-                records_text += f"... و {len(sent_contacts) - 5} المزيد\n"
-            records_text += "\n"
-        
-        if received_contacts:
-            records_text += f"📥 طلبات التواصل المستلمة ({len(received_contacts)}):\n"
-            for contact in received_contacts[:5]:
-                status_emoji = {
-                    ContactRequestStatus.PENDING: "⏳",
-                    ContactRequestStatus.ACCEPTED: "✅",
-                    ContactRequestStatus.REJECTED: "❌"
-                }
-                service_name = contact.service.title if contact.service else (contact.service_request.title if contact.service_request else "غير متاح")
-                requester_name = contact.requester.full_name or "غير معروف"
-                records_text += f"{status_emoji.get(contact.status, '📌')} {service_name} من {requester_name} - {contact.status.value}\n"
-            if len(received_contacts) > 5:
-                records_text += f"... و {len(received_contacts) - 5} المزيد\n"
-            records_text += "\n"
-    
-    if not services and not requests and not contacts:
-        records_text += "لم يتم العثور على سجلات. ابدأ بتقديم خدمة أو تقديم طلب!"
+    builder = InlineKeyboardBuilder()
+    for row in get_pagination_keyboard(page, total_pages, "records", section).inline_keyboard:
+        builder.row(*row)
+    builder.row(InlineKeyboardButton(text="🔙 ملخص السجلات", callback_data="records:summary"))
     
-    await message.answer(records_text, reply_markup=get_jobs_menu_keyboard())
-
+    await callback.message.edit_text(records_text, reply_markup=builder.as_markup())
+    await callback.answer()
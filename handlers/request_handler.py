@@ -5,12 +5,13 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from handlers.keyboards import get_main_menu_keyboard, get_cancel_keyboard, get_request_offer_keyboard, get_specialization_keyboard_with_ids, get_accept_reject_keyboard, get_jobs_menu_keyboard
 from handlers.common import require_auth
+from handlers.state_codec import unpack_ids, toggle_id
 from sqlalchemy.ext.asyncio import AsyncSession
-from database.models import User, ServiceRequest, RequestStatus, ContactRequest, ContactRequestStatus, Gender
+from database.models import User, ServiceRequest, RequestStatus, ContactRequestStatus, Gender
 from services.request_service import RequestService
 from repositories.request_repository import ServiceRequestRepository
 from repositories.contact_repository import ContactRequestRepository
-from repositories.specialization_repository import SpecializationRepository
+from services.reference_cache import reference_cache
 from config import config
 
 router = Router()
@@ -88,8 +89,7 @@ async def process_request_description(message: Message, state: FSMContext, db_se
     await state.update_data(description=description)
     
     # Load specializations from database
-    spec_repo = SpecializationRepository(db_session)
-    specializations = await spec_repo.get_all_active()
+    specializations = await reference_cache.get_specializations()
     spec_list = [(spec.id, spec.name) for spec in specializations]
     
     if spec_list:
@@ -98,7 +98,7 @@ async def process_request_description(message: Message, state: FSMContext, db_se
             "يمكنك اختيار عدة تخصصات:",
             reply_markup=get_specialization_keyboard_with_ids(spec_list)
         )
-        await state.update_data(selected_specializations=[], specialization_names={})
+        await state.update_data(selected_specializations="")
         await state.set_state(RequestStates.waiting_for_specializations)
     else:
         await message.answer(
@@ -111,33 +111,25 @@ async def process_specialization_selection(callback: CallbackQuery, state: FSMCo
     """Process specialization selection."""
     spec_id = int(callback.data.split(":")[1])
     
-    # Get specialization name from database
-    spec_repo = SpecializationRepository(db_session)
-    spec = await spec_repo.get_by_id(spec_id)
+    # Names are resolved from the active list instead of being kept in FSM
+    all_specs = await reference_cache.get_specializations()
+    spec_names = {s.id: s.name for s in all_specs}
+    spec_list = list(spec_names.items())
     
-    if not spec:
+    if spec_id not in spec_names:
         await callback.answer("التخصص غير موجود.", show_alert=True)
         return
     
     data = await state.get_data()
-    selected_ids = data.get("selected_specializations", [])
-    spec_names = data.get("specialization_names", {})
+    packed_ids = toggle_id(data.get("selected_specializations"), spec_id)
+    selected_ids = unpack_ids(packed_ids)
     
     if spec_id in selected_ids:
-        selected_ids.remove(spec_id)
-        if spec_id in spec_names:
-            del spec_names[spec_id]
-        await callback.answer(f"تم إزالة {spec.name}")
+        await callback.answer(f"تم إضافة {spec_names[spec_id]}")
     else:
-        selected_ids.append(spec_id)
-        spec_names[spec_id] = spec.name
-        await callback.answer(f"تم إضافة {spec.name}")
+        await callback.answer(f"تم إزالة {spec_names[spec_id]}")
     
-    await state.update_data(selected_specializations=selected_ids, specialization_names=spec_names)
-    
-    # Reload keyboard with all specializations
-    all_specs = await spec_repo.get_all_active()
-    spec_list = [(s.id, s.name) for s in all_specs]
+    await state.update_data(selected_specializations=packed_ids)
     
     if selected_ids:
         selected_names = [spec_names.get(sid, "") for sid in selected_ids]
@@ -163,8 +155,7 @@ async def finish_specialization_selection(message: Message, state: FSMContext, d
     
     if message.text and message.text.lower() in ["done", "تم"]:
         data = await state.get_data()
-        selected_ids = data.get("selected_specializations", [])
-        spec_names = data.get("specialization_names", {})
+        selected_ids = unpack_ids(data.get("selected_specializations"))
         
         if not selected_ids:
             await message.answer("يرجى اختيار تخصص واحد على الأقل قبل المتابعة.")
@@ -242,9 +233,9 @@ async def process_budget(message: Message, state: FSMContext, db_session: AsyncS
         return
     
     # Get specialization names from IDs
-    selected_ids = data.get("selected_specializations", [])
-    spec_names = data.get("specialization_names", {})
-    selected_spec_names = [spec_names.get(sid, "") for sid in selected_ids if sid in spec_names]
+    selected_ids = unpack_ids(data.get("selected_specializations"))
+    spec_names = {s.id: s.name for s in await reference_cache.get_specializations()}
+    selected_spec_names = [spec_names[sid] for sid in selected_ids if sid in spec_names]
     
     if not selected_spec_names:
         await message.answer("❌ يرجى اختيار تخصص واحد على الأقل.")
@@ -347,20 +338,19 @@ async def offer_service(callback: CallbackQuery, db_session: AsyncSession, user:
     contact_repo = ContactRequestRepository(db_session)
     
     # Check if already offered
-    existing = await contact_repo.get_by_user(user_id)
-    for contact in existing:
-        if contact.service_request_id == request_id and contact.provider_id == user_id:
-            await callback.answer("لقد عرضت تقديم هذه الخدمة بالفعل.", show_alert=True)
-            return
+    if await contact_repo.has_offer(user_id, request_id):
+        await callback.answer("لقد عرضت تقديم هذه الخدمة بالفعل.", show_alert=True)
+        return
     
     requester_id: int = request.requester_id  # type: ignore[assignment]
-    contact_request = ContactRequest(
+    contact_request_id = await contact_repo.create_pending(
         requester_id=requester_id,
         provider_id=user_id,
-        service_request_id=request_id,
-        status=ContactRequestStatus.PENDING.value  # type: ignore
+        service_request_id=request_id
     )
-    contact_request = await contact_repo.create(contact_request)
+    if contact_request_id is None:
+        await callback.answer("لقد عرضت تقديم هذه الخدمة بالفعل.", show_alert=True)
+        return
     
     # Notify requester (طالب الخدمة - العميل)
     requester = request.requester
@@ -383,7 +373,7 @@ async def offer_service(callback: CallbackQuery, db_session: AsyncSession, user:
         await bot.send_message(
             requester.telegram_id,
             notification_text,
-            reply_markup=get_accept_reject_keyboard(contact_request.id)
+            reply_markup=get_accept_reject_keyboard(contact_request_id)
         )
     except Exception:
         pass
@@ -6,7 +6,7 @@ from aiogram.fsm.state import State, StatesGroup
 from handlers.keyboards import get_main_menu_keyboard, get_cancel_keyboard, get_service_contact_keyboard, get_accept_reject_keyboard, get_jobs_menu_keyboard
 from handlers.common import require_auth, require_student
 from sqlalchemy.ext.asyncio import AsyncSession
-from database.models import User, Service, ServiceStatus, ContactRequest, ContactRequestStatus
+from database.models import User, Service, ServiceStatus, ContactRequestStatus
 from services.service_service import ServiceService
 from services.profile_service import ProfileService
 from repositories.service_repository import ServiceRepository
@@ -262,26 +262,23 @@ async def request_service_contact(callback: CallbackQuery, db_session: AsyncSess
     
     # Check if already requested or rejected
     contact_repo = ContactRequestRepository(db_session)
-    existing = await contact_repo.get_by_user(user_id)
-    for contact in existing:
-        contact_service_id: int = contact.service_id  # type: ignore
-        contact_status = str(contact.status) if contact.status else ""  # type: ignore
-        if contact_service_id == service_id:
-            if contact_status == str(ContactRequestStatus.PENDING):
-                await callback.answer("لقد طلبت التواصل لهذه الخدمة بالفعل.", show_alert=True)
-                return
-            elif contact_status == str(ContactRequestStatus.REJECTED):
-                await callback.answer("❌ لا يمكنك إرسال طلب تواصل جديد لهذه الخدمة. تم رفض طلبك السابق.", show_alert=True)
-                return
-    
-    # Create contact request
-    contact_request = ContactRequest(
+    contact_status = await contact_repo.get_service_contact_status(user_id, service_id)
+    if contact_status == ContactRequestStatus.PENDING:
+        await callback.answer("لقد طلبت التواصل لهذه الخدمة بالفعل.", show_alert=True)
+        return
+    elif contact_status == ContactRequestStatus.REJECTED:
+        await callback.answer("❌ لا يمكنك إرسال طلب تواصل جديد لهذه الخدمة. تم رفض طلبك السابق.", show_alert=True)
+        return
+    
+    # Create contact request (the pending unique index catches double taps)
+    contact_request_id = await contact_repo.create_pending(
         requester_id=user_id,
         provider_id=service_provider_id,
-        service_id=service_id,
-        status=ContactRequestStatus.PENDING.value  # type: ignore
+        service_id=service_id
     )
-    contact_request = await contact_repo.create(contact_request)
+    if contact_request_id is None:
+        await callback.answer("لقد طلبت التواصل لهذه الخدمة بالفعل.", show_alert=True)
+        return
     
     # Notify provider
     provider = service.provider  # type: ignore
@@ -295,7 +292,6 @@ async def request_service_contact(callback: CallbackQuery, db_session: AsyncSess
         notification_text += f"الهاتف: {user_phone}\n"
     
     try:
-        contact_request_id: int = contact_request.id  # type: ignore
         provider_telegram_id: int = provider.telegram_id  # type: ignore
         await bot.send_message(
             provider_telegram_id,
@@ -10,11 +10,12 @@ from handlers.keyboards import (
     get_subjects_keyboard
 )
 from handlers.common import require_auth
+from handlers.state_codec import unpack_ids, toggle_id
 from sqlalchemy.ext.asyncio import AsyncSession
 from repositories.user_repository import UserRepository
-from repositories.specialization_repository import SpecializationRepository
 from repositories.subject_repository import SubjectRepository
 from repositories.teacher_repository import TeacherRepository
+from services.reference_cache import reference_cache
 from database.models import User, UserRole, Gender
 from datetime import datetime
 
@@ -296,8 +297,7 @@ async def process_student_name(message: Message, state: FSMContext, db_session:
     await state.update_data(full_name=full_name)
     
     # Get specializations
-    spec_repo = SpecializationRepository(db_session)
-    specs = await spec_repo.get_all_active()
+    specs = await reference_cache.get_specializations()
     
     if not specs:
         await message.answer("لا توجد تخصصات متاحة حالياً. يرجى التواصل مع الإدارة.")
@@ -319,8 +319,7 @@ async def process_student_specialization_callback(callback: CallbackQuery, state
     spec_id = int(callback.data.split(":")[1])
     
     # Get specialization name
-    spec_repo = SpecializationRepository(db_session)
-    spec = await spec_repo.get_by_id(spec_id)
+    spec = await reference_cache.get_specialization(spec_id)
     
     if not spec:
         await callback.answer("التخصص غير موجود!")
@@ -435,11 +434,10 @@ async def process_teacher_name(message: Message, state: FSMContext, db_session:
         await message.answer("يجب أن يكون الاسم 3 أحرف على الأقل. يرجى المحاولة مرة أخرى:")
         return
     
-    await state.update_data(full_name=full_name, selected_spec_ids=[])
+    await state.update_data(full_name=full_name, selected_spec_ids="")
     
     # Get specializations
-    spec_repo = SpecializationRepository(db_session)
-    specs = await spec_repo.get_all_active()
+    specs = await reference_cache.get_specializations()
     
     if not specs:
         await message.answer("لا توجد تخصصات متاحة حالياً. يرجى التواصل مع الإدارة.")
@@ -447,7 +445,6 @@ async def process_teacher_name(message: Message, state: FSMContext, db_session:
         return
     
     spec_list = [(s.id, s.name) for s in specs]
-    await state.update_data(available_specs=spec_list)
     
     await message.answer(
         "يرجى اختيار تخصصاتك (يمكنك اختيار أكثر من تخصص):\n\n"
@@ -463,18 +460,14 @@ async def process_teacher_spec_toggle(callback: CallbackQuery, state: FSMContext
     spec_id = int(callback.data.split(":")[1])
     data = await state.get_data()
     
-    selected_ids = data.get("selected_spec_ids", [])
-    available_specs = data.get("available_specs", [])
+    selected_spec_ids = toggle_id(data.get("selected_spec_ids"), spec_id)
+    await state.update_data(selected_spec_ids=selected_spec_ids)
     
-    if spec_id in selected_ids:
-        selected_ids.remove(spec_id)
-    else:
-        selected_ids.append(spec_id)
-    
-    await state.update_data(selected_spec_ids=selected_ids)
+    specs = await reference_cache.get_specializations()
+    available_specs = [(s.id, s.name) for s in specs]
     
     await callback.message.edit_reply_markup(
-        reply_markup=get_multi_specialization_keyboard(available_specs, selected_ids)
+        reply_markup=get_multi_specialization_keyboard(available_specs, unpack_ids(selected_spec_ids))
     )
     await callback.answer()
 
@@ -483,17 +476,16 @@ async def process_teacher_spec_toggle(callback: CallbackQuery, state: FSMContext
 async def process_teacher_spec_confirm(callback: CallbackQuery, state: FSMContext, db_session: AsyncSession):
     """Confirm teacher specialization selection."""
     data = await state.get_data()
-    selected_ids = data.get("selected_spec_ids", [])
+    selected_ids = unpack_ids(data.get("selected_spec_ids"))
     
     if not selected_ids:
         await callback.answer("يرجى اختيار تخصص واحد على الأقل!")
         return
     
     # Get specialization names
-    spec_repo = SpecializationRepository(db_session)
     spec_names = []
     for spec_id in selected_ids:
-        spec = await spec_repo.get_by_id(spec_id)
+        spec = await reference_cache.get_specialization(spec_id)
         if spec:
             spec_names.append(spec.name)
     
@@ -561,18 +553,16 @@ async def process_teacher_gender(message: Message, state: FSMContext, db_session
     
     # Get available subjects for selected specializations
     data = await state.get_data()
-    selected_spec_ids = data.get("selected_spec_ids", [])
+    selected_spec_ids = unpack_ids(data.get("selected_spec_ids"))
     
-    subject_repo = SubjectRepository(db_session)
-    available_subjects = await subject_repo.get_unassigned_subjects_by_specializations(selected_spec_ids)
+    subject_list = await get_teacher_subject_choices(db_session, selected_spec_ids)
     
-    if not available_subjects:
+    if not subject_list:
         # No subjects available, complete registration without subjects
         await complete_teacher_registration(message, state, db_session)
         return
     
-    subject_list = [(s.id, f"{s.name} ({s.specialization.name})") for s in available_subjects]
-    await state.update_data(available_subjects=subject_list, selected_subject_ids=[])
+    await state.update_data(selected_subject_ids="")
     
     await message.answer(
         "يرجى اختيار المواد التي تدرسها:\n\n"
@@ -583,24 +573,28 @@ async def process_teacher_gender(message: Message, state: FSMContext, db_session
     await state.set_state(RegistrationStates.waiting_for_teacher_subjects)
 
 
+async def get_teacher_subject_choices(db_session: AsyncSession, spec_ids: list) -> list:
+    """Build (id, label) choices of unassigned subjects for the selected specializations."""
+    subject_repo = SubjectRepository(db_session)
+    available_subjects = await subject_repo.get_unassigned_subjects_by_specializations(spec_ids)
+    return [(s.id, f"{s.name} ({s.specialization.name})") for s in available_subjects]
+
+
 @router.callback_query(F.data.startswith("reg_subject:"), RegistrationStates.waiting_for_teacher_subjects)
-async def process_teacher_subject_toggle(callback: CallbackQuery, state: FSMContext):
+async def process_teacher_subject_toggle(callback: CallbackQuery, state: FSMContext, db_session: AsyncSession):
     """Toggle teacher subject selection."""
     subject_id = int(callback.data.split(":")[1])
     data = await state.get_data()
     
-    selected_ids = data.get("selected_subject_ids", [])
-    available_subjects = data.get("available_subjects", [])
-    
-    if subject_id in selected_ids:
-        selected_ids.remove(subject_id)
-    else:
-        selected_ids.append(subject_id)
+    selected_subject_ids = toggle_id(data.get("selected_subject_ids"), subject_id)
+    await state.update_data(selected_subject_ids=selected_subject_ids)
     
-    await state.update_data(selected_subject_ids=selected_ids)
+    available_subjects = await get_teacher_subject_choices(
+        db_session, unpack_ids(data.get("selected_spec_ids"))
+    )
     
     await callback.message.edit_reply_markup(
-        reply_markup=get_subjects_keyboard(available_subjects, selected_ids)
+        reply_markup=get_subjects_keyboard(available_subjects, unpack_ids(selected_subject_ids))
     )
     await callback.answer()
 
@@ -616,7 +610,7 @@ async def process_teacher_subjects_confirm(callback: CallbackQuery, state: FSMCo
 @router.callback_query(F.data == "reg_subjects_skip", RegistrationStates.waiting_for_teacher_subjects)
 async def process_teacher_subjects_skip(callback: CallbackQuery, state: FSMContext, db_session: AsyncSession):
     """Skip teacher subjects selection."""
-    await state.update_data(selected_subject_ids=[])
+    await state.update_data(selected_subject_ids="")
     await callback.message.edit_text("تم تخطي اختيار المواد")
     await complete_teacher_registration(callback.message, state, db_session)
     await callback.answer()
@@ -645,7 +639,7 @@ async def complete_teacher_registration(message: Message, state: FSMContext, db_
     
     # Set first specialization as main specialization
     spec_names = data.get("specialization_names", [])
-    selected_spec_ids = data.get("selected_spec_ids", [])
+    selected_spec_ids = unpack_ids(data.get("selected_spec_ids"))
     if spec_names:
         user.specialization = spec_names[0]
     if selected_spec_ids:
@@ -659,7 +653,7 @@ async def complete_teacher_registration(message: Message, state: FSMContext, db_
         await teacher_repo.add_specialization(user_id, spec_id, is_primary=(i == 0))
     
     # Add teacher subjects
-    selected_subject_ids = data.get("selected_subject_ids", [])
+    selected_subject_ids = unpack_ids(data.get("selected_subject_ids"))
     for subject_id in selected_subject_ids:
         await teacher_repo.add_subject(user_id, subject_id)
     
@@ -677,10 +671,9 @@ async def complete_teacher_registration(message: Message, state: FSMContext, db_
     
     if selected_subject_ids:
         # Get subject names
-        subject_repo = SubjectRepository(db_session)
         subject_names = []
         for sid in selected_subject_ids:
-            subj = await subject_repo.get_by_id(sid)
+            subj = await reference_cache.get_subject(sid)
             if subj:
                 subject_names.append(subj.name)
         summary += f"• المواد: {', '.join(subject_names)}\n"
@@ -0,0 +1,91 @@
+"""Compact encodings for FSM state data.
+
+FSM data is serialized on every update when the storage is external, so
+multi-step flows keep only small scalar values there: ID lists are packed
+into range strings ("3-7,12"). Uploaded files are staged in the database
+(see repositories.ordered_files) rather than kept in the state.
+"""
+
+from typing import Iterable, List, Optional
+
+
+def _run_ids(part: str) -> range:
+    """Expand one "a-b" part; a run may be ascending or descending."""
+    if "-" not in part:
+        value = int(part)
+        return range(value, value + 1)
+
+    first, last = (int(value) for value in part.split("-", 1))
+    step = 1 if last >= first else -1
+    return range(first, last + step, step)
+
+
+def pack_ids(ids: Iterable[int]) -> str:
+    """Pack IDs into a range string, keeping their order (e.g. "1-4,9,7-5")."""
+    parts: List[str] = []
+    start: Optional[int] = None
+    end: Optional[int] = None
+    step = 0
+
+    for item_id in ids:
+        if start is not None:
+            if step == 0 and abs(item_id - end) == 1:
+                step = item_id - end
+                end = item_id
+                continue
+            if step != 0 and item_id == end + step:
+                end = item_id
+                continue
+            parts.append(str(start) if start == end else f"{start}-{end}")
+        start = end = item_id
+        step = 0
+
+    if start is not None:
+        parts.append(str(start) if start == end else f"{start}-{end}")
+
+    return ",".join(parts)
+
+
+def unpack_ids(packed: Optional[str]) -> List[int]:
+    """Unpack a range string produced by pack_ids."""
+    if not packed:
+        return []
+
+    ids: List[int] = []
+    for part in packed.split(","):
+        ids.extend(_run_ids(part))
+    return ids
+
+
+def count_ids(packed: Optional[str]) -> int:
+    """Count IDs in a range string without expanding it."""
+    if not packed:
+        return 0
+    return sum(len(_run_ids(part)) for part in packed.split(","))
+
+
+def slice_ids(packed: Optional[str], start: int, stop: int) -> List[int]:
+    """Return ids[start:stop] of a range string without expanding all of it."""
+    ids: List[int] = []
+    if not packed or stop <= start:
+        return ids
+
+    position = 0
+    for part in packed.split(","):
+        run = _run_ids(part)
+        if position + len(run) > start:
+            ids.extend(run[max(start - position, 0):stop - position])
+        position += len(run)
+        if position >= stop:
+            break
+    return ids
+
+
+def toggle_id(packed: Optional[str], item_id: int) -> str:
+    """Add or remove an ID from a range string, keeping selection order."""
+    ids = unpack_ids(packed)
+    if item_id in ids:
+        ids.remove(item_id)
+    else:
+        ids.append(item_id)
+    return pack_ids(ids)
@@ -2,14 +2,17 @@
 from aiogram import Router, F, Bot
 from aiogram.types import Message, CallbackQuery, FSInputFile
 from aiogram.fsm.context import FSMContext
-from handlers.keyboards import get_e_learning_keyboard, get_main_menu_keyboard
-from handlers.common import require_auth, require_student
+from handlers.keyboards import get_e_learning_keyboard, get_main_menu_keyboard, get_pagination_keyboard
+from handlers.common import require_auth, require_student, release_user_lock, claim_bulk_operation
+from handlers.file_delivery import send_files, send_single, format_file_size, FILE_TYPE_EMOJIS
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
-from sqlalchemy.orm import selectinload
-from database.models import User, Subject, TeacherSubject, Lecture, Assignment, AssignmentSubmission, Specialization
+from database.models import User, Subject, TeacherSubject, Lecture, Assignment, Specialization
 from repositories.subject_repository import SubjectRepository
 from repositories.teacher_repository import TeacherRepository
+from repositories.lecture_repository import LectureRepository
+from repositories.assignment_repository import AssignmentRepository
+from services.reference_cache import reference_cache
 from typing import List
 
 router = Router()
@@ -21,6 +24,9 @@ class AssignmentUploadStates(StatesGroup):
     waiting_for_assignment_file = State()
 
 
+LECTURES_PER_PAGE = 8
+
+
 @router.message(F.text == "🎓 التعلّم الإلكتروني")
 @require_auth
 @require_student
@@ -49,9 +55,7 @@ async def show_lectures_menu(message: Message, state: FSMContext, db_session: As
         return
     
     # Get student's specialization
-    from repositories.specialization_repository import SpecializationRepository
-    spec_repo = SpecializationRepository(db_session)
-    specialization = await spec_repo.get_by_id(user.specialization_id)
+    specialization = await reference_cache.get_specialization(user.specialization_id)
     
     if not specialization:
         await message.answer(
@@ -61,8 +65,7 @@ async def show_lectures_menu(message: Message, state: FSMContext, db_session: As
         return
     
     # Get all active subjects for this specialization
-    subject_repo = SubjectRepository(db_session)
-    subjects = await subject_repo.get_by_specialization(user.specialization_id, active_only=True)
+    subjects = await reference_cache.get_subjects(user.specialization_id)
     
     if not subjects:
         await message.answer(
@@ -99,45 +102,27 @@ async def show_lectures_menu(message: Message, state: FSMContext, db_session: As
     )
 
 
-@router.callback_query(F.data.startswith("student_lecture_subject:"))
-async def show_lectures_for_subject(callback: CallbackQuery, bot: Bot, db_session: AsyncSession, user: User):
-    """Show lectures for selected subject."""
-    subject_id = int(callback.data.split(":")[1])
-    
-    # Verify subject belongs to student's specialization
+async def get_student_subject(callback: CallbackQuery, db_session: AsyncSession, user: User, subject_id: int):
+    """Get a subject of the student's specialization, answering the callback if unavailable."""
     if not user.specialization_id:
         await callback.answer("❌ لم يتم تحديد التخصص الخاص بك.", show_alert=True)
-        return
+        return None
     
-    subject_repo = SubjectRepository(db_session)
-    subject = await subject_repo.get_by_id(subject_id)
+    subject = await reference_cache.get_subject(subject_id)
     
     if not subject or subject.specialization_id != user.specialization_id:
         await callback.answer("❌ هذه المادة غير متاحة لك.", show_alert=True)
-        return
+        return None
     
-    # Get all teacher_subjects for this subject
-    result = await db_session.execute(
-        select(TeacherSubject)
-        .where(TeacherSubject.subject_id == subject_id)
-        .where(TeacherSubject.is_active == True)
-        .options(selectinload(TeacherSubject.lectures))
-    )
-    teacher_subjects = result.scalars().all()
-    
-    # Collect all lectures from all teachers for this subject
-    all_lectures: List[Lecture] = []
-    for teacher_subject in teacher_subjects:
-        # Get lectures ordered by display_order
-        lectures_result = await db_session.execute(
-            select(Lecture)
-            .where(Lecture.teacher_subject_id == teacher_subject.id)
-            .order_by(Lecture.display_order.asc())
-        )
-        lectures = lectures_result.scalars().all()
-        all_lectures.extend(lectures)
+    return subject
+
+
+async def show_lecture_catalog(callback: CallbackQuery, db_session: AsyncSession, subject: Subject, page: int = 1):
+    """Show one page of a subject's lectures; files are sent only when chosen."""
+    lecture_repo = LectureRepository(db_session)
+    total_lectures = await lecture_repo.count_by_subject(subject.id)
     
-    if not all_lectures:
+    if not total_lectures:
         await callback.message.edit_text(
             f"❌ <b>لا توجد محاضرات متاحة</b>\n\n"
             f"المادة: <b>{subject.name}</b>\n\n"
@@ -147,76 +132,139 @@ async def show_lectures_for_subject(callback: CallbackQuery, bot: Bot, db_sessio
         await callback.answer()
         return
     
-    # Send subject info
+    total_pages = (total_lectures + LECTURES_PER_PAGE - 1) // LECTURES_PER_PAGE
+    page = min(max(page, 1), total_pages)
+    skip = (page - 1) * LECTURES_PER_PAGE
+    lectures = await lecture_repo.get_by_subject(subject.id, skip=skip, limit=LECTURES_PER_PAGE)
+    
     subject_info = f"📚 <b>{subject.name}</b>"
     if subject.code:
         subject_info += f" ({subject.code})"
-    subject_info += f"\n\n📁 عدد المحاضرات: <b>{len(all_lectures)}</b> ملف\n\n"
+    subject_info += f"\n\n📁 عدد المحاضرات: <b>{total_lectures}</b> ملف"
+    if total_pages > 1:
+        subject_info += f" (الصفحة {page}/{total_pages})"
+    subject_info += "\n\nاختر المحاضرة لاستلامها:"
+    
+    from aiogram.utils.keyboard import InlineKeyboardBuilder
+    from aiogram.types import InlineKeyboardButton
+    
+    builder = InlineKeyboardBuilder()
+    
+    for idx, lecture in enumerate(lectures, skip + 1):
+        emoji = FILE_TYPE_EMOJIS.get(lecture.file_type, "📁")
+        file_name = lecture.title or lecture.file_name or f"ملف {idx}"
+        if len(file_name) > 30:
+            file_name = file_name[:27] + "..."
+        button_text = f"{idx}. {emoji} {file_name}"
+        if lecture.file_size:
+            button_text += f" ({format_file_size(lecture.file_size)})"
+        
+        builder.add(InlineKeyboardButton(
+            text=button_text,
+            callback_data=f"student_lecture_file:{lecture.id}"
+        ))
+    
+    builder.adjust(1)
+    
+    if total_pages > 1:
+        pagination_kb = get_pagination_keyboard(page, total_pages, "student_lectures", str(subject.id))
+        for row in pagination_kb.inline_keyboard:
+            builder.row(*row)
+    
+    builder.row(InlineKeyboardButton(
+        text=f"📥 إرسال الكل ({total_lectures})",
+        callback_data=f"student_lecture_all:{subject.id}"
+    ))
     
     await callback.message.edit_text(
-        subject_info + "⏳ جاري إرسال المحاضرات...",
-        parse_mode="HTML"
+        subject_info,
+        parse_mode="HTML",
+        reply_markup=builder.as_markup()
     )
     await callback.answer()
+
+
+@router.callback_query(F.data.startswith("student_lecture_subject:"))
+async def show_lectures_for_subject(callback: CallbackQuery, db_session: AsyncSession, user: User):
+    """Show the lecture catalog of the selected subject."""
+    subject_id = int(callback.data.split(":")[1])
+    
+    subject = await get_student_subject(callback, db_session, user, subject_id)
+    if not subject:
+        return
     
-    # Send all lecture files
-    sent_count = 0
-    for idx, lecture in enumerate(all_lectures, 1):
-        try:
-            # Send file based on type
-            if lecture.file_type == "document":
-                await bot.send_document(
-                    chat_id=user.telegram_id,
-                    document=lecture.file_id,
-                    caption=f"📄 المحاضرة {idx}/{len(all_lectures)}" + (f" - {lecture.file_name}" if lecture.file_name else "")
-                )
-            elif lecture.file_type == "photo":
-                await bot.send_photo(
-                    chat_id=user.telegram_id,
-                    photo=lecture.file_id,
-                    caption=f"🖼️ المحاضرة {idx}/{len(all_lectures)}"
-                )
-            elif lecture.file_type == "video":
-                await bot.send_video(
-                    chat_id=user.telegram_id,
-                    video=lecture.file_id,
-                    caption=f"🎥 المحاضرة {idx}/{len(all_lectures)}"
-                )
-            elif lecture.file_type == "audio":
-                await bot.send_audio(
-                    chat_id=user.telegram_id,
-                    audio=lecture.file_id,
-                    caption=f"🎵 المحاضرة {idx}/{len(all_lectures)}"
-                )
-            elif lecture.file_type == "voice":
-                await bot.send_voice(
-                    chat_id=user.telegram_id,
-                    voice=lecture.file_id,
-                    caption=f"🎤 المحاضرة {idx}/{len(all_lectures)}"
-                )
-            elif lecture.file_type == "video_note":
-                await bot.send_video_note(
-                    chat_id=user.telegram_id,
-                    video_note=lecture.file_id
-                )
-            else:
-                # Fallback: send as document
-                await bot.send_document(
-                    chat_id=user.telegram_id,
-                    document=lecture.file_id,
-                    caption=f"📄 المحاضرة {idx}/{len(all_lectures)}"
-                )
-            
-            sent_count += 1
-            
-            # Small delay to avoid rate limiting
-            import asyncio
-            await asyncio.sleep(0.5)
-            
-        except Exception as e:
-            # Log error but continue sending other files
-            print(f"Error sending lecture {lecture.id}: {e}")
-            continue
+    await show_lecture_catalog(callback, db_session, subject)
+
+
+@router.callback_query(F.data.startswith("student_lectures:page:"))
+async def handle_lecture_catalog_page(callback: CallbackQuery, db_session: AsyncSession, user: User):
+    """Handle lecture catalog pagination."""
+    parts = callback.data.split(":")
+    page = int(parts[2])
+    subject_id = int(parts[3])
+    
+    subject = await get_student_subject(callback, db_session, user, subject_id)
+    if not subject:
+        return
+    
+    await show_lecture_catalog(callback, db_session, subject, page)
+
+
+@router.callback_query(F.data.startswith("student_lecture_file:"))
+async def send_lecture_file(callback: CallbackQuery, bot: Bot, db_session: AsyncSession, user: User):
+    """Send a single lecture chosen from the catalog."""
+    lecture_id = int(callback.data.split(":")[1])
+    
+    if not user.specialization_id:
+        await callback.answer("❌ لم يتم تحديد التخصص الخاص بك.", show_alert=True)
+        return
+    
+    lecture_repo = LectureRepository(db_session)
+    lecture = await lecture_repo.get_for_specialization(lecture_id, user.specialization_id)
+    
+    if not lecture:
+        await callback.answer("❌ هذه المحاضرة غير متاحة.", show_alert=True)
+        return
+    
+    caption = f"{FILE_TYPE_EMOJIS.get(lecture.file_type, '📄')} {lecture.title or lecture.file_name or 'المحاضرة'}"
+    
+    try:
+        await send_single(bot, user.telegram_id, lecture.file_type, lecture.file_id, caption)
+        await callback.answer()
+    except Exception as e:
+        print(f"Error sending lecture {lecture.id}: {e}")
+        await callback.answer("❌ حدث خطأ أثناء إرسال المحاضرة.", show_alert=True)
+
+
+@router.callback_query(F.data.startswith("student_lecture_all:"))
+async def send_all_lectures(callback: CallbackQuery, bot: Bot, db_session: AsyncSession, user: User):
+    """Send every lecture of a subject through the bulk delivery path."""
+    subject_id = int(callback.data.split(":")[1])
+    
+    subject = await get_student_subject(callback, db_session, user, subject_id)
+    if not subject:
+        return
+    
+    # Get lectures from all teachers of this subject in one query
+    lecture_repo = LectureRepository(db_session)
+    all_lectures: List[Lecture] = await lecture_repo.get_by_subject(subject_id)
+    
+    if not all_lectures:
+        await callback.answer("❌ لا توجد محاضرات متاحة.", show_alert=True)
+        return
+    
+    # A repeated tap must not start a second delivery while this one runs
+    if not claim_bulk_operation("student_lectures"):
+        await callback.answer("⏳ إرسال المحاضرات جارٍ بالفعل، يرجى الانتظار حتى ينتهي.", show_alert=True)
+        return
+    
+    await callback.answer(f"⏳ جاري إرسال {len(all_lectures)} محاضرة...")
+    
+    # The delivery can take a while; the user's other taps need not wait for it
+    release_user_lock()
+    
+    # Send all lecture files (compatible files are batched into media groups)
+    sent_count = await send_files(bot, user.telegram_id, all_lectures, "المحاضرة")
     
     # Send completion message
     if sent_count > 0:
@@ -258,60 +306,29 @@ async def show_assignments_menu(message: Message, db_session: AsyncSession, user
     )
 
 
-@router.callback_query(F.data == "assignment_download")
-async def show_assignments_subjects(callback: CallbackQuery, db_session: AsyncSession, user: User):
-    """Show subjects that have assignments for download."""
+async def show_subjects_with_assignments(
+    callback: CallbackQuery,
+    db_session: AsyncSession,
+    user: User,
+    callback_prefix: str,
+    prompt: str
+):
+    """Show the student's subjects that have assignments."""
     # Check if student has specialization
     if not user.specialization_id:
         await callback.answer("❌ لم يتم تحديد التخصص الخاص بك.", show_alert=True)
         return
     
     # Get student's specialization
-    from repositories.specialization_repository import SpecializationRepository
-    spec_repo = SpecializationRepository(db_session)
-    specialization = await spec_repo.get_by_id(user.specialization_id)
+    specialization = await reference_cache.get_specialization(user.specialization_id)
     
     if not specialization:
         await callback.answer("❌ التخصص الخاص بك غير موجود في النظام.", show_alert=True)
         return
     
-    # Get all active subjects for this specialization
+    # Subjects with at least one assignment from an active teacher, in one query
     subject_repo = SubjectRepository(db_session)
-    subjects = await subject_repo.get_by_specialization(user.specialization_id, active_only=True)
-    
-    if not subjects:
-        await callback.message.edit_text(
-            f"❌ لا توجد مواد دراسية متاحة لتخصص <b>{specialization.name}</b>.",
-            parse_mode="HTML"
-        )
-        await callback.answer()
-        return
-    
-    # Get all teacher_subjects for these subjects and check which ones have assignments
-    subjects_with_assignments = []
-    for subject in subjects:
-        # Get all teacher_subjects for this subject
-        result = await db_session.execute(
-            select(TeacherSubject)
-            .where(TeacherSubject.subject_id == subject.id)
-            .where(TeacherSubject.is_active == True)
-        )
-        teacher_subjects = result.scalars().all()
-        
-        # Check if any teacher_subject has assignments
-        has_assignments = False
-        for teacher_subject in teacher_subjects:
-            assignments_result = await db_session.execute(
-                select(Assignment)
-                .where(Assignment.teacher_subject_id == teacher_subject.id)
-                .limit(1)
-            )
-            if assignments_result.scalar_one_or_none():
-                has_assignments = True
-                break
-        
-        if has_assignments:
-            subjects_with_assignments.append(subject)
+    subjects_with_assignments = await subject_repo.get_with_assignment_counts(user.specialization_id)
     
     if not subjects_with_assignments:
         await callback.message.edit_text(
@@ -329,14 +346,14 @@ async def show_assignments_subjects(callback: CallbackQuery, db_session: AsyncSe
     
     builder = InlineKeyboardBuilder()
     
-    for subject in subjects_with_assignments:
+    for subject, assignments_count in subjects_with_assignments:
         subject_name = subject.name
         if subject.code:
             subject_name = f"{subject_name} ({subject.code})"
         
         builder.add(InlineKeyboardButton(
-            text=subject_name,
-            callback_data=f"student_assignment_subject:{subject.id}"
+            text=f"{subject_name} - {assignments_count} 📝",
+            callback_data=f"{callback_prefix}:{subject.id}"
         ))
     
     builder.adjust(1)
@@ -344,13 +361,25 @@ async def show_assignments_subjects(callback: CallbackQuery, db_session: AsyncSe
     await callback.message.edit_text(
         f"📚 <b>اختر المادة الدراسية:</b>\n\n"
         f"التخصص: <b>{specialization.name}</b>\n\n"
-        "اختر المادة التي تريد تحميل وظائفها:",
+        f"{prompt}",
         parse_mode="HTML",
         reply_markup=builder.as_markup()
     )
     await callback.answer()
 
 
+@router.callback_query(F.data == "assignment_download")
+async def show_assignments_subjects(callback: CallbackQuery, db_session: AsyncSession, user: User):
+    """Show subjects that have assignments for download."""
+    await show_subjects_with_assignments(
+        callback,
+        db_session,
+        user,
+        "student_assignment_subject",
+        "اختر المادة التي تريد تحميل وظائفها:"
+    )
+
+
 @router.callback_query(F.data.startswith("student_assignment_subject:"))
 async def show_assignments_for_subject(callback: CallbackQuery, bot: Bot, db_session: AsyncSession, user: User):
     """Show assignments for selected subject and send them to student."""
@@ -361,32 +390,15 @@ async def show_assignments_for_subject(callback: CallbackQuery, bot: Bot, db_ses
         await callback.answer("❌ لم يتم تحديد التخصص الخاص بك.", show_alert=True)
         return
     
-    subject_repo = SubjectRepository(db_session)
-    subject = await subject_repo.get_by_id(subject_id)
+    subject = await reference_cache.get_subject(subject_id)
     
     if not subject or subject.specialization_id != user.specialization_id:
         await callback.answer("❌ هذه المادة غير متاحة لك.", show_alert=True)
         return
     
-    # Get all teacher_subjects for this subject
-    result = await db_session.execute(
-        select(TeacherSubject)
-        .where(TeacherSubject.subject_id == subject_id)
-        .where(TeacherSubject.is_active == True)
-    )
-    teacher_subjects = result.scalars().all()
-    
-    # Collect all assignments from all teachers for this subject
-    all_assignments: List[Assignment] = []
-    for teacher_subject in teacher_subjects:
-        # Get assignments ordered by display_order
-        assignments_result = await db_session.execute(
-            select(Assignment)
-            .where(Assignment.teacher_subject_id == teacher_subject.id)
-            .order_by(Assignment.display_order.asc())
-        )
-        assignments = assignments_result.scalars().all()
-        all_assignments.extend(assignments)
+    # Get assignments from all teachers of this subject in one query
+    assignment_repo = AssignmentRepository(db_session)
+    all_assignments: List[Assignment] = await assignment_repo.get_by_subject(subject_id)
     
     if not all_assignments:
         await callback.message.edit_text(
@@ -398,6 +410,11 @@ async def show_assignments_for_subject(callback: CallbackQuery, bot: Bot, db_ses
         await callback.answer()
         return
     
+    # A repeated tap must not start a second delivery while this one runs
+    if not claim_bulk_operation("student_assignments"):
+        await callback.answer("⏳ إرسال الوظائف جارٍ بالفعل، يرجى الانتظار حتى ينتهي.", show_alert=True)
+        return
+    
     # Send subject info
     subject_info = f"📝 <b>{subject.name}</b>"
     if subject.code:
@@ -410,64 +427,11 @@ async def show_assignments_for_subject(callback: CallbackQuery, bot: Bot, db_ses
     )
     await callback.answer()
     
-    # Send all assignment files
-    sent_count = 0
-    for idx, assignment in enumerate(all_assignments, 1):
-        try:
-            # Send file based on type
-            if assignment.file_type == "document":
-                await bot.send_document(
-                    chat_id=user.telegram_id,
-                    document=assignment.file_id,
-                    caption=f"📄 الوظيفة {idx}/{len(all_assignments)}" + (f" - {assignment.file_name}" if assignment.file_name else "")
-                )
-            elif assignment.file_type == "photo":
-                await bot.send_photo(
-                    chat_id=user.telegram_id,
-                    photo=assignment.file_id,
-                    caption=f"🖼️ الوظيفة {idx}/{len(all_assignments)}"
-                )
-            elif assignment.file_type == "video":
-                await bot.send_video(
-                    chat_id=user.telegram_id,
-                    video=assignment.file_id,
-                    caption=f"🎥 الوظيفة {idx}/{len(all_assignments)}"
-                )
-            elif assignment.file_type == "audio":
-                await bot.send_audio(
-                    chat_id=user.telegram_id,
-                    audio=assignment.file_id,
-                    caption=f"🎵 الوظيفة {idx}/{len(all_assignments)}"
-                )
-            elif assignment.file_type == "voice":
-                await bot.send_voice(
-                    chat_id=user.telegram_id,
-                    voice=assignment.file_id,
-                    caption=f"🎤 الوظيفة {idx}/{len(all_assignments)}"
-                )
-            elif assignment.file_type == "video_note":
-                await bot.send_video_note(
-                    chat_id=user.telegram_id,
-                    video_note=assignment.file_id
-                )
-            else:
-                # Fallback: send as document
-                await bot.send_document(
-                    chat_id=user.telegram_id,
-                    document=assignment.file_id,
-                    caption=f"📄 الوظيفة {idx}/{len(all_assignments)}"
-                )
-            
-            sent_count += 1
-            
-            # Small delay to avoid rate limiting
-            import asyncio
-            await asyncio.sleep(0.5)
-            
-        except Exception as e:
-            # Log error but continue sending other files
-            print(f"Error sending assignment {assignment.id}: {e}")
-            continue
+    # The delivery can take a while; the user's other taps need not wait for it
+    release_user_lock()
+    
+    # Send all assignment files (compatible files are batched into media groups)
+    sent_count = await send_files(bot, user.telegram_id, all_assignments, "الوظيفة")
     
     # Send completion message
     if sent_count > 0:
@@ -490,94 +454,13 @@ async def show_assignments_for_subject(callback: CallbackQuery, bot: Bot, db_ses
 @router.callback_query(F.data == "assignment_upload_student")
 async def show_upload_assignment_subjects(callback: CallbackQuery, db_session: AsyncSession, user: User):
     """Show subjects that have assignments for student to upload solution."""
-    # Check if student has specialization
-    if not user.specialization_id:
-        await callback.answer("❌ لم يتم تحديد التخصص الخاص بك.", show_alert=True)
-        return
-    
-    # Get student's specialization
-    from repositories.specialization_repository import SpecializationRepository
-    spec_repo = SpecializationRepository(db_session)
-    specialization = await spec_repo.get_by_id(user.specialization_id)
-    
-    if not specialization:
-        await callback.answer("❌ التخصص الخاص بك غير موجود في النظام.", show_alert=True)
-        return
-    
-    # Get all active subjects for this specialization
-    subject_repo = SubjectRepository(db_session)
-    subjects = await subject_repo.get_by_specialization(user.specialization_id, active_only=True)
-    
-    if not subjects:
-        await callback.message.edit_text(
-            f"❌ لا توجد مواد دراسية متاحة لتخصص <b>{specialization.name}</b>.",
-            parse_mode="HTML"
-        )
-        await callback.answer()
-        return
-    
-    # Get all teacher_subjects for these subjects and check which ones have assignments
-    subjects_with_assignments = []
-    for subject in subjects:
-        # Get all teacher_subjects for this subject
-        result = await db_session.execute(
-            select(TeacherSubject)
-            .where(TeacherSubject.subject_id == subject.id)
-            .where(TeacherSubject.is_active == True)
-        )
-        teacher_subjects = result.scalars().all()
-        
-        # Check if any teacher_subject has assignments
-        has_assignments = False
-        for teacher_subject in teacher_subjects:
-            assignments_result = await db_session.execute(
-                select(Assignment)
-                .where(Assignment.teacher_subject_id == teacher_subject.id)
-                .limit(1)
-            )
-            if assignments_result.scalar_one_or_none():
-                has_assignments = True
-                break
-        
-        if has_assignments:
-            subjects_with_assignments.append(subject)
-    
-    if not subjects_with_assignments:
-        await callback.message.edit_text(
-            f"❌ <b>لا توجد وظائف متاحة</b>\n\n"
-            f"التخصص: <b>{specialization.name}</b>\n\n"
-            "لم يتم رفع أي وظائف للمواد الدراسية الخاصة بتخصصك بعد.",
-            parse_mode="HTML"
-        )
-        await callback.answer()
-        return
-    
-    # Build inline keyboard with subjects that have assignments
-    from aiogram.utils.keyboard import InlineKeyboardBuilder
-    from aiogram.types import InlineKeyboardButton
-    
-    builder = InlineKeyboardBuilder()
-    
-    for subject in subjects_with_assignments:
-        subject_name = subject.name
-        if subject.code:
-            subject_name = f"{subject_name} ({subject.code})"
-        
-        builder.add(InlineKeyboardButton(
-            text=subject_name,
-            callback_data=f"student_upload_assignment_subject:{subject.id}"
-        ))
-    
-    builder.adjust(1)
-    
-    await callback.message.edit_text(
-        f"📚 <b>اختر المادة الدراسية:</b>\n\n"
-        f"التخصص: <b>{specialization.name}</b>\n\n"
-        "اختر المادة التي تريد رفع حل وظيفتها:",
-        parse_mode="HTML",
-        reply_markup=builder.as_markup()
+    await show_subjects_with_assignments(
+        callback,
+        db_session,
+        user,
+        "student_upload_assignment_subject",
+        "اختر المادة التي تريد رفع حل وظيفتها:"
     )
-    await callback.answer()
 
 
 @router.callback_query(F.data.startswith("student_upload_assignment_subject:"))
@@ -590,8 +473,7 @@ async def process_upload_assignment_subject(callback: CallbackQuery, state: FSMC
         await callback.answer("❌ لم يتم تحديد التخصص الخاص بك.", show_alert=True)
         return
     
-    subject_repo = SubjectRepository(db_session)
-    subject = await subject_repo.get_by_id(subject_id)
+    subject = await reference_cache.get_subject(subject_id)
     
     if not subject or subject.specialization_id != user.specialization_id:
         await callback.answer("❌ هذه المادة غير متاحة لك.", show_alert=True)
@@ -610,6 +492,7 @@ async def process_upload_assignment_subject(callback: CallbackQuery, state: FSMC
         assignments_result = await db_session.execute(
             select(Assignment)
             .where(Assignment.teacher_subject_id == teacher_subject.id)
+            .where(Assignment.is_draft == False)
             .limit(1)
         )
         if assignments_result.scalar_one_or_none():
@@ -688,6 +571,7 @@ async def process_assignment_solution_file(message: Message, state: FSMContext,
     assignment_result = await db_session.execute(
         select(Assignment)
         .where(Assignment.teacher_subject_id == teacher_subject.id)
+        .where(Assignment.is_draft == False)
         .order_by(Assignment.display_order.asc())
         .limit(1)
     )
@@ -703,52 +587,27 @@ async def process_assignment_solution_file(message: Message, state: FSMContext,
     file_name = getattr(file_info, "file_name", None) or getattr(file_info, "file_unique_id", None)
     file_size = getattr(file_info, "file_size", None)
     
-    # Check if student already submitted for this assignment
-    existing_submission = await db_session.execute(
-        select(AssignmentSubmission)
-        .where(AssignmentSubmission.student_id == user.id)
-        .where(AssignmentSubmission.assignment_id == assignment.id)
+    # Create or replace the submission atomically
+    assignment_repo = AssignmentRepository(db_session)
+    _, created = await assignment_repo.upsert_submission(
+        student_id=user.id,
+        assignment_id=assignment.id,
+        subject_id=subject_id,
+        file_id=file_id,
+        file_type=file_type,
+        file_name=file_name,
+        file_size=file_size
+    )
+    
+    title = "تم رفع حل الوظيفة بنجاح!" if created else "تم تحديث حل الوظيفة بنجاح!"
+    await message.answer(
+        f"✅ <b>{title}</b>\n\n"
+        f"📚 المادة: <b>{subject_name}</b>\n"
+        f"📁 الملف: <b>{file_name or 'ملف'}</b>\n\n"
+        "سيتم مراجعة الحل من قبل الأستاذ.",
+        parse_mode="HTML",
+        reply_markup=get_e_learning_keyboard()
     )
-    existing = existing_submission.scalar_one_or_none()
-    
-    if existing:
-        # Update existing submission
-        existing.file_id = file_id
-        existing.file_type = file_type
-        existing.file_name = file_name
-        existing.file_size = file_size
-        await db_session.commit()
-        
-        await message.answer(
-            f"✅ <b>تم تحديث حل الوظيفة بنجاح!</b>\n\n"
-            f"📚 المادة: <b>{subject_name}</b>\n"
-            f"📁 الملف: <b>{file_name or 'ملف'}</b>\n\n"
-            "سيتم مراجعة الحل من قبل الأستاذ.",
-            parse_mode="HTML",
-            reply_markup=get_e_learning_keyboard()
-        )
-    else:
-        # Create new submission
-        submission = AssignmentSubmission(
-            student_id=user.id,
-            assignment_id=assignment.id,
-            subject_id=subject_id,
-            file_id=file_id,
-            file_type=file_type,
-            file_name=file_name,
-            file_size=file_size
-        )
-        db_session.add(submission)
-        await db_session.commit()
-        
-        await message.answer(
-            f"✅ <b>تم رفع حل الوظيفة بنجاح!</b>\n\n"
-            f"📚 المادة: <b>{subject_name}</b>\n"
-            f"📁 الملف: <b>{file_name or 'ملف'}</b>\n\n"
-            "سيتم مراجعة الحل من قبل الأستاذ.",
-            parse_mode="HTML",
-            reply_markup=get_e_learning_keyboard()
-        )
     
     await state.clear()
 
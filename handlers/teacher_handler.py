@@ -4,14 +4,23 @@ from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from handlers.keyboards import get_teacher_panel_keyboard
-from handlers.common import require_auth, require_teacher
+from handlers.common import require_auth, require_teacher, release_user_lock, claim_bulk_operation
+from services.submission_export import SubmissionExporter
+from services.ownership_cache import ownership_cache
 from sqlalchemy.ext.asyncio import AsyncSession
-from database.models import User, Lecture, Assignment, AssignmentSubmission, TeacherSubject, Subject
+from database.models import User, Lecture, Assignment, TeacherSubject, Subject
 from repositories.teacher_repository import TeacherRepository
-from typing import List
+from repositories.assignment_repository import AssignmentRepository
+from repositories.lecture_repository import LectureRepository
+from typing import Optional
 
 router = Router()
 
+# Positions per page of the move picker; Telegram rejects keyboards over 100 buttons
+POSITION_PAGE_SIZE = 50
+# Files per page of the management lists (4 buttons each)
+MANAGEMENT_PAGE_SIZE = 20
+
 
 class LectureUploadStates(StatesGroup):
     """States for lecture upload flow."""
@@ -159,54 +168,70 @@ async def manage_lectures(callback: CallbackQuery, db_session: AsyncSession, use
 @router.callback_query(F.data.startswith("lecture_manage_subject:"))
 async def show_lectures_for_management(callback: CallbackQuery, db_session: AsyncSession, user: User):
     """Show lectures for a subject with management options."""
-    teacher_subject_id = int(callback.data.split(":")[1])
-    
+    parts = callback.data.split(":")
+    teacher_subject_id = int(parts[1])
+    page = int(parts[2]) if len(parts) > 2 else 1
+    await render_lectures_management(callback, db_session, user, teacher_subject_id, page=page)
+
+
+async def render_lectures_management(
+    callback: CallbackQuery,
+    db_session: AsyncSession,
+    user: User,
+    teacher_subject_id: int,
+    notice: Optional[str] = None,
+    page: int = 1
+):
+    """Render one page of a subject's lectures with management options, answering the callback with `notice`."""
     # Verify that this teacher_subject belongs to the teacher
-    teacher_repo = TeacherRepository(db_session)
-    teacher_subjects = await teacher_repo.get_teacher_subjects(user.id, active_only=True)
-    teacher_subject_ids = [ts.id for ts in teacher_subjects]
-    
-    if teacher_subject_id not in teacher_subject_ids:
+    if not await ownership_cache.owns(db_session, user.id, teacher_subject_id):
         await callback.answer("❌ هذه المادة غير متاحة لك.", show_alert=True)
         return
     
-    # Get teacher_subject and subject info
-    teacher_subject = None
-    for ts in teacher_subjects:
-        if ts.id == teacher_subject_id:
-            teacher_subject = ts
-            break
+    # Get subject info
+    subject = await TeacherRepository(db_session).get_subject_by_teacher_subject(teacher_subject_id)
     
-    if not teacher_subject:
+    if not subject:
         await callback.answer("❌ حدث خطأ في اختيار المادة.", show_alert=True)
         return
     
-    # Get all lectures for this teacher_subject
+    # Get one page of the lectures of this teacher_subject
+    total = await LectureRepository(db_session).count_published(teacher_subject_id)
+    total_pages = max(1, (total + MANAGEMENT_PAGE_SIZE - 1) // MANAGEMENT_PAGE_SIZE)
+    page = min(max(page, 1), total_pages)
+    offset = (page - 1) * MANAGEMENT_PAGE_SIZE
+    
     from sqlalchemy import select
     result = await db_session.execute(
         select(Lecture)
         .where(Lecture.teacher_subject_id == teacher_subject_id)
+        .where(Lecture.is_draft == False)
         .order_by(Lecture.display_order.asc())
+        .offset(offset)
+        .limit(MANAGEMENT_PAGE_SIZE)
     )
     lectures = result.scalars().all()
     
     if not lectures:
         await callback.message.edit_text(
             f"❌ <b>لا توجد محاضرات</b>\n\n"
-            f"المادة: <b>{teacher_subject.subject.name}</b>\n\n"
+            f"المادة: <b>{subject.name}</b>\n\n"
             "لم يتم رفع أي محاضرات لهذه المادة بعد.",
             parse_mode="HTML"
         )
-        await callback.answer()
+        await callback.answer(notice)
         return
     
     # Build message with lectures list
-    subject_name = teacher_subject.subject.name
-    if teacher_subject.subject.code:
-        subject_name += f" ({teacher_subject.subject.code})"
+    subject_name = subject.name
+    if subject.code:
+        subject_name += f" ({subject.code})"
     
     lectures_text = f"📋 <b>محاضرات المادة: {subject_name}</b>\n\n"
-    lectures_text += f"📁 عدد المحاضرات: <b>{len(lectures)}</b>\n\n"
+    lectures_text += f"📁 عدد المحاضرات: <b>{total}</b>\n"
+    if total_pages > 1:
+        lectures_text += f"📄 الصفحة {page} من {total_pages}\n"
+    lectures_text += "\n"
     lectures_text += "<b>قائمة المحاضرات:</b>\n"
     
     # Build inline keyboard with lecture management options
@@ -215,7 +240,7 @@ async def show_lectures_for_management(callback: CallbackQuery, db_session: Asyn
     
     builder = InlineKeyboardBuilder()
     
-    for idx, lecture in enumerate(lectures, 1):
+    for idx, lecture in enumerate(lectures, offset + 1):
         file_type_emoji = {
             "document": "📄",
             "photo": "🖼️",
@@ -240,12 +265,30 @@ async def show_lectures_for_management(callback: CallbackQuery, db_session: Asyn
             text=f"{idx} ⬇️",
             callback_data=f"lecture_move_down:{lecture.id}"
         ))
+        builder.add(InlineKeyboardButton(
+            text=f"{idx} ↕️",
+            callback_data=f"lecture_move_to:{lecture.id}"
+        ))
         builder.add(InlineKeyboardButton(
             text=f"{idx} 🗑️",
-            callback_data=f"lecture_delete:{lecture.id}"
+            callback_data=f"lecture_delete:{lecture.id}:{page}"
         ))
     
-    builder.adjust(3)  # 3 buttons per row
+    builder.adjust(4)  # 4 buttons per row
+    
+    navigation = []
+    if page > 1:
+        navigation.append(InlineKeyboardButton(
+            text="◀ السابق",
+            callback_data=f"lecture_manage_subject:{teacher_subject_id}:{page - 1}"
+        ))
+    if page < total_pages:
+        navigation.append(InlineKeyboardButton(
+            text="التالي ▶",
+            callback_data=f"lecture_manage_subject:{teacher_subject_id}:{page + 1}"
+        ))
+    if navigation:
+        builder.row(*navigation)
     
     # Add back button
     builder.row(InlineKeyboardButton(
@@ -258,115 +301,141 @@ async def show_lectures_for_management(callback: CallbackQuery, db_session: Asyn
         parse_mode="HTML",
         reply_markup=builder.as_markup()
     )
-    await callback.answer()
+    await callback.answer(notice)
 
 
-@router.callback_query(F.data.startswith("lecture_move_up:"))
-async def move_lecture_up(callback: CallbackQuery, db_session: AsyncSession, user: User):
-    """Move lecture up in order."""
-    lecture_id = int(callback.data.split(":")[1])
-    
-    # Get lecture
-    from sqlalchemy import select
-    result = await db_session.execute(
-        select(Lecture).where(Lecture.id == lecture_id)
-    )
-    lecture = result.scalar_one_or_none()
-    
-    if not lecture:
-        await callback.answer("❌ المحاضرة غير موجودة.", show_alert=True)
-        return
-    
-    # Verify ownership
-    teacher_repo = TeacherRepository(db_session)
-    teacher_subjects = await teacher_repo.get_teacher_subjects(user.id, active_only=True)
-    teacher_subject_ids = [ts.id for ts in teacher_subjects]
-    
-    if lecture.teacher_subject_id not in teacher_subject_ids:
+async def move_lecture(
+    callback: CallbackQuery,
+    db_session: AsyncSession,
+    user: User,
+    lecture_id: int,
+    position: Optional[int] = None,
+    offset: Optional[int] = None,
+    unchanged_text: str = "⚠️ المحاضرة في هذا الموضع بالفعل."
+):
+    """Move a lecture with one statement and refresh the management list."""
+    lecture_repo = LectureRepository(db_session)
+    moved = await lecture_repo.move(lecture_id, user.id, position=position, offset=offset)
+    
+    if not moved:
         await callback.answer("❌ هذه المحاضرة غير متاحة لك.", show_alert=True)
         return
     
-    # Get previous lecture (with lower display_order)
-    result = await db_session.execute(
-        select(Lecture)
-        .where(Lecture.teacher_subject_id == lecture.teacher_subject_id)
-        .where(Lecture.display_order < lecture.display_order)
-        .order_by(Lecture.display_order.desc())
-        .limit(1)
-    )
-    prev_lecture = result.scalar_one_or_none()
-    
-    if not prev_lecture:
-        await callback.answer("⚠️ هذه المحاضرة في المقدمة بالفعل.", show_alert=True)
+    teacher_subject_id, old_position, new_position = moved
+    if old_position == new_position:
+        await callback.answer(unchanged_text, show_alert=True)
         return
     
-    # Swap display_order
-    temp_order = lecture.display_order
-    lecture.display_order = prev_lecture.display_order
-    prev_lecture.display_order = temp_order
-    
-    await db_session.commit()
-    await callback.answer("✅ تم نقل المحاضرة للأعلى")
-    
     # Refresh the list
-    await show_lectures_for_management(callback, db_session, user)
+    await render_lectures_management(
+        callback,
+        db_session,
+        user,
+        teacher_subject_id,
+        notice=f"✅ تم نقل المحاضرة إلى الموضع {new_position}",
+        page=(new_position - 1) // MANAGEMENT_PAGE_SIZE + 1
+    )
+
+
+@router.callback_query(F.data.startswith("lecture_move_up:"))
+async def move_lecture_up(callback: CallbackQuery, db_session: AsyncSession, user: User):
+    """Move lecture up in order."""
+    lecture_id = int(callback.data.split(":")[1])
+    await move_lecture(
+        callback, db_session, user, lecture_id,
+        offset=-1,
+        unchanged_text="⚠️ هذه المحاضرة في المقدمة بالفعل."
+    )
 
 
 @router.callback_query(F.data.startswith("lecture_move_down:"))
 async def move_lecture_down(callback: CallbackQuery, db_session: AsyncSession, user: User):
     """Move lecture down in order."""
     lecture_id = int(callback.data.split(":")[1])
-    
-    # Get lecture
-    from sqlalchemy import select
-    result = await db_session.execute(
-        select(Lecture).where(Lecture.id == lecture_id)
+    await move_lecture(
+        callback, db_session, user, lecture_id,
+        offset=1,
+        unchanged_text="⚠️ هذه المحاضرة في النهاية بالفعل."
     )
-    lecture = result.scalar_one_or_none()
-    
-    if not lecture:
-        await callback.answer("❌ المحاضرة غير موجودة.", show_alert=True)
-        return
+
+
+def build_position_keyboard(kind: str, item_id: int, total: int, page: int, back_data: str):
+    """Build one page of the position picker for a lecture or assignment."""
+    from aiogram.utils.keyboard import InlineKeyboardBuilder
+    from aiogram.types import InlineKeyboardButton
     
-    # Verify ownership
-    teacher_repo = TeacherRepository(db_session)
-    teacher_subjects = await teacher_repo.get_teacher_subjects(user.id, active_only=True)
-    teacher_subject_ids = [ts.id for ts in teacher_subjects]
+    total_pages = max(1, (total + POSITION_PAGE_SIZE - 1) // POSITION_PAGE_SIZE)
+    page = min(max(page, 1), total_pages)
+    first = (page - 1) * POSITION_PAGE_SIZE + 1
+    last = min(total, page * POSITION_PAGE_SIZE)
     
-    if lecture.teacher_subject_id not in teacher_subject_ids:
-        await callback.answer("❌ هذه المحاضرة غير متاحة لك.", show_alert=True)
-        return
+    builder = InlineKeyboardBuilder()
+    for position in range(first, last + 1):
+        builder.add(InlineKeyboardButton(
+            text=str(position),
+            callback_data=f"{kind}_move_pos:{item_id}:{position}"
+        ))
+    builder.adjust(5)
+    
+    navigation = []
+    if page > 1:
+        navigation.append(InlineKeyboardButton(text="◀ السابق", callback_data=f"{kind}_move_to:{item_id}:{page - 1}"))
+    if page < total_pages:
+        navigation.append(InlineKeyboardButton(text="التالي ▶", callback_data=f"{kind}_move_to:{item_id}:{page + 1}"))
+    if navigation:
+        builder.row(*navigation)
+    
+    builder.row(InlineKeyboardButton(text="🔙 العودة", callback_data=back_data))
+    return builder.as_markup()
+
+
+@router.callback_query(F.data.startswith("lecture_move_to:"))
+async def choose_lecture_position(callback: CallbackQuery, db_session: AsyncSession, user: User):
+    """Ask for the new position of a lecture, one page of positions at a time."""
+    parts = callback.data.split(":")
+    lecture_id = int(parts[1])
+    page = int(parts[2]) if len(parts) > 2 else 1
     
-    # Get next lecture (with higher display_order)
-    result = await db_session.execute(
-        select(Lecture)
-        .where(Lecture.teacher_subject_id == lecture.teacher_subject_id)
-        .where(Lecture.display_order > lecture.display_order)
-        .order_by(Lecture.display_order.asc())
-        .limit(1)
-    )
-    next_lecture = result.scalar_one_or_none()
+    lecture_repo = LectureRepository(db_session)
+    lecture = await lecture_repo.get_owned(lecture_id, user.id)
     
-    if not next_lecture:
-        await callback.answer("⚠️ هذه المحاضرة في النهاية بالفعل.", show_alert=True)
+    if not lecture:
+        await callback.answer("❌ هذه المحاضرة غير متاحة لك.", show_alert=True)
         return
     
-    # Swap display_order
-    temp_order = lecture.display_order
-    lecture.display_order = next_lecture.display_order
-    next_lecture.display_order = temp_order
+    total = await lecture_repo.count_published(lecture.teacher_subject_id)
     
-    await db_session.commit()
-    await callback.answer("✅ تم نقل المحاضرة للأسفل")
+    keyboard = build_position_keyboard(
+        "lecture",
+        lecture.id,
+        total,
+        page,
+        back_data=f"lecture_manage_subject:{lecture.teacher_subject_id}"
+    )
     
-    # Refresh the list
-    await show_lectures_for_management(callback, db_session, user)
+    await callback.message.edit_text(
+        f"↕️ <b>نقل المحاضرة</b>\n\n"
+        f"📄 {lecture.file_name or lecture.title or 'المحاضرة'}\n\n"
+        "اختر الموضع الجديد:",
+        parse_mode="HTML",
+        reply_markup=keyboard
+    )
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith("lecture_move_pos:"))
+async def move_lecture_to_position(callback: CallbackQuery, db_session: AsyncSession, user: User):
+    """Move a lecture to the chosen position, renumbering the list in one UPDATE."""
+    _, lecture_id, position = callback.data.split(":")
+    await move_lecture(callback, db_session, user, int(lecture_id), position=int(position))
 
 
 @router.callback_query(F.data.startswith("lecture_delete:"))
 async def delete_lecture(callback: CallbackQuery, db_session: AsyncSession, user: User):
     """Delete a lecture."""
-    lecture_id = int(callback.data.split(":")[1])
+    parts = callback.data.split(":")
+    lecture_id = int(parts[1])
+    page = int(parts[2]) if len(parts) > 2 else 1
     
     # Get lecture
     from sqlalchemy import select
@@ -380,11 +449,7 @@ async def delete_lecture(callback: CallbackQuery, db_session: AsyncSession, user
         return
     
     # Verify ownership
-    teacher_repo = TeacherRepository(db_session)
-    teacher_subjects = await teacher_repo.get_teacher_subjects(user.id, active_only=True)
-    teacher_subject_ids = [ts.id for ts in teacher_subjects]
-    
-    if lecture.teacher_subject_id not in teacher_subject_ids:
+    if not await ownership_cache.owns(db_session, user.id, lecture.teacher_subject_id):
         await callback.answer("❌ هذه المحاضرة غير متاحة لك.", show_alert=True)
         return
     
@@ -395,11 +460,15 @@ async def delete_lecture(callback: CallbackQuery, db_session: AsyncSession, user
     await db_session.delete(lecture)
     await db_session.commit()
     
-    await callback.answer("✅ تم حذف المحاضرة")
-    
     # Refresh the list
-    callback.data = f"lecture_manage_subject:{teacher_subject_id}"
-    await show_lectures_for_management(callback, db_session, user)
+    await render_lectures_management(
+        callback,
+        db_session,
+        user,
+        teacher_subject_id,
+        notice="✅ تم حذف المحاضرة",
+        page=page
+    )
 
 
 @router.callback_query(F.data.startswith("lecture_subject:"), LectureUploadStates.waiting_for_subject_selection)
@@ -408,31 +477,29 @@ async def process_subject_selection(callback: CallbackQuery, state: FSMContext,
     teacher_subject_id = int(callback.data.split(":")[1])
     
     # Verify that this teacher_subject belongs to the teacher
-    teacher_repo = TeacherRepository(db_session)
-    teacher_subjects = await teacher_repo.get_teacher_subjects(user.id, active_only=True)
-    teacher_subject_ids = [ts.id for ts in teacher_subjects]
-    
-    if teacher_subject_id not in teacher_subject_ids:
+    if not await ownership_cache.owns(db_session, user.id, teacher_subject_id):
         await callback.answer("❌ هذه المادة غير متاحة لك.", show_alert=True)
         return
     
     # Get subject info
-    teacher_subject = None
-    for ts in teacher_subjects:
-        if ts.id == teacher_subject_id:
-            teacher_subject = ts
-            break
+    subject = await TeacherRepository(db_session).get_subject_by_teacher_subject(teacher_subject_id)
     
-    if not teacher_subject:
+    if not subject:
         await callback.answer("❌ حدث خطأ في اختيار المادة.", show_alert=True)
         return
     
-    subject_name = teacher_subject.subject.name
+    subject_name = subject.name
+    
+    # Files are staged in the database as drafts while they arrive;
+    # drafts left by an interrupted upload are picked up again
+    lecture_repo = LectureRepository(db_session)
+    draft_count = await lecture_repo.count_drafts(teacher_subject_id)
+    resume_note = f"\n\n♻️ تم استرجاع <b>{draft_count}</b> ملف من رفع سابق لم يكتمل." if draft_count else ""
     
     await state.update_data(
         teacher_subject_id=teacher_subject_id,
         subject_name=subject_name,
-        uploaded_files=[]  # List to store file info
+        uploaded_count=draft_count
     )
     
     await callback.message.edit_text(
@@ -440,7 +507,8 @@ async def process_subject_selection(callback: CallbackQuery, state: FSMContext,
         "📤 <b>الآن يمكنك رفع ملفات المحاضرة:</b>\n\n"
         "• يمكنك إرسال <b>أكثر من ملف</b> (مستندات، صور، فيديو، صوت)\n"
         "• الملفات سيتم حفظها بالترتيب الذي ترسله به\n"
-        "• بعد الانتهاء من إرسال جميع الملفات، اكتب <b>'تم'</b> أو اضغط على زر 'إنهاء'",
+        "• بعد الانتهاء من إرسال جميع الملفات، اكتب <b>'تم'</b> أو اضغط على زر 'إنهاء'"
+        f"{resume_note}",
         parse_mode="HTML"
     )
     
@@ -459,11 +527,35 @@ async def process_subject_selection(callback: CallbackQuery, state: FSMContext,
     await callback.answer()
 
 
+async def publish_lecture_upload(state: FSMContext, db_session: AsyncSession) -> Optional[str]:
+    """Publish the files staged during a lecture upload; returns the confirmation text, or None if there were none."""
+    data = await state.get_data()
+    teacher_subject_id = data.get("teacher_subject_id")
+    subject_name = data.get("subject_name", "المادة")
+    
+    # Publish the staged files with a single status flip
+    lecture_repo = LectureRepository(db_session)
+    published_count = await lecture_repo.publish_drafts(teacher_subject_id)
+    
+    if not published_count:
+        return None
+    
+    # Clear state FIRST before sending any messages
+    await state.clear()
+    
+    return (
+        f"✅ <b>تم رفع المحاضرة بنجاح!</b>\n\n"
+        f"📚 المادة: <b>{subject_name}</b>\n"
+        f"📁 عدد الملفات: <b>{published_count}</b> ملف\n\n"
+        "يمكنك الآن رفع محاضرة أخرى أو العودة للقائمة الرئيسية."
+    )
+
+
 @router.message(LectureUploadStates.waiting_for_lecture_files)
 async def process_lecture_file(message: Message, state: FSMContext, db_session: AsyncSession, user: User):
     """Process uploaded lecture file."""
     data = await state.get_data()
-    uploaded_files: List[dict] = data.get("uploaded_files", [])
+    uploaded_count: int = data.get("uploaded_count", 0)
     
     file_info = None
     file_type = None
@@ -490,48 +582,12 @@ async def process_lecture_file(message: Message, state: FSMContext, db_session:
         file_type = "video_note"
     elif message.text and message.text.lower() in ["تم", "finish", "done", "إنهاء"]:
         # User finished uploading files
-        if not uploaded_files:
+        finished_text = await publish_lecture_upload(state, db_session)
+        if finished_text is None:
             await message.answer("❌ لم يتم رفع أي ملفات. يرجى إرسال ملف واحد على الأقل.")
             return
         
-        # Save all files to database
-        teacher_subject_id = data.get("teacher_subject_id")
-        subject_name = data.get("subject_name", "المادة")
-        
-        # Get the maximum display_order for this teacher_subject
-        from sqlalchemy import select, func
-        result = await db_session.execute(
-            select(func.max(Lecture.display_order)).where(
-                Lecture.teacher_subject_id == teacher_subject_id
-            )
-        )
-        max_order = result.scalar() or 0
-        
-        # Save all files
-        for idx, file_data in enumerate(uploaded_files):
-            lecture = Lecture(
-                teacher_subject_id=teacher_subject_id,
-                file_id=file_data["file_id"],
-                file_type=file_data["file_type"],
-                file_name=file_data.get("file_name"),
-                file_size=file_data.get("file_size"),
-                display_order=max_order + idx + 1
-            )
-            db_session.add(lecture)
-        
-        await db_session.commit()
-        
-        # Clear state FIRST before sending any messages
-        await state.clear()
-        
-        await message.answer(
-            f"✅ <b>تم رفع المحاضرة بنجاح!</b>\n\n"
-            f"📚 المادة: <b>{subject_name}</b>\n"
-            f"📁 عدد الملفات: <b>{len(uploaded_files)}</b> ملف\n\n"
-            "يمكنك الآن رفع محاضرة أخرى أو العودة للقائمة الرئيسية.",
-            parse_mode="HTML",
-            reply_markup=get_teacher_panel_keyboard()
-        )
+        await message.answer(finished_text, parse_mode="HTML", reply_markup=get_teacher_panel_keyboard())
         return
     
     if not file_info:
@@ -542,21 +598,41 @@ async def process_lecture_file(message: Message, state: FSMContext, db_session:
     
     # Extract file information
     file_id = file_info.file_id
-    file_name = getattr(file_info, "file_name", None) or getattr(file_info, "file_unique_id", None)
+    file_unique_id = file_info.file_unique_id
+    file_name = getattr(file_info, "file_name", None) or file_unique_id
     file_size = getattr(file_info, "file_size", None)
+    teacher_subject_id = data.get("teacher_subject_id")
     
-    # Add to uploaded files list
-    uploaded_files.append({
-        "file_id": file_id,
-        "file_type": file_type,
-        "file_name": file_name,
-        "file_size": file_size
-    })
+    # Stage the file right away so it survives restarts; the FSM only keeps a counter.
+    # A file already in this subject is skipped by the (teacher_subject_id, file_unique_id) index
+    lecture_repo = LectureRepository(db_session)
+    created_ids = await lecture_repo.bulk_create(
+        teacher_subject_id,
+        [{
+            "file_id": file_id,
+            "file_unique_id": file_unique_id,
+            "file_type": file_type,
+            "file_name": file_name,
+            "file_size": file_size
+        }],
+        is_draft=True
+    )
     
-    await state.update_data(uploaded_files=uploaded_files)
+    if not created_ids:
+        duplicate = await lecture_repo.find_duplicate(teacher_subject_id, file_unique_id)
+        where = "ضمن الملفات المرسلة في هذا الرفع" if duplicate and duplicate.is_draft else "ضمن المحاضرات المنشورة لهذه المادة"
+        await message.answer(
+            f"⚠️ <b>هذا الملف مرفوع مسبقاً</b>\n\n"
+            f"الملف موجود {where}، لذلك لم تتم إضافته مرة أخرى.\n"
+            f"📊 إجمالي الملفات المرفوعة: {uploaded_count}",
+            parse_mode="HTML"
+        )
+        return
+    
+    file_count = uploaded_count + 1
+    await state.update_data(uploaded_count=file_count)
     
     # Confirm file received
-    file_count = len(uploaded_files)
     await message.answer(
         f"✅ <b>تم استلام الملف {file_count}</b>\n\n"
         f"📁 نوع الملف: {file_type}\n"
@@ -569,58 +645,27 @@ async def process_lecture_file(message: Message, state: FSMContext, db_session:
 @router.callback_query(F.data == "lecture_finish_upload", LectureUploadStates.waiting_for_lecture_files)
 async def finish_lecture_upload(callback: CallbackQuery, state: FSMContext, db_session: AsyncSession, user: User):
     """Finish lecture upload process."""
-    data = await state.get_data()
-    uploaded_files: List[dict] = data.get("uploaded_files", [])
-    
-    if not uploaded_files:
+    finished_text = await publish_lecture_upload(state, db_session)
+    if finished_text is None:
         await callback.answer("❌ لم يتم رفع أي ملفات. يرجى إرسال ملف واحد على الأقل.", show_alert=True)
         return
     
-    # Save all files to database
-    teacher_subject_id = data.get("teacher_subject_id")
-    subject_name = data.get("subject_name", "المادة")
-    
-    # Get the maximum display_order for this teacher_subject
-    from sqlalchemy import select, func
-    result = await db_session.execute(
-        select(func.max(Lecture.display_order)).where(
-            Lecture.teacher_subject_id == teacher_subject_id
-        )
-    )
-    max_order = result.scalar() or 0
-    
-    # Save all files
-    for idx, file_data in enumerate(uploaded_files):
-        lecture = Lecture(
-            teacher_subject_id=teacher_subject_id,
-            file_id=file_data["file_id"],
-            file_type=file_data["file_type"],
-            file_name=file_data.get("file_name"),
-            file_size=file_data.get("file_size"),
-            display_order=max_order + idx + 1
-        )
-        db_session.add(lecture)
-    
-    await db_session.commit()
-    
-    # Clear state FIRST before sending any messages
-    await state.clear()
-    
-    await callback.message.edit_text(
-        f"✅ <b>تم رفع المحاضرة بنجاح!</b>\n\n"
-        f"📚 المادة: <b>{subject_name}</b>\n"
-        f"📁 عدد الملفات: <b>{len(uploaded_files)}</b> ملف\n\n"
-        "يمكنك الآن رفع محاضرة أخرى أو العودة للقائمة الرئيسية.",
-        parse_mode="HTML"
-    )
+    await callback.message.edit_text(finished_text, parse_mode="HTML")
     
     await callback.message.edit_reply_markup(reply_markup=None)
     await callback.answer("✅ تم حفظ المحاضرة بنجاح!")
 
 
 @router.callback_query(F.data == "lecture_cancel")
-async def cancel_lecture_upload(callback: CallbackQuery, state: FSMContext):
+async def cancel_lecture_upload(callback: CallbackQuery, state: FSMContext, db_session: AsyncSession):
     """Cancel lecture upload process."""
+    data = await state.get_data()
+    teacher_subject_id = data.get("teacher_subject_id")
+    if teacher_subject_id:
+        # Drop the files staged during this upload
+        lecture_repo = LectureRepository(db_session)
+        await lecture_repo.discard_drafts(teacher_subject_id)
+    
     await state.clear()
     await callback.message.edit_text("❌ تم إلغاء رفع المحاضرة.")
     await callback.message.edit_reply_markup(reply_markup=None)
@@ -761,54 +806,70 @@ async def manage_assignments(callback: CallbackQuery, db_session: AsyncSession,
 @router.callback_query(F.data.startswith("assignment_manage_subject:"))
 async def show_assignments_for_management(callback: CallbackQuery, db_session: AsyncSession, user: User):
     """Show assignments for a subject with management options."""
-    teacher_subject_id = int(callback.data.split(":")[1])
-    
+    parts = callback.data.split(":")
+    teacher_subject_id = int(parts[1])
+    page = int(parts[2]) if len(parts) > 2 else 1
+    await render_assignments_management(callback, db_session, user, teacher_subject_id, page=page)
+
+
+async def render_assignments_management(
+    callback: CallbackQuery,
+    db_session: AsyncSession,
+    user: User,
+    teacher_subject_id: int,
+    notice: Optional[str] = None,
+    page: int = 1
+):
+    """Render one page of a subject's assignments with management options, answering the callback with `notice`."""
     # Verify that this teacher_subject belongs to the teacher
-    teacher_repo = TeacherRepository(db_session)
-    teacher_subjects = await teacher_repo.get_teacher_subjects(user.id, active_only=True)
-    teacher_subject_ids = [ts.id for ts in teacher_subjects]
-    
-    if teacher_subject_id not in teacher_subject_ids:
+    if not await ownership_cache.owns(db_session, user.id, teacher_subject_id):
         await callback.answer("❌ هذه المادة غير متاحة لك.", show_alert=True)
         return
     
-    # Get teacher_subject and subject info
-    teacher_subject = None
-    for ts in teacher_subjects:
-        if ts.id == teacher_subject_id:
-            teacher_subject = ts
-            break
+    # Get subject info
+    subject = await TeacherRepository(db_session).get_subject_by_teacher_subject(teacher_subject_id)
     
-    if not teacher_subject:
+    if not subject:
         await callback.answer("❌ حدث خطأ في اختيار المادة.", show_alert=True)
         return
     
-    # Get all assignments for this teacher_subject
+    # Get one page of the assignments of this teacher_subject
+    total = await AssignmentRepository(db_session).count_published(teacher_subject_id)
+    total_pages = max(1, (total + MANAGEMENT_PAGE_SIZE - 1) // MANAGEMENT_PAGE_SIZE)
+    page = min(max(page, 1), total_pages)
+    offset = (page - 1) * MANAGEMENT_PAGE_SIZE
+    
     from sqlalchemy import select
     result = await db_session.execute(
         select(Assignment)
         .where(Assignment.teacher_subject_id == teacher_subject_id)
+        .where(Assignment.is_draft == False)
         .order_by(Assignment.display_order.asc())
+        .offset(offset)
+        .limit(MANAGEMENT_PAGE_SIZE)
     )
     assignments = result.scalars().all()
     
     if not assignments:
         await callback.message.edit_text(
             f"❌ <b>لا توجد وظائف</b>\n\n"
-            f"المادة: <b>{teacher_subject.subject.name}</b>\n\n"
+            f"المادة: <b>{subject.name}</b>\n\n"
             "لم يتم رفع أي وظائف لهذه المادة بعد.",
             parse_mode="HTML"
         )
-        await callback.answer()
+        await callback.answer(notice)
         return
     
     # Build message with assignments list
-    subject_name = teacher_subject.subject.name
-    if teacher_subject.subject.code:
-        subject_name += f" ({teacher_subject.subject.code})"
+    subject_name = subject.name
+    if subject.code:
+        subject_name += f" ({subject.code})"
     
     assignments_text = f"📋 <b>وظائف المادة: {subject_name}</b>\n\n"
-    assignments_text += f"📁 عدد الوظائف: <b>{len(assignments)}</b>\n\n"
+    assignments_text += f"📁 عدد الوظائف: <b>{total}</b>\n"
+    if total_pages > 1:
+        assignments_text += f"📄 الصفحة {page} من {total_pages}\n"
+    assignments_text += "\n"
     assignments_text += "<b>قائمة الوظائف:</b>\n"
     
     # Build inline keyboard with assignment management options
@@ -817,7 +878,7 @@ async def show_assignments_for_management(callback: CallbackQuery, db_session: A
     
     builder = InlineKeyboardBuilder()
     
-    for idx, assignment in enumerate(assignments, 1):
+    for idx, assignment in enumerate(assignments, offset + 1):
         file_type_emoji = {
             "document": "📄",
             "photo": "🖼️",
@@ -842,12 +903,30 @@ async def show_assignments_for_management(callback: CallbackQuery, db_session: A
             text=f"{idx} ⬇️",
             callback_data=f"assignment_move_down:{assignment.id}"
         ))
+        builder.add(InlineKeyboardButton(
+            text=f"{idx} ↕️",
+            callback_data=f"assignment_move_to:{assignment.id}"
+        ))
         builder.add(InlineKeyboardButton(
             text=f"{idx} 🗑️",
-            callback_data=f"assignment_delete:{assignment.id}"
+            callback_data=f"assignment_delete:{assignment.id}:{page}"
         ))
     
-    builder.adjust(3)  # 3 buttons per row
+    builder.adjust(4)  # 4 buttons per row
+    
+    navigation = []
+    if page > 1:
+        navigation.append(InlineKeyboardButton(
+            text="◀ السابق",
+            callback_data=f"assignment_manage_subject:{teacher_subject_id}:{page - 1}"
+        ))
+    if page < total_pages:
+        navigation.append(InlineKeyboardButton(
+            text="التالي ▶",
+            callback_data=f"assignment_manage_subject:{teacher_subject_id}:{page + 1}"
+        ))
+    if navigation:
+        builder.row(*navigation)
     
     # Add back button
     builder.row(InlineKeyboardButton(
@@ -860,7 +939,7 @@ async def show_assignments_for_management(callback: CallbackQuery, db_session: A
         parse_mode="HTML",
         reply_markup=builder.as_markup()
     )
-    await callback.answer()
+    await callback.answer(notice)
 
 
 @router.callback_query(F.data.startswith("assignment_subject:"), AssignmentUploadStates.waiting_for_subject_selection)
@@ -869,31 +948,29 @@ async def process_assignment_subject_selection(callback: CallbackQuery, state: F
     teacher_subject_id = int(callback.data.split(":")[1])
     
     # Verify that this teacher_subject belongs to the teacher
-    teacher_repo = TeacherRepository(db_session)
-    teacher_subjects = await teacher_repo.get_teacher_subjects(user.id, active_only=True)
-    teacher_subject_ids = [ts.id for ts in teacher_subjects]
-    
-    if teacher_subject_id not in teacher_subject_ids:
+    if not await ownership_cache.owns(db_session, user.id, teacher_subject_id):
         await callback.answer("❌ هذه المادة غير متاحة لك.", show_alert=True)
         return
     
     # Get subject info
-    teacher_subject = None
-    for ts in teacher_subjects:
-        if ts.id == teacher_subject_id:
-            teacher_subject = ts
-            break
+    subject = await TeacherRepository(db_session).get_subject_by_teacher_subject(teacher_subject_id)
     
-    if not teacher_subject:
+    if not subject:
         await callback.answer("❌ حدث خطأ في اختيار المادة.", show_alert=True)
         return
     
-    subject_name = teacher_subject.subject.name
+    subject_name = subject.name
+    
+    # Files are staged in the database as drafts while they arrive;
+    # drafts left by an interrupted upload are picked up again
+    assignment_repo = AssignmentRepository(db_session)
+    draft_count = await assignment_repo.count_drafts(teacher_subject_id)
+    resume_note = f"\n\n♻️ تم استرجاع <b>{draft_count}</b> ملف من رفع سابق لم يكتمل." if draft_count else ""
     
     await state.update_data(
         teacher_subject_id=teacher_subject_id,
         subject_name=subject_name,
-        uploaded_files=[]  # List to store file info
+        uploaded_count=draft_count
     )
     
     await callback.message.edit_text(
@@ -901,7 +978,8 @@ async def process_assignment_subject_selection(callback: CallbackQuery, state: F
         "📤 <b>الآن يمكنك رفع ملفات الوظيفة:</b>\n\n"
         "• يمكنك إرسال <b>أكثر من ملف</b> (مستندات، صور، فيديو، صوت)\n"
         "• الملفات سيتم حفظها بالترتيب الذي ترسله به\n"
-        "• بعد الانتهاء من إرسال جميع الملفات، اكتب <b>'تم'</b> أو اضغط على زر 'إنهاء'",
+        "• بعد الانتهاء من إرسال جميع الملفات، اكتب <b>'تم'</b> أو اضغط على زر 'إنهاء'"
+        f"{resume_note}",
         parse_mode="HTML"
     )
     
@@ -920,11 +998,35 @@ async def process_assignment_subject_selection(callback: CallbackQuery, state: F
     await callback.answer()
 
 
+async def publish_assignment_upload(state: FSMContext, db_session: AsyncSession) -> Optional[str]:
+    """Publish the files staged during an assignment upload; returns the confirmation text, or None if there were none."""
+    data = await state.get_data()
+    teacher_subject_id = data.get("teacher_subject_id")
+    subject_name = data.get("subject_name", "المادة")
+    
+    # Publish the staged files with a single status flip
+    assignment_repo = AssignmentRepository(db_session)
+    published_count = await assignment_repo.publish_drafts(teacher_subject_id)
+    
+    if not published_count:
+        return None
+    
+    # Clear state FIRST before sending any messages
+    await state.clear()
+    
+    return (
+        f"✅ <b>تم رفع الوظيفة بنجاح!</b>\n\n"
+        f"📚 المادة: <b>{subject_name}</b>\n"
+        f"📁 عدد الملفات: <b>{published_count}</b> ملف\n\n"
+        "يمكنك الآن رفع وظيفة أخرى أو العودة للقائمة الرئيسية."
+    )
+
+
 @router.message(AssignmentUploadStates.waiting_for_assignment_files)
 async def process_assignment_file(message: Message, state: FSMContext, db_session: AsyncSession, user: User):
     """Process uploaded assignment file."""
     data = await state.get_data()
-    uploaded_files: List[dict] = data.get("uploaded_files", [])
+    uploaded_count: int = data.get("uploaded_count", 0)
     
     file_info = None
     file_type = None
@@ -951,48 +1053,12 @@ async def process_assignment_file(message: Message, state: FSMContext, db_sessio
         file_type = "video_note"
     elif message.text and message.text.lower() in ["تم", "finish", "done", "إنهاء"]:
         # User finished uploading files
-        if not uploaded_files:
+        finished_text = await publish_assignment_upload(state, db_session)
+        if finished_text is None:
             await message.answer("❌ لم يتم رفع أي ملفات. يرجى إرسال ملف واحد على الأقل.")
             return
         
-        # Save all files to database
-        teacher_subject_id = data.get("teacher_subject_id")
-        subject_name = data.get("subject_name", "المادة")
-        
-        # Get the maximum display_order for this teacher_subject
-        from sqlalchemy import select, func
-        result = await db_session.execute(
-            select(func.max(Assignment.display_order)).where(
-                Assignment.teacher_subject_id == teacher_subject_id
-            )
-        )
-        max_order = result.scalar() or 0
-        
-        # Save all files
-        for idx, file_data in enumerate(uploaded_files):
-            assignment = Assignment(
-                teacher_subject_id=teacher_subject_id,
-                file_id=file_data["file_id"],
-                file_type=file_data["file_type"],
-                file_name=file_data.get("file_name"),
-                file_size=file_data.get("file_size"),
-                display_order=max_order + idx + 1
-            )
-            db_session.add(assignment)
-        
-        await db_session.commit()
-        
-        # Clear state FIRST before sending any messages
-        await state.clear()
-        
-        await message.answer(
-            f"✅ <b>تم رفع الوظيفة بنجاح!</b>\n\n"
-            f"📚 المادة: <b>{subject_name}</b>\n"
-            f"📁 عدد الملفات: <b>{len(uploaded_files)}</b> ملف\n\n"
-            "يمكنك الآن رفع وظيفة أخرى أو العودة للقائمة الرئيسية.",
-            parse_mode="HTML",
-            reply_markup=get_teacher_panel_keyboard()
-        )
+        await message.answer(finished_text, parse_mode="HTML", reply_markup=get_teacher_panel_keyboard())
         return
     
     if not file_info:
@@ -1003,21 +1069,41 @@ async def process_assignment_file(message: Message, state: FSMContext, db_sessio
     
     # Extract file information
     file_id = file_info.file_id
-    file_name = getattr(file_info, "file_name", None) or getattr(file_info, "file_unique_id", None)
+    file_unique_id = file_info.file_unique_id
+    file_name = getattr(file_info, "file_name", None) or file_unique_id
     file_size = getattr(file_info, "file_size", None)
+    teacher_subject_id = data.get("teacher_subject_id")
     
-    # Add to uploaded files list
-    uploaded_files.append({
-        "file_id": file_id,
-        "file_type": file_type,
-        "file_name": file_name,
-        "file_size": file_size
-    })
+    # Stage the file right away so it survives restarts; the FSM only keeps a counter.
+    # A file already in this subject is skipped by the (teacher_subject_id, file_unique_id) index
+    assignment_repo = AssignmentRepository(db_session)
+    created_ids = await assignment_repo.bulk_create(
+        teacher_subject_id,
+        [{
+            "file_id": file_id,
+            "file_unique_id": file_unique_id,
+            "file_type": file_type,
+            "file_name": file_name,
+            "file_size": file_size
+        }],
+        is_draft=True
+    )
     
-    await state.update_data(uploaded_files=uploaded_files)
+    if not created_ids:
+        duplicate = await assignment_repo.find_duplicate(teacher_subject_id, file_unique_id)
+        where = "ضمن الملفات المرسلة في هذا الرفع" if duplicate and duplicate.is_draft else "ضمن الوظائف المنشورة لهذه المادة"
+        await message.answer(
+            f"⚠️ <b>هذا الملف مرفوع مسبقاً</b>\n\n"
+            f"الملف موجود {where}، لذلك لم تتم إضافته مرة أخرى.\n"
+            f"📊 إجمالي الملفات المرفوعة: {uploaded_count}",
+            parse_mode="HTML"
+        )
+        return
+    
+    file_count = uploaded_count + 1
+    await state.update_data(uploaded_count=file_count)
     
     # Confirm file received
-    file_count = len(uploaded_files)
     await message.answer(
         f"✅ <b>تم استلام الملف {file_count}</b>\n\n"
         f"📁 نوع الملف: {file_type}\n"
@@ -1030,170 +1116,135 @@ async def process_assignment_file(message: Message, state: FSMContext, db_sessio
 @router.callback_query(F.data == "assignment_finish_upload", AssignmentUploadStates.waiting_for_assignment_files)
 async def finish_assignment_upload(callback: CallbackQuery, state: FSMContext, db_session: AsyncSession, user: User):
     """Finish assignment upload process."""
-    data = await state.get_data()
-    uploaded_files: List[dict] = data.get("uploaded_files", [])
-    
-    if not uploaded_files:
+    finished_text = await publish_assignment_upload(state, db_session)
+    if finished_text is None:
         await callback.answer("❌ لم يتم رفع أي ملفات. يرجى إرسال ملف واحد على الأقل.", show_alert=True)
         return
     
-    # Save all files to database
-    teacher_subject_id = data.get("teacher_subject_id")
-    subject_name = data.get("subject_name", "المادة")
-    
-    # Get the maximum display_order for this teacher_subject
-    from sqlalchemy import select, func
-    result = await db_session.execute(
-        select(func.max(Assignment.display_order)).where(
-            Assignment.teacher_subject_id == teacher_subject_id
-        )
-    )
-    max_order = result.scalar() or 0
-    
-    # Save all files
-    for idx, file_data in enumerate(uploaded_files):
-        assignment = Assignment(
-            teacher_subject_id=teacher_subject_id,
-            file_id=file_data["file_id"],
-            file_type=file_data["file_type"],
-            file_name=file_data.get("file_name"),
-            file_size=file_data.get("file_size"),
-            display_order=max_order + idx + 1
-        )
-        db_session.add(assignment)
-    
-    await db_session.commit()
-    
-    # Clear state FIRST before sending any messages
-    await state.clear()
-    
-    await callback.message.edit_text(
-        f"✅ <b>تم رفع الوظيفة بنجاح!</b>\n\n"
-        f"📚 المادة: <b>{subject_name}</b>\n"
-        f"📁 عدد الملفات: <b>{len(uploaded_files)}</b> ملف\n\n"
-        "يمكنك الآن رفع وظيفة أخرى أو العودة للقائمة الرئيسية.",
-        parse_mode="HTML"
-    )
+    await callback.message.edit_text(finished_text, parse_mode="HTML")
     
     await callback.message.edit_reply_markup(reply_markup=None)
     await callback.answer("✅ تم حفظ الوظيفة بنجاح!")
 
 
 @router.callback_query(F.data == "assignment_cancel")
-async def cancel_assignment_upload(callback: CallbackQuery, state: FSMContext):
+async def cancel_assignment_upload(callback: CallbackQuery, state: FSMContext, db_session: AsyncSession):
     """Cancel assignment upload process."""
+    data = await state.get_data()
+    teacher_subject_id = data.get("teacher_subject_id")
+    if teacher_subject_id:
+        # Drop the files staged during this upload
+        assignment_repo = AssignmentRepository(db_session)
+        await assignment_repo.discard_drafts(teacher_subject_id)
+    
     await state.clear()
     await callback.message.edit_text("❌ تم إلغاء رفع الوظيفة.")
     await callback.message.edit_reply_markup(reply_markup=None)
     await callback.answer("تم الإلغاء")
 
 
-@router.callback_query(F.data.startswith("assignment_move_up:"))
-async def move_assignment_up(callback: CallbackQuery, db_session: AsyncSession, user: User):
-    """Move assignment up in order."""
-    assignment_id = int(callback.data.split(":")[1])
-    
-    # Get assignment
-    from sqlalchemy import select
-    result = await db_session.execute(
-        select(Assignment).where(Assignment.id == assignment_id)
-    )
-    assignment = result.scalar_one_or_none()
-    
-    if not assignment:
-        await callback.answer("❌ الوظيفة غير موجودة.", show_alert=True)
-        return
-    
-    # Verify ownership
-    teacher_repo = TeacherRepository(db_session)
-    teacher_subjects = await teacher_repo.get_teacher_subjects(user.id, active_only=True)
-    teacher_subject_ids = [ts.id for ts in teacher_subjects]
-    
-    if assignment.teacher_subject_id not in teacher_subject_ids:
+async def move_assignment(
+    callback: CallbackQuery,
+    db_session: AsyncSession,
+    user: User,
+    assignment_id: int,
+    position: Optional[int] = None,
+    offset: Optional[int] = None,
+    unchanged_text: str = "⚠️ الوظيفة في هذا الموضع بالفعل."
+):
+    """Move an assignment with one statement and refresh the management list."""
+    assignment_repo = AssignmentRepository(db_session)
+    moved = await assignment_repo.move(assignment_id, user.id, position=position, offset=offset)
+    
+    if not moved:
         await callback.answer("❌ هذه الوظيفة غير متاحة لك.", show_alert=True)
         return
     
-    # Get previous assignment (with lower display_order)
-    result = await db_session.execute(
-        select(Assignment)
-        .where(Assignment.teacher_subject_id == assignment.teacher_subject_id)
-        .where(Assignment.display_order < assignment.display_order)
-        .order_by(Assignment.display_order.desc())
-        .limit(1)
-    )
-    prev_assignment = result.scalar_one_or_none()
-    
-    if not prev_assignment:
-        await callback.answer("⚠️ هذه الوظيفة في المقدمة بالفعل.", show_alert=True)
+    teacher_subject_id, old_position, new_position = moved
+    if old_position == new_position:
+        await callback.answer(unchanged_text, show_alert=True)
         return
     
-    # Swap display_order
-    temp_order = assignment.display_order
-    assignment.display_order = prev_assignment.display_order
-    prev_assignment.display_order = temp_order
-    
-    await db_session.commit()
-    await callback.answer("✅ تم نقل الوظيفة للأعلى")
-    
     # Refresh the list
-    await show_assignments_for_management(callback, db_session, user)
+    await render_assignments_management(
+        callback,
+        db_session,
+        user,
+        teacher_subject_id,
+        notice=f"✅ تم نقل الوظيفة إلى الموضع {new_position}",
+        page=(new_position - 1) // MANAGEMENT_PAGE_SIZE + 1
+    )
+
+
+@router.callback_query(F.data.startswith("assignment_move_up:"))
+async def move_assignment_up(callback: CallbackQuery, db_session: AsyncSession, user: User):
+    """Move assignment up in order."""
+    assignment_id = int(callback.data.split(":")[1])
+    await move_assignment(
+        callback, db_session, user, assignment_id,
+        offset=-1,
+        unchanged_text="⚠️ هذه الوظيفة في المقدمة بالفعل."
+    )
 
 
 @router.callback_query(F.data.startswith("assignment_move_down:"))
 async def move_assignment_down(callback: CallbackQuery, db_session: AsyncSession, user: User):
     """Move assignment down in order."""
     assignment_id = int(callback.data.split(":")[1])
-    
-    # Get assignment
-    from sqlalchemy import select
-    result = await db_session.execute(
-        select(Assignment).where(Assignment.id == assignment_id)
+    await move_assignment(
+        callback, db_session, user, assignment_id,
+        offset=1,
+        unchanged_text="⚠️ هذه الوظيفة في النهاية بالفعل."
     )
-    assignment = result.scalar_one_or_none()
+
+
+@router.callback_query(F.data.startswith("assignment_move_to:"))
+async def choose_assignment_position(callback: CallbackQuery, db_session: AsyncSession, user: User):
+    """Ask for the new position of an assignment, one page of positions at a time."""
+    parts = callback.data.split(":")
+    assignment_id = int(parts[1])
+    page = int(parts[2]) if len(parts) > 2 else 1
     
-    if not assignment:
-        await callback.answer("❌ الوظيفة غير موجودة.", show_alert=True)
-        return
+    assignment_repo = AssignmentRepository(db_session)
+    assignment = await assignment_repo.get_owned(assignment_id, user.id)
     
-    # Verify ownership
-    teacher_repo = TeacherRepository(db_session)
-    teacher_subjects = await teacher_repo.get_teacher_subjects(user.id, active_only=True)
-    teacher_subject_ids = [ts.id for ts in teacher_subjects]
-    
-    if assignment.teacher_subject_id not in teacher_subject_ids:
+    if not assignment:
         await callback.answer("❌ هذه الوظيفة غير متاحة لك.", show_alert=True)
         return
     
-    # Get next assignment (with higher display_order)
-    result = await db_session.execute(
-        select(Assignment)
-        .where(Assignment.teacher_subject_id == assignment.teacher_subject_id)
-        .where(Assignment.display_order > assignment.display_order)
-        .order_by(Assignment.display_order.asc())
-        .limit(1)
-    )
-    next_assignment = result.scalar_one_or_none()
-    
-    if not next_assignment:
-        await callback.answer("⚠️ هذه الوظيفة في النهاية بالفعل.", show_alert=True)
-        return
-    
-    # Swap display_order
-    temp_order = assignment.display_order
-    assignment.display_order = next_assignment.display_order
-    next_assignment.display_order = temp_order
+    total = await assignment_repo.count_published(assignment.teacher_subject_id)
     
-    await db_session.commit()
-    await callback.answer("✅ تم نقل الوظيفة للأسفل")
+    keyboard = build_position_keyboard(
+        "assignment",
+        assignment.id,
+        total,
+        page,
+        back_data=f"assignment_manage_subject:{assignment.teacher_subject_id}"
+    )
     
-    # Refresh the list
-    await show_assignments_for_management(callback, db_session, user)
+    await callback.message.edit_text(
+        f"↕️ <b>نقل الوظيفة</b>\n\n"
+        f"📄 {assignment.file_name or assignment.title or 'الوظيفة'}\n\n"
+        "اختر الموضع الجديد:",
+        parse_mode="HTML",
+        reply_markup=keyboard
+    )
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith("assignment_move_pos:"))
+async def move_assignment_to_position(callback: CallbackQuery, db_session: AsyncSession, user: User):
+    """Move an assignment to the chosen position, renumbering the list in one UPDATE."""
+    _, assignment_id, position = callback.data.split(":")
+    await move_assignment(callback, db_session, user, int(assignment_id), position=int(position))
 
 
 @router.callback_query(F.data.startswith("assignment_delete:"))
 async def delete_assignment(callback: CallbackQuery, db_session: AsyncSession, user: User):
     """Delete an assignment."""
-    assignment_id = int(callback.data.split(":")[1])
+    parts = callback.data.split(":")
+    assignment_id = int(parts[1])
+    page = int(parts[2]) if len(parts) > 2 else 1
     
     # Get assignment
     from sqlalchemy import select
@@ -1207,11 +1258,7 @@ async def delete_assignment(callback: CallbackQuery, db_session: AsyncSession, u
         return
     
     # Verify ownership
-    teacher_repo = TeacherRepository(db_session)
-    teacher_subjects = await teacher_repo.get_teacher_subjects(user.id, active_only=True)
-    teacher_subject_ids = [ts.id for ts in teacher_subjects]
-    
-    if assignment.teacher_subject_id not in teacher_subject_ids:
+    if not await ownership_cache.owns(db_session, user.id, assignment.teacher_subject_id):
         await callback.answer("❌ هذه الوظيفة غير متاحة لك.", show_alert=True)
         return
     
@@ -1222,11 +1269,15 @@ async def delete_assignment(callback: CallbackQuery, db_session: AsyncSession, u
     await db_session.delete(assignment)
     await db_session.commit()
     
-    await callback.answer("✅ تم حذف الوظيفة")
-    
     # Refresh the list
-    callback.data = f"assignment_manage_subject:{teacher_subject_id}"
-    await show_assignments_for_management(callback, db_session, user)
+    await render_assignments_management(
+        callback,
+        db_session,
+        user,
+        teacher_subject_id,
+        notice="✅ تم حذف الوظيفة",
+        page=page
+    )
 
 
 @router.message(F.text == "📥 تنزيل وظائف الطلاب")
@@ -1284,7 +1335,8 @@ async def start_download_student_assignments(message: Message, db_session: Async
     
     await message.answer(
         "📥 <b>تنزيل وظائف الطلاب</b>\n\n"
-        "اختر المادة التي تريد عرض وظائف الطلاب الخاصة بها:",
+        "اختر المادة التي تريد عرض وظائف الطلاب الخاصة بها:\n"
+        "(يتم إرسال الحلول الجديدة منذ آخر تنزيل فقط)",
         parse_mode="HTML",
         reply_markup=builder.as_markup()
     )
@@ -1292,11 +1344,18 @@ async def start_download_student_assignments(message: Message, db_session: Async
 
 @router.callback_query(F.data.startswith("teacher_download_submissions:"))
 async def download_student_assignments(callback: CallbackQuery, bot, db_session: AsyncSession, user: User):
-    """Download all student assignment submissions for selected subject."""
+    """Download student assignment submissions for selected subject.
+    
+    By default only submissions created or updated since the teacher's last
+    export are sent; "teacher_download_submissions:{id}:all" sends all of them.
+    """
     from sqlalchemy import select
-    from sqlalchemy.orm import selectinload
+    from aiogram.utils.keyboard import InlineKeyboardBuilder
+    from aiogram.types import InlineKeyboardButton
     
-    subject_id = int(callback.data.split(":")[1])
+    parts = callback.data.split(":")
+    subject_id = int(parts[1])
+    export_all = len(parts) > 2 and parts[2] == "all"
     
     # Verify teacher teaches this subject
     teacher_repo = TeacherRepository(db_session)
@@ -1328,6 +1387,7 @@ async def download_student_assignments(callback: CallbackQuery, bot, db_session:
     assignments_result = await db_session.execute(
         select(Assignment)
         .where(Assignment.teacher_subject_id == teacher_subject.id)
+        .where(Assignment.is_draft == False)
     )
     assignments = assignments_result.scalars().all()
     
@@ -1341,23 +1401,45 @@ async def download_student_assignments(callback: CallbackQuery, bot, db_session:
         await callback.answer()
         return
     
-    # Get all submissions for these assignments
-    assignment_ids = [a.id for a in assignments]
-    submissions_result = await db_session.execute(
-        select(AssignmentSubmission)
-        .where(AssignmentSubmission.assignment_id.in_(assignment_ids))
-        .options(selectinload(AssignmentSubmission.student))
-        .order_by(AssignmentSubmission.created_at.desc())
+    # A repeated tap must not export the same submissions again while this export runs
+    if not claim_bulk_operation("teacher_submissions_export"):
+        await callback.answer("⏳ تصدير الحلول جارٍ بالفعل، يرجى الانتظار حتى ينتهي.", show_alert=True)
+        return
+    
+    # Get submissions changed since the last export (or all of them)
+    assignment_repo = AssignmentRepository(db_session)
+    if export_all:
+        watermark, retry_ids = None, []
+    else:
+        watermark, retry_ids = await assignment_repo.get_export_watermark(user.id, subject_id)
+    submissions = await assignment_repo.get_submissions_for_export(
+        teacher_subject.id,
+        since=watermark,
+        retry_ids=retry_ids
     )
-    submissions = submissions_result.scalars().all()
+    
+    builder = InlineKeyboardBuilder()
+    builder.add(InlineKeyboardButton(
+        text="📥 تنزيل جميع الحلول",
+        callback_data=f"teacher_download_submissions:{subject_id}:all"
+    ))
     
     if not submissions:
-        await callback.message.edit_text(
-            f"❌ <b>لا توجد حلول للوظائف</b>\n\n"
-            f"المادة: <b>{subject.name}</b>\n\n"
-            "لم يرفع أي طالب حلول للوظائف بعد.",
-            parse_mode="HTML"
-        )
+        if watermark is None:
+            await callback.message.edit_text(
+                f"❌ <b>لا توجد حلول للوظائف</b>\n\n"
+                f"المادة: <b>{subject.name}</b>\n\n"
+                "لم يرفع أي طالب حلول للوظائف بعد.",
+                parse_mode="HTML"
+            )
+        else:
+            await callback.message.edit_text(
+                f"ℹ️ <b>لا توجد حلول جديدة</b>\n\n"
+                f"المادة: <b>{subject.name}</b>\n\n"
+                "لم يرفع أي طالب حلولاً جديدة منذ آخر تنزيل.",
+                parse_mode="HTML",
+                reply_markup=builder.as_markup()
+            )
         await callback.answer()
         return
     
@@ -1365,81 +1447,47 @@ async def download_student_assignments(callback: CallbackQuery, bot, db_session:
     subject_info = f"📚 <b>{subject.name}</b>"
     if subject.code:
         subject_info += f" ({subject.code})"
-    subject_info += f"\n\n📁 عدد الحلول: <b>{len(submissions)}</b> ملف\n\n"
+    if watermark is None:
+        subject_info += f"\n\n📁 عدد الحلول: <b>{len(submissions)}</b> ملف\n\n"
+    else:
+        subject_info += f"\n\n🆕 الحلول الجديدة منذ آخر تنزيل: <b>{len(submissions)}</b> ملف\n\n"
     
     await callback.message.edit_text(
-        subject_info + "⏳ جاري إرسال ملفات الوظائف...",
+        subject_info + "⏳ جاري تجهيز ملف مضغوط بالحلول...",
         parse_mode="HTML"
     )
     await callback.answer()
     
-    # Send all submission files with student info
-    sent_count = 0
-    for idx, submission in enumerate(submissions, 1):
-        try:
-            # Get student info
-            student = submission.student
-            student_name = student.full_name or "غير محدد"
-            student_id = student.student_id or "غير محدد"
-            
-            # Build caption with student info
-            caption = (
-                f"📝 <b>حل الوظيفة {idx}/{len(submissions)}</b>\n\n"
-                f"👤 <b>الطالب:</b> {student_name}\n"
-                f"🆔 <b>الرقم:</b> {student_id}\n"
-            )
-            if submission.file_name:
-                caption += f"\n📄 <b>الملف:</b> {submission.file_name}"
-            
-            # Send file based on type
-            if submission.file_type == "document":
-                await bot.send_document(
-                    chat_id=user.telegram_id,
-                    document=submission.file_id,
-                    caption=caption,
-                    parse_mode="HTML"
-                )
-            elif submission.file_type == "photo":
-                await bot.send_photo(
-                    chat_id=user.telegram_id,
-                    photo=submission.file_id,
-                    caption=caption,
-                    parse_mode="HTML"
-                )
-            else:
-                # Fallback: send as document
-                await bot.send_document(
-                    chat_id=user.telegram_id,
-                    document=submission.file_id,
-                    caption=caption,
-                    parse_mode="HTML"
-                )
-            
-            sent_count += 1
-            
-            # Small delay to avoid rate limiting
-            import asyncio
-            await asyncio.sleep(0.5)
-            
-        except Exception as e:
-            # Log error but continue sending other files
-            print(f"Error sending submission {submission.id}: {e}")
-            continue
+    # Download the submissions into ZIP archives (with a CSV manifest) and send them;
+    # the export can take a while and the teacher's other taps need not wait for it
+    release_user_lock()
+    exporter = SubmissionExporter(bot)
+    archive_name = f"{subject.code or subject.name}_submissions"
+    exported_count, parts_count, failed_ids = await exporter.export(user.telegram_id, submissions, archive_name)
+    
+    # The watermark always moves; failed files are retried by id with the next export
+    await assignment_repo.set_export_watermark(user.id, subject_id, submissions[-1].updated_at, failed_ids)
+    if failed_ids:
+        next_export_text = "الحلول التي تعذر تصديرها مذكورة في manifest.csv وستتم إعادة محاولة تصديرها مع التصدير القادم."
+    else:
+        next_export_text = "في المرة القادمة سيتم إرسال الحلول الجديدة فقط."
     
     # Send completion message
-    if sent_count > 0:
+    if exported_count > 0:
         await bot.send_message(
             chat_id=user.telegram_id,
-            text=f"✅ <b>تم إرسال {sent_count} من {len(submissions)} حل</b>\n\n"
-                 f"المادة: <b>{subject.name}</b>\n\n"
-                 "يمكنك اختيار مادة أخرى أو العودة للقائمة.",
+            text=f"✅ <b>تم تصدير {exported_count} من {len(submissions)} حل</b>\n\n"
+                 f"المادة: <b>{subject.name}</b>\n"
+                 f"🗂 عدد الملفات المضغوطة: <b>{parts_count}</b>\n\n"
+                 "يحتوي كل ملف على manifest.csv بأسماء الطلاب وأرقامهم.\n"
+                 f"{next_export_text}",
             parse_mode="HTML",
-            reply_markup=get_teacher_panel_keyboard()
+            reply_markup=builder.as_markup()
         )
     else:
         await bot.send_message(
             chat_id=user.telegram_id,
-            text="❌ حدث خطأ أثناء إرسال ملفات الوظائف.\n\n"
+            text="❌ حدث خطأ أثناء تصدير ملفات الوظائف.\n\n"
                  "يرجى المحاولة مرة أخرى لاحقاً.",
             reply_markup=get_teacher_panel_keyboard()
         )
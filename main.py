@@ -2,9 +2,16 @@
 import asyncio
 import logging
 from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from typing import Optional
 from aiogram.fsm.storage.memory import MemoryStorage
 from config import config
 from database.base import init_db
+from database.notifications import listener
+from services.reference_cache import reference_cache
+from services.audit_log import audit_log
+from services.publisher import publisher
 from handlers.start_handler import router as start_router
 from handlers.profile_handler import router as profile_router
 from handlers.service_handler import router as service_router
@@ -14,7 +21,8 @@ from handlers.records_handler import router as records_router
 from handlers.admin_handler import router as admin_router
 from handlers.teacher_handler import router as teacher_router
 from handlers.student_handler import router as student_router
-from handlers.common import DatabaseMiddleware, UserMiddleware
+from services.send_scheduler import SendScheduler, SendSchedulerMiddleware
+from handlers.common import DatabaseMiddleware, UserMiddleware, UserLockMiddleware, ThrottlingMiddleware
 
 # Configure logging
 logging.basicConfig(
@@ -24,18 +32,31 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-async def main():
-    """Main function to run the bot."""
-    # Initialize database
-    logger.info("Initializing database...")
-    await init_db()
-    logger.info("Database initialized.")
+def create_bot(send_rate: Optional[float] = None) -> Bot:
+    """Create the bot, optionally pointed at a custom Bot API server.
+
+    All outgoing calls go through the send scheduler; `send_rate` overrides
+    the messages-per-second budget of this process, which defaults to the
+    global budget minus the web dashboard's share.
+    """
+    if config.TELEGRAM_API_URL:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(config.TELEGRAM_API_URL))
+        bot = Bot(token=config.BOT_TOKEN, session=session)
+    else:
+        bot = Bot(token=config.BOT_TOKEN)
     
-    # Initialize bot and dispatcher
-    bot = Bot(token=config.BOT_TOKEN)
+    scheduler = SendScheduler(global_rate=send_rate or config.SEND_GLOBAL_RATE * (1 - config.DASHBOARD_SEND_SHARE))
+    bot.session.middleware(SendSchedulerMiddleware(scheduler))
+    return bot
+
+
+def create_dispatcher() -> Dispatcher:
+    """Create the dispatcher with middleware and routers registered."""
     dp = Dispatcher(storage=MemoryStorage())
     
-    # Register middleware
+    # Register middleware (throttling first so rejected updates never wait for the user lock)
+    dp.update.outer_middleware(ThrottlingMiddleware())
+    dp.update.outer_middleware(UserLockMiddleware())
     dp.message.middleware(DatabaseMiddleware())
     dp.callback_query.middleware(DatabaseMiddleware())
     dp.message.middleware(UserMiddleware())
@@ -52,6 +73,33 @@ async def main():
     dp.include_router(teacher_router)
     dp.include_router(student_router)
     
+    # Cache invalidation notifications from other processes
+    dp.startup.register(listener.start)
+    dp.startup.register(reference_cache.preload)
+    dp.shutdown.register(listener.stop)
+    
+    # Buffered admin audit log
+    dp.startup.register(audit_log.start)
+    dp.shutdown.register(audit_log.stop)
+    
+    # Channel posts of approved services and requests
+    dp.startup.register(publisher.start)
+    dp.shutdown.register(publisher.stop)
+    
+    return dp
+
+
+async def main():
+    """Main function to run the bot."""
+    # Initialize database
+    logger.info("Initializing database...")
+    await init_db()
+    logger.info("Database initialized.")
+    
+    # Initialize bot and dispatcher
+    bot = create_bot()
+    dp = create_dispatcher()
+    
     logger.info("Bot starting...")
     
     # Start polling
@@ -0,0 +1,42 @@
+"""Migration script to add (teacher_subject_id, display_order) indexes."""
+import asyncio
+from sqlalchemy import text
+from database.base import engine
+
+
+async def add_display_order_indexes():
+    """Add ordering indexes used to load a subject's files in one query."""
+    print("\n🔄 إضافة فهارس الترتيب للمحاضرات والوظائف...")
+    
+    async with engine.begin() as conn:
+        try:
+            for table in ("lectures", "assignments"):
+                await conn.execute(text(f"""
+                    CREATE INDEX IF NOT EXISTS idx_{table}_display_order
+                    ON {table}(teacher_subject_id, display_order)
+                """))
+                print(f"✅ فهرس idx_{table}_display_order جاهز")
+                
+        except Exception as e:
+            print(f"❌ خطأ في إضافة الفهارس: {e}")
+            raise
+
+
+async def main():
+    """Run migration."""
+    print("=" * 60)
+    print("🚀 بدء migration لفهارس ترتيب الملفات")
+    print("=" * 60)
+    
+    try:
+        await add_display_order_indexes()
+        print("\n✅ تم إكمال migration بنجاح!")
+    except Exception as e:
+        print(f"\n❌ حدث خطأ أثناء migration: {e}")
+        raise
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
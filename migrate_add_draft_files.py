@@ -0,0 +1,50 @@
+"""Migration script to add is_draft to lectures and assignments."""
+import asyncio
+from sqlalchemy import text
+from database.base import engine
+
+
+async def add_draft_columns():
+    """Add is_draft columns and partial indexes for staged uploads."""
+    print("\n🔄 إضافة عمود is_draft للمحاضرات والوظائف...")
+    
+    async with engine.begin() as conn:
+        try:
+            for table in ("lectures", "assignments"):
+                await conn.execute(text(f"""
+                    ALTER TABLE {table}
+                    ADD COLUMN IF NOT EXISTS is_draft BOOLEAN NOT NULL DEFAULT FALSE
+                """))
+                print(f"✅ عمود {table}.is_draft جاهز")
+                
+                # Only unfinished uploads are drafts, so the index stays tiny
+                await conn.execute(text(f"""
+                    CREATE INDEX IF NOT EXISTS idx_{table}_drafts
+                    ON {table}(teacher_subject_id)
+                    WHERE is_draft
+                """))
+                print(f"✅ فهرس idx_{table}_drafts جاهز")
+                
+        except Exception as e:
+            print(f"❌ خطأ في إضافة عمود is_draft: {e}")
+            raise
+
+
+async def main():
+    """Run migration."""
+    print("=" * 60)
+    print("🚀 بدء migration لحفظ الملفات أثناء الرفع")
+    print("=" * 60)
+    
+    try:
+        await add_draft_columns()
+        print("\n✅ تم إكمال migration بنجاح!")
+    except Exception as e:
+        print(f"\n❌ حدث خطأ أثناء migration: {e}")
+        raise
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
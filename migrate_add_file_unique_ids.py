@@ -0,0 +1,59 @@
+"""Migration script to deduplicate uploaded files by Telegram file_unique_id."""
+import asyncio
+from sqlalchemy import text
+from database.base import engine
+
+
+async def add_file_unique_ids():
+    """Add the per-subject content index of lectures and assignments."""
+    print("\n🔄 إضافة فهرس محتوى الملفات المرفوعة...")
+    
+    async with engine.begin() as conn:
+        try:
+            for table in ("lectures", "assignments"):
+                await conn.execute(text(f"""
+                    ALTER TABLE {table}
+                    ADD COLUMN IF NOT EXISTS file_unique_id VARCHAR(100)
+                """))
+                print(f"✅ عمود {table}.file_unique_id جاهز")
+                
+                # Files uploaded before this migration have no file_unique_id and are left as they are
+                await conn.execute(text(f"""
+                    CREATE UNIQUE INDEX IF NOT EXISTS uq_{table}_subject_file
+                    ON {table}(teacher_subject_id, file_unique_id)
+                    WHERE file_unique_id IS NOT NULL
+                """))
+                print(f"✅ فهرس uq_{table}_subject_file جاهز")
+                
+                # The shared stored_files catalog of an earlier version of this migration is not used
+                await conn.execute(text(f"""
+                    ALTER TABLE {table}
+                    DROP COLUMN IF EXISTS stored_file_id
+                """))
+            
+            await conn.execute(text("DROP TABLE IF EXISTS stored_files"))
+            print("✅ تم حذف جدول stored_files غير المستخدم (إن وجد)")
+                
+        except Exception as e:
+            print(f"❌ خطأ في إضافة فهرس الملفات: {e}")
+            raise
+
+
+async def main():
+    """Run migration."""
+    print("=" * 60)
+    print("🚀 بدء migration لمنع تكرار الملفات المرفوعة")
+    print("=" * 60)
+    
+    try:
+        await add_file_unique_ids()
+        print("\n✅ تم إكمال migration بنجاح!")
+    except Exception as e:
+        print(f"\n❌ حدث خطأ أثناء migration: {e}")
+        raise
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+"""Migration script to index foreign keys and status filters used by the repositories."""
+import asyncio
+from sqlalchemy import text
+from database.base import engine
+
+# (index name, table, columns) - mirrored in database/models.py
+INDEXES = [
+    ("idx_verification_codes_user", "verification_codes", "user_id, is_used"),
+    ("idx_services_provider_created", "services", "provider_id, created_at"),
+    ("idx_services_status_created", "services", "status, created_at"),
+    ("idx_services_created", "services", "created_at"),
+    ("idx_service_requests_requester_created", "service_requests", "requester_id, created_at"),
+    ("idx_service_requests_status_created", "service_requests", "status, created_at"),
+    ("idx_service_requests_created", "service_requests", "created_at"),
+    ("idx_contact_requests_provider_status", "contact_requests", "provider_id, status"),
+    ("idx_contact_requests_status", "contact_requests", "status"),
+    ("idx_contact_requests_service", "contact_requests", "service_id"),
+    ("idx_contact_requests_service_request", "contact_requests", "service_request_id"),
+    ("idx_admin_logs_admin_created", "admin_logs", "admin_id, created_at"),
+]
+
+
+async def add_foreign_key_indexes():
+    """Add the missing foreign key and status indexes."""
+    print("\n🔄 إضافة فهارس المفاتيح الأجنبية والحالات...")
+    
+    async with engine.begin() as conn:
+        try:
+            for name, table, columns in INDEXES:
+                await conn.execute(text(f"""
+                    CREATE INDEX IF NOT EXISTS {name}
+                    ON {table}({columns})
+                """))
+                print(f"✅ فهرس {name} جاهز")
+            
+            # Fresh statistics so the planner uses the new indexes right away
+            for table in sorted({table for _, table, _ in INDEXES}):
+                await conn.execute(text(f"ANALYZE {table}"))
+            print("✅ تم تحديث إحصائيات الجداول")
+                
+        except Exception as e:
+            print(f"❌ خطأ في إضافة الفهارس: {e}")
+            raise
+
+
+async def main():
+    """Run migration."""
+    print("=" * 60)
+    print("🚀 بدء migration لفهارس المفاتيح الأجنبية والحالات")
+    print("=" * 60)
+    
+    try:
+        await add_foreign_key_indexes()
+        print("\n✅ تم إكمال migration بنجاح!")
+    except Exception as e:
+        print(f"\n❌ حدث خطأ أثناء migration: {e}")
+        raise
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
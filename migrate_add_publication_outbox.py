@@ -0,0 +1,63 @@
+"""Migration script to add the channel publication outbox."""
+import asyncio
+from sqlalchemy import text
+from database.base import engine
+
+
+async def add_publication_outbox():
+    """Create the publication_outbox table and its indexes."""
+    print("\n🔄 إنشاء جدول النشر في القنوات...")
+    
+    async with engine.begin() as conn:
+        try:
+            await conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS publication_outbox (
+                    id SERIAL PRIMARY KEY,
+                    item_type VARCHAR(20) NOT NULL,
+                    item_id INTEGER NOT NULL,
+                    channel_message_id INTEGER,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    next_attempt_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+                    published_at TIMESTAMP WITH TIME ZONE,
+                    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+                )
+            """))
+            print("✅ جدول publication_outbox جاهز")
+            
+            await conn.execute(text("""
+                CREATE UNIQUE INDEX IF NOT EXISTS uq_publication_outbox_item
+                ON publication_outbox(item_type, item_id)
+            """))
+            print("✅ فهرس uq_publication_outbox_item جاهز")
+            
+            await conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_publication_outbox_due
+                ON publication_outbox(next_attempt_at)
+                WHERE published_at IS NULL
+            """))
+            print("✅ فهرس idx_publication_outbox_due جاهز")
+                
+        except Exception as e:
+            print(f"❌ خطأ في إنشاء جدول النشر: {e}")
+            raise
+
+
+async def main():
+    """Run migration."""
+    print("=" * 60)
+    print("🚀 بدء migration لجدول النشر في القنوات")
+    print("=" * 60)
+    
+    try:
+        await add_publication_outbox()
+        print("\n✅ تم إكمال migration بنجاح!")
+    except Exception as e:
+        print(f"\n❌ حدث خطأ أثناء migration: {e}")
+        raise
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
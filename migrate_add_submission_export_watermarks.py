@@ -0,0 +1,67 @@
+"""Migration script to create submission_export_watermarks table."""
+import asyncio
+from sqlalchemy import text
+from database.base import engine
+
+
+async def create_submission_export_watermarks_table():
+    """Create submission_export_watermarks table and the incremental export index."""
+    print("\n🔄 إنشاء جدول آخر تنزيل لحلول الطلاب (submission_export_watermarks)...")
+    
+    async with engine.begin() as conn:
+        try:
+            await conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS submission_export_watermarks (
+                    id SERIAL PRIMARY KEY,
+                    teacher_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+                    subject_id INTEGER NOT NULL REFERENCES subjects(id) ON DELETE CASCADE,
+                    exported_until TIMESTAMPTZ NOT NULL,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                )
+            """))
+            print("✅ جدول submission_export_watermarks جاهز")
+            
+            # Submissions that failed to export are retried by id, so they do not hold the watermark back
+            await conn.execute(text("""
+                ALTER TABLE submission_export_watermarks
+                ADD COLUMN IF NOT EXISTS failed_submission_ids JSON NOT NULL DEFAULT '[]'
+            """))
+            print("✅ عمود failed_submission_ids جاهز")
+            
+            await conn.execute(text("""
+                CREATE UNIQUE INDEX IF NOT EXISTS uq_submission_export_watermarks_teacher_subject
+                ON submission_export_watermarks(teacher_id, subject_id)
+            """))
+            print("✅ فهرس uq_submission_export_watermarks_teacher_subject جاهز")
+            
+            # Incremental exports read a teacher's submissions changed after the watermark
+            await conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_assignment_submissions_assignment_updated
+                ON assignment_submissions(assignment_id, updated_at)
+            """))
+            print("✅ فهرس idx_assignment_submissions_assignment_updated جاهز")
+            
+        except Exception as e:
+            print(f"❌ حدث خطأ أثناء إنشاء الجدول: {e}")
+            raise
+
+
+async def main():
+    """Run migration."""
+    print("=" * 60)
+    print("🚀 بدء migration لتتبع تنزيل حلول الطلاب")
+    print("=" * 60)
+    
+    try:
+        await create_submission_export_watermarks_table()
+        print("\n✅ تم إكمال migration بنجاح!")
+    except Exception as e:
+        print(f"\n❌ حدث خطأ أثناء migration: {e}")
+        raise
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
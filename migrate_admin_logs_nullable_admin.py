@@ -0,0 +1,41 @@
+"""Migration script to allow admin log entries without an admin user (dashboard configured login)."""
+import asyncio
+from sqlalchemy import text
+from database.base import engine
+
+
+async def make_admin_id_nullable():
+    """Drop the NOT NULL constraint of admin_logs.admin_id."""
+    print("\n🔄 تحديث جدول admin_logs...")
+    
+    async with engine.begin() as conn:
+        try:
+            await conn.execute(text("""
+                ALTER TABLE admin_logs
+                ALTER COLUMN admin_id DROP NOT NULL
+            """))
+            print("✅ أصبح عمود admin_id اختيارياً")
+                
+        except Exception as e:
+            print(f"❌ خطأ في تحديث جدول admin_logs: {e}")
+            raise
+
+
+async def main():
+    """Run migration."""
+    print("=" * 60)
+    print("🚀 بدء migration لسجل عمليات المشرفين")
+    print("=" * 60)
+    
+    try:
+        await make_admin_id_nullable()
+        print("\n✅ تم إكمال migration بنجاح!")
+    except Exception as e:
+        print(f"\n❌ حدث خطأ أثناء migration: {e}")
+        raise
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
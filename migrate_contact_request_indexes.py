@@ -0,0 +1,76 @@
+"""Migration script to index contact request duplicate checks."""
+import asyncio
+from sqlalchemy import text
+from database.base import engine
+
+
+async def add_contact_request_indexes():
+    """Add composite indexes and pending-request unique indexes to contact_requests."""
+    print("\n🔄 إضافة فهارس طلبات التواصل...")
+    
+    async with engine.begin() as conn:
+        try:
+            await conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_contact_requests_requester_service
+                ON contact_requests(requester_id, service_id)
+            """))
+            await conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_contact_requests_provider_service_request
+                ON contact_requests(provider_id, service_request_id)
+            """))
+            print("✅ فهارس البحث عن الطلبات المكررة جاهزة")
+            
+            # Keep only the oldest of duplicate pending requests before adding the unique indexes
+            result = await conn.execute(text("""
+                DELETE FROM contact_requests c
+                USING contact_requests older
+                WHERE c.status = 'PENDING'
+                  AND older.status = 'PENDING'
+                  AND older.id < c.id
+                  AND (
+                      (c.service_id IS NOT NULL
+                       AND older.requester_id = c.requester_id
+                       AND older.service_id = c.service_id)
+                      OR
+                      (c.service_request_id IS NOT NULL
+                       AND older.provider_id = c.provider_id
+                       AND older.service_request_id = c.service_request_id)
+                  )
+            """))
+            print(f"🧹 تم حذف {result.rowcount} طلب تواصل مكرر قيد الانتظار")
+            
+            await conn.execute(text("""
+                CREATE UNIQUE INDEX IF NOT EXISTS uq_contact_requests_pending_service
+                ON contact_requests(requester_id, service_id)
+                WHERE status = 'PENDING' AND service_id IS NOT NULL
+            """))
+            await conn.execute(text("""
+                CREATE UNIQUE INDEX IF NOT EXISTS uq_contact_requests_pending_offer
+                ON contact_requests(provider_id, service_request_id)
+                WHERE status = 'PENDING' AND service_request_id IS NOT NULL
+            """))
+            print("✅ فهارس منع تكرار الطلبات قيد الانتظار جاهزة")
+            
+        except Exception as e:
+            print(f"❌ خطأ في إضافة فهارس طلبات التواصل: {e}")
+            raise
+
+
+async def main():
+    """Run migration."""
+    print("=" * 60)
+    print("🚀 بدء migration لفهارس طلبات التواصل")
+    print("=" * 60)
+    
+    try:
+        await add_contact_request_indexes()
+        print("\n✅ تم إكمال migration بنجاح!")
+    except Exception as e:
+        print(f"\n❌ حدث خطأ أثناء migration: {e}")
+        raise
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,51 @@
+"""Migration script to make assignment submissions unique per student and assignment."""
+import asyncio
+from sqlalchemy import text
+from database.base import engine
+
+
+async def add_unique_submissions():
+    """Remove duplicate submissions and add the (student_id, assignment_id) unique index."""
+    print("\n🔄 إزالة الحلول المكررة وإضافة قيد التفرد...")
+    
+    async with engine.begin() as conn:
+        try:
+            # Keep only the most recent submission of each student per assignment
+            result = await conn.execute(text("""
+                DELETE FROM assignment_submissions s
+                USING assignment_submissions newer
+                WHERE s.student_id = newer.student_id
+                  AND s.assignment_id = newer.assignment_id
+                  AND (s.updated_at, s.id) < (newer.updated_at, newer.id)
+            """))
+            print(f"✅ تم حذف {result.rowcount} حل مكرر")
+            
+            await conn.execute(text("""
+                CREATE UNIQUE INDEX IF NOT EXISTS uq_assignment_submissions_student_assignment
+                ON assignment_submissions(student_id, assignment_id)
+            """))
+            print("✅ فهرس uq_assignment_submissions_student_assignment جاهز")
+            
+        except Exception as e:
+            print(f"❌ خطأ في إضافة قيد التفرد: {e}")
+            raise
+
+
+async def main():
+    """Run migration."""
+    print("=" * 60)
+    print("🚀 بدء migration لتفرد حلول الوظائف")
+    print("=" * 60)
+    
+    try:
+        await add_unique_submissions()
+        print("\n✅ تم إكمال migration بنجاح!")
+    except Exception as e:
+        print(f"\n❌ حدث خطأ أثناء migration: {e}")
+        raise
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,7 +1,7 @@
 """Admin repository."""
-from typing import Optional
+from typing import Optional, List
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, insert
 from database.models import AdminLog, User, Service, ServiceRequest, ContactRequest, ContactRequestStatus
 
 
@@ -30,6 +30,13 @@ class AdminRepository:
         self.session.add(log)
         await self.session.commit()
     
+    async def log_actions(self, entries: List[dict]) -> None:
+        """Log several admin actions with one multi-row insert."""
+        if not entries:
+            return
+        await self.session.execute(insert(AdminLog).values(entries))
+        await self.session.commit()
+    
     async def get_statistics(self) -> dict:
         """Get platform statistics."""
         total_users = await self.session.scalar(select(func.count(User.id)))
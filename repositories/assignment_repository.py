@@ -0,0 +1,206 @@
+"""Assignment repository."""
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, literal_column, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import selectinload
+from config import config
+from database.models import Assignment, AssignmentSubmission, SubmissionExportWatermark, TeacherSubject
+from repositories.ordered_files import (
+    insert_files, count_drafts, publish_drafts, discard_drafts,
+    get_owned_file, count_published, move_file, find_duplicate
+)
+
+
+class AssignmentRepository:
+    """Repository for assignment operations."""
+    
+    def __init__(self, session: AsyncSession):
+        self.session = session
+    
+    async def get_by_subject(self, subject_id: int) -> List[Assignment]:
+        """Get assignments of all active teachers of a subject, ordered by teacher and display order."""
+        result = await self.session.execute(
+            select(Assignment)
+            .join(TeacherSubject, Assignment.teacher_subject_id == TeacherSubject.id)
+            .where(
+                TeacherSubject.subject_id == subject_id,
+                TeacherSubject.is_active == True,
+                Assignment.is_draft == False
+            )
+            .order_by(
+                TeacherSubject.teacher_id,
+                Assignment.teacher_subject_id,
+                Assignment.display_order.asc(),
+                Assignment.id.asc()
+            )
+        )
+        return list(result.scalars().all())
+    
+    async def upsert_submission(
+        self,
+        student_id: int,
+        assignment_id: int,
+        subject_id: int,
+        file_id: str,
+        file_type: str,
+        file_name: Optional[str] = None,
+        file_size: Optional[int] = None
+    ) -> Tuple[int, bool]:
+        """Create or replace a student's submission in one statement; return (id, created)."""
+        statement = insert(AssignmentSubmission).values(
+            student_id=student_id,
+            assignment_id=assignment_id,
+            subject_id=subject_id,
+            file_id=file_id,
+            file_type=file_type,
+            file_name=file_name,
+            file_size=file_size,
+            # Statement time rather than transaction start, closer to the commit the export sees
+            updated_at=func.clock_timestamp()
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[AssignmentSubmission.student_id, AssignmentSubmission.assignment_id],
+            set_={
+                "subject_id": statement.excluded.subject_id,
+                "file_id": statement.excluded.file_id,
+                "file_type": statement.excluded.file_type,
+                "file_name": statement.excluded.file_name,
+                "file_size": statement.excluded.file_size,
+                "updated_at": func.clock_timestamp()
+            }
+        ).returning(
+            AssignmentSubmission.id,
+            # xmax is 0 only for freshly inserted rows
+            literal_column("xmax = 0")
+        )
+        result = await self.session.execute(statement)
+        submission_id, created = result.one()
+        await self.session.commit()
+        return submission_id, created
+    
+    async def get_submissions_for_export(
+        self,
+        teacher_subject_id: int,
+        since: Optional[datetime] = None,
+        retry_ids: Sequence[int] = ()
+    ) -> List[AssignmentSubmission]:
+        """Get submissions to a teacher subject's assignments.
+        
+        With `since`, only those changed after it plus the submissions in
+        `retry_ids` (failed in the previous export) are returned.
+        """
+        query = (
+            select(AssignmentSubmission)
+            .join(Assignment, AssignmentSubmission.assignment_id == Assignment.id)
+            .where(Assignment.teacher_subject_id == teacher_subject_id)
+            .options(selectinload(AssignmentSubmission.student))
+            .order_by(AssignmentSubmission.updated_at.asc(), AssignmentSubmission.id.asc())
+        )
+        if since is not None:
+            changed = AssignmentSubmission.updated_at > since
+            if retry_ids:
+                changed = or_(changed, AssignmentSubmission.id.in_(retry_ids))
+            query = query.where(changed)
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+    
+    async def get_export_watermark(self, teacher_id: int, subject_id: int) -> Tuple[Optional[datetime], List[int]]:
+        """Get the time up to which a teacher has exported a subject's submissions, and the ids that failed."""
+        result = await self.session.execute(
+            select(SubmissionExportWatermark.exported_until, SubmissionExportWatermark.failed_submission_ids)
+            .where(
+                SubmissionExportWatermark.teacher_id == teacher_id,
+                SubmissionExportWatermark.subject_id == subject_id
+            )
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None, []
+        return row.exported_until, list(row.failed_submission_ids or [])
+    
+    async def set_export_watermark(
+        self,
+        teacher_id: int,
+        subject_id: int,
+        exported_until: datetime,
+        failed_ids: Sequence[int] = ()
+    ) -> None:
+        """Advance a teacher's export watermark for a subject (never moves it back).
+        
+        The watermark is kept EXPORT_WATERMARK_MARGIN behind the current time.
+        A submission stamped just before the export but committed after it
+        then still counts as new; the newest submissions may be sent twice,
+        but none is skipped. `failed_ids` replaces the list of submissions
+        the next export retries, so a file that keeps failing costs one retry
+        instead of holding the watermark back.
+        """
+        statement = insert(SubmissionExportWatermark).values(
+            teacher_id=teacher_id,
+            subject_id=subject_id,
+            exported_until=func.least(
+                exported_until,
+                func.now() - timedelta(seconds=config.EXPORT_WATERMARK_MARGIN)
+            ),
+            failed_submission_ids=list(failed_ids)
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[SubmissionExportWatermark.teacher_id, SubmissionExportWatermark.subject_id],
+            set_={
+                "exported_until": func.greatest(
+                    SubmissionExportWatermark.exported_until,
+                    statement.excluded.exported_until
+                ),
+                "failed_submission_ids": statement.excluded.failed_submission_ids,
+                "updated_at": func.now()
+            }
+        )
+        await self.session.execute(statement)
+        await self.session.commit()
+    
+    async def bulk_create(self, teacher_subject_id: int, files: List[dict], is_draft: bool = False) -> List[int]:
+        """Append uploaded files to a teacher subject's assignments in one statement."""
+        ids = await insert_files(self.session, Assignment, teacher_subject_id, files, is_draft=is_draft)
+        await self.session.commit()
+        return ids
+    
+    async def find_duplicate(self, teacher_subject_id: int, file_unique_id: str) -> Optional[Assignment]:
+        """Get the assignment of a teacher subject with the same file content, if any."""
+        return await find_duplicate(self.session, Assignment, teacher_subject_id, file_unique_id)
+    
+    async def count_drafts(self, teacher_subject_id: int) -> int:
+        """Count assignments staged during an unfinished upload."""
+        return await count_drafts(self.session, Assignment, teacher_subject_id)
+    
+    async def publish_drafts(self, teacher_subject_id: int) -> int:
+        """Publish the assignments staged during an upload."""
+        count = await publish_drafts(self.session, Assignment, teacher_subject_id)
+        await self.session.commit()
+        return count
+    
+    async def discard_drafts(self, teacher_subject_id: int) -> int:
+        """Delete the assignments staged during a cancelled upload."""
+        count = await discard_drafts(self.session, Assignment, teacher_subject_id)
+        await self.session.commit()
+        return count
+    
+    async def get_owned(self, assignment_id: int, teacher_id: int) -> Optional[Assignment]:
+        """Get a published assignment of one of the teacher's active subjects."""
+        return await get_owned_file(self.session, Assignment, assignment_id, teacher_id)
+    
+    async def count_published(self, teacher_subject_id: int) -> int:
+        """Count the published assignments of a teacher subject."""
+        return await count_published(self.session, Assignment, teacher_subject_id)
+    
+    async def move(
+        self,
+        assignment_id: int,
+        teacher_id: int,
+        position: Optional[int] = None,
+        offset: Optional[int] = None
+    ) -> Optional[Tuple[int, int, int]]:
+        """Move a teacher's assignment to a position (or by an offset); returns (teacher_subject_id, old, new)."""
+        moved = await move_file(self.session, Assignment, assignment_id, teacher_id, position=position, offset=offset)
+        await self.session.commit()
+        return moved
@@ -1,7 +1,8 @@
 """Contact request repository."""
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_, and_
+from sqlalchemy import select, or_, and_, exists, func
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import selectinload
 from database.models import ContactRequest, ContactRequestStatus
 
@@ -19,6 +20,54 @@ class ContactRequestRepository:
         await self.session.refresh(contact_request)
         return contact_request
     
+    async def create_pending(
+        self,
+        requester_id: int,
+        provider_id: int,
+        service_id: Optional[int] = None,
+        service_request_id: Optional[int] = None
+    ) -> Optional[int]:
+        """Create a pending contact request; returns its id, or None if an identical one is already pending."""
+        result = await self.session.execute(
+            insert(ContactRequest)
+            .values(
+                requester_id=requester_id,
+                provider_id=provider_id,
+                service_id=service_id,
+                service_request_id=service_request_id,
+                status=ContactRequestStatus.PENDING
+            )
+            .on_conflict_do_nothing()
+            .returning(ContactRequest.id)
+        )
+        contact_id = result.scalar_one_or_none()
+        await self.session.commit()
+        return contact_id
+    
+    async def get_service_contact_status(self, requester_id: int, service_id: int) -> Optional[ContactRequestStatus]:
+        """Get the status of the latest pending or rejected contact request of a user for a service."""
+        result = await self.session.execute(
+            select(ContactRequest.status)
+            .where(
+                ContactRequest.requester_id == requester_id,
+                ContactRequest.service_id == service_id,
+                ContactRequest.status.in_([ContactRequestStatus.PENDING, ContactRequestStatus.REJECTED])
+            )
+            .order_by(ContactRequest.created_at.desc())
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+    
+    async def has_offer(self, provider_id: int, service_request_id: int) -> bool:
+        """Check whether a user already offered to provide a requested service."""
+        result = await self.session.execute(
+            select(exists().where(
+                ContactRequest.provider_id == provider_id,
+                ContactRequest.service_request_id == service_request_id
+            ))
+        )
+        return bool(result.scalar())
+    
     async def get_by_id(self, contact_id: int) -> Optional[ContactRequest]:
         """Get contact request by ID."""
         result = await self.session.execute(
@@ -53,6 +102,51 @@ class ContactRequestRepository:
         )
         return list(result.scalars().all())
     
+    async def count_by_user(self, user_id: int) -> Tuple[int, int]:
+        """Count a user's contact requests as (sent, received)."""
+        result = await self.session.execute(
+            select(
+                func.count(ContactRequest.id).filter(ContactRequest.requester_id == user_id),
+                func.count(ContactRequest.id).filter(ContactRequest.provider_id == user_id)
+            ).where(
+                or_(
+                    ContactRequest.requester_id == user_id,
+                    ContactRequest.provider_id == user_id
+                )
+            )
+        )
+        sent, received = result.one()
+        return sent, received
+    
+    async def get_sent(self, user_id: int, skip: int = 0, limit: int = 100) -> List[ContactRequest]:
+        """Get contact requests sent by a user, newest first."""
+        result = await self.session.execute(
+            select(ContactRequest)
+            .options(
+                selectinload(ContactRequest.service),
+                selectinload(ContactRequest.service_request)
+            )
+            .where(ContactRequest.requester_id == user_id)
+            .order_by(ContactRequest.created_at.desc())
+            .offset(skip).limit(limit)
+        )
+        return list(result.scalars().all())
+    
+    async def get_received(self, user_id: int, skip: int = 0, limit: int = 100) -> List[ContactRequest]:
+        """Get contact requests received by a user, newest first."""
+        result = await self.session.execute(
+            select(ContactRequest)
+            .options(
+                selectinload(ContactRequest.requester),
+                selectinload(ContactRequest.service),
+                selectinload(ContactRequest.service_request)
+            )
+            .where(ContactRequest.provider_id == user_id)
+            .order_by(ContactRequest.created_at.desc())
+            .offset(skip).limit(limit)
+        )
+        return list(result.scalars().all())
+    
     async def get_pending_for_provider(self, provider_id: int) -> List[ContactRequest]:
         """Get pending contact requests for a provider."""
         result = await self.session.execute(
@@ -0,0 +1,114 @@
+"""Lecture repository."""
+from typing import Optional, List, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from sqlalchemy.sql import Select
+from database.models import Lecture, TeacherSubject, Subject
+from repositories.ordered_files import (
+    insert_files, count_drafts, publish_drafts, discard_drafts,
+    get_owned_file, count_published, move_file, find_duplicate
+)
+
+
+class LectureRepository:
+    """Repository for lecture operations."""
+    
+    def __init__(self, session: AsyncSession):
+        self.session = session
+    
+    def _subject_filter(self, query: Select, subject_id: int) -> Select:
+        """Restrict a lecture query to active teachers of a subject."""
+        return (
+            query
+            .join(TeacherSubject, Lecture.teacher_subject_id == TeacherSubject.id)
+            .where(
+                TeacherSubject.subject_id == subject_id,
+                TeacherSubject.is_active == True,
+                Lecture.is_draft == False
+            )
+        )
+    
+    async def get_by_subject(self, subject_id: int, skip: int = 0, limit: Optional[int] = None) -> List[Lecture]:
+        """Get lectures of all active teachers of a subject, ordered by teacher and display order."""
+        query = (
+            self._subject_filter(select(Lecture), subject_id)
+            .order_by(
+                TeacherSubject.teacher_id,
+                Lecture.teacher_subject_id,
+                Lecture.display_order.asc(),
+                Lecture.id.asc()
+            )
+            .offset(skip)
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+    
+    async def count_by_subject(self, subject_id: int) -> int:
+        """Count lectures of all active teachers of a subject."""
+        result = await self.session.execute(
+            self._subject_filter(select(func.count(Lecture.id)), subject_id)
+        )
+        return result.scalar() or 0
+    
+    async def get_for_specialization(self, lecture_id: int, specialization_id: int) -> Optional[Lecture]:
+        """Get a lecture if it belongs to an active subject of the given specialization."""
+        result = await self.session.execute(
+            select(Lecture)
+            .join(TeacherSubject, Lecture.teacher_subject_id == TeacherSubject.id)
+            .join(Subject, TeacherSubject.subject_id == Subject.id)
+            .where(
+                Lecture.id == lecture_id,
+                Lecture.is_draft == False,
+                TeacherSubject.is_active == True,
+                Subject.specialization_id == specialization_id
+            )
+        )
+        return result.scalar_one_or_none()
+    
+    async def bulk_create(self, teacher_subject_id: int, files: List[dict], is_draft: bool = False) -> List[int]:
+        """Append uploaded files to a teacher subject's lectures in one statement."""
+        ids = await insert_files(self.session, Lecture, teacher_subject_id, files, is_draft=is_draft)
+        await self.session.commit()
+        return ids
+    
+    async def find_duplicate(self, teacher_subject_id: int, file_unique_id: str) -> Optional[Lecture]:
+        """Get the lecture of a teacher subject with the same file content, if any."""
+        return await find_duplicate(self.session, Lecture, teacher_subject_id, file_unique_id)
+    
+    async def count_drafts(self, teacher_subject_id: int) -> int:
+        """Count lectures staged during an unfinished upload."""
+        return await count_drafts(self.session, Lecture, teacher_subject_id)
+    
+    async def publish_drafts(self, teacher_subject_id: int) -> int:
+        """Publish the lectures staged during an upload."""
+        count = await publish_drafts(self.session, Lecture, teacher_subject_id)
+        await self.session.commit()
+        return count
+    
+    async def discard_drafts(self, teacher_subject_id: int) -> int:
+        """Delete the lectures staged during a cancelled upload."""
+        count = await discard_drafts(self.session, Lecture, teacher_subject_id)
+        await self.session.commit()
+        return count
+    
+    async def get_owned(self, lecture_id: int, teacher_id: int) -> Optional[Lecture]:
+        """Get a published lecture of one of the teacher's active subjects."""
+        return await get_owned_file(self.session, Lecture, lecture_id, teacher_id)
+    
+    async def count_published(self, teacher_subject_id: int) -> int:
+        """Count the published lectures of a teacher subject."""
+        return await count_published(self.session, Lecture, teacher_subject_id)
+    
+    async def move(
+        self,
+        lecture_id: int,
+        teacher_id: int,
+        position: Optional[int] = None,
+        offset: Optional[int] = None
+    ) -> Optional[Tuple[int, int, int]]:
+        """Move a teacher's lecture to a position (or by an offset); returns (teacher_subject_id, old, new)."""
+        moved = await move_file(self.session, Lecture, lecture_id, teacher_id, position=position, offset=offset)
+        await self.session.commit()
+        return moved
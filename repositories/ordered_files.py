@@ -0,0 +1,243 @@
+"""Shared queries for ordered course files (lectures, assignments)."""
+from typing import List, Optional, Sequence, Tuple, Type, Union
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text, select, update, delete, func
+from database.models import Lecture, Assignment, TeacherSubject
+
+CourseFile = Union[Lecture, Assignment]
+
+# Second key of the per-teacher-subject advisory lock, one per table
+ORDER_LOCK_KEYS = {
+    "lectures": 1,
+    "assignments": 2,
+}
+
+
+async def lock_order(session: AsyncSession, model: Type[CourseFile], teacher_subject_id: int) -> None:
+    """Serialize display_order changes of a teacher subject until the transaction ends."""
+    await session.execute(
+        text("SELECT pg_advisory_xact_lock(:teacher_subject_id, :table_key)"),
+        {"teacher_subject_id": teacher_subject_id, "table_key": ORDER_LOCK_KEYS[model.__tablename__]}
+    )
+
+
+async def insert_files(
+    session: AsyncSession,
+    model: Type[CourseFile],
+    teacher_subject_id: int,
+    files: Sequence[dict],
+    is_draft: bool = False
+) -> List[int]:
+    """Append files after the teacher subject's last one in a single INSERT ... RETURNING.
+
+    `files` are dicts with file_id, file_unique_id, file_type, file_name and
+    file_size. Files already in the teacher subject (same file_unique_id,
+    draft or published) are skipped by the unique index.
+    Returns the ids of the inserted rows in upload order.
+    Does not commit.
+    """
+    if not files:
+        return []
+
+    await lock_order(session, model, teacher_subject_id)
+    result = await session.execute(
+        text(f"""
+            WITH incoming AS (
+                SELECT *
+                FROM unnest(
+                    CAST(:file_ids AS VARCHAR[]),
+                    CAST(:file_unique_ids AS VARCHAR[]),
+                    CAST(:file_types AS VARCHAR[]),
+                    CAST(:file_names AS VARCHAR[]),
+                    CAST(:file_sizes AS INTEGER[])
+                ) WITH ORDINALITY AS f(file_id, file_unique_id, file_type, file_name, file_size, position)
+            )
+            INSERT INTO {model.__tablename__}
+                (teacher_subject_id, file_id, file_unique_id, file_type, file_name, file_size, display_order, is_draft)
+            SELECT
+                :teacher_subject_id, f.file_id, f.file_unique_id, f.file_type, f.file_name, f.file_size,
+                base.max_order + f.position, :is_draft
+            FROM (
+                SELECT COALESCE(MAX(display_order), 0) AS max_order
+                FROM {model.__tablename__}
+                WHERE teacher_subject_id = :teacher_subject_id
+            ) AS base
+            CROSS JOIN incoming f
+            ORDER BY f.position
+            ON CONFLICT DO NOTHING
+            RETURNING id
+        """),
+        {
+            "teacher_subject_id": teacher_subject_id,
+            "is_draft": is_draft,
+            "file_ids": [file["file_id"] for file in files],
+            "file_unique_ids": [file.get("file_unique_id") for file in files],
+            "file_types": [file["file_type"] for file in files],
+            "file_names": [file.get("file_name") for file in files],
+            "file_sizes": [file.get("file_size") for file in files],
+        }
+    )
+    return sorted(result.scalars().all())
+
+
+async def find_duplicate(
+    session: AsyncSession,
+    model: Type[CourseFile],
+    teacher_subject_id: int,
+    file_unique_id: str
+) -> Optional[CourseFile]:
+    """Get the file of a teacher subject with the same content, if any (draft or published)."""
+    result = await session.execute(
+        select(model).where(
+            model.teacher_subject_id == teacher_subject_id,
+            model.file_unique_id == file_unique_id
+        )
+    )
+    return result.scalar_one_or_none()
+
+
+async def count_drafts(session: AsyncSession, model: Type[CourseFile], teacher_subject_id: int) -> int:
+    """Count files staged for a teacher subject but not published yet."""
+    result = await session.execute(
+        select(func.count(model.id)).where(
+            model.teacher_subject_id == teacher_subject_id,
+            model.is_draft == True
+        )
+    )
+    return result.scalar() or 0
+
+
+async def publish_drafts(session: AsyncSession, model: Type[CourseFile], teacher_subject_id: int) -> int:
+    """Publish all staged files of a teacher subject; returns how many. Does not commit."""
+    result = await session.execute(
+        update(model)
+        .where(
+            model.teacher_subject_id == teacher_subject_id,
+            model.is_draft == True
+        )
+        .values(is_draft=False)
+    )
+    return result.rowcount
+
+
+async def discard_drafts(session: AsyncSession, model: Type[CourseFile], teacher_subject_id: int) -> int:
+    """Delete all staged files of a teacher subject; returns how many. Does not commit."""
+    result = await session.execute(
+        delete(model).where(
+            model.teacher_subject_id == teacher_subject_id,
+            model.is_draft == True
+        )
+    )
+    return result.rowcount
+
+
+async def get_owned_file(
+    session: AsyncSession,
+    model: Type[CourseFile],
+    file_id: int,
+    teacher_id: int
+) -> Optional[CourseFile]:
+    """Get a published file if it belongs to one of the teacher's active subjects."""
+    result = await session.execute(
+        select(model)
+        .join(TeacherSubject, model.teacher_subject_id == TeacherSubject.id)
+        .where(
+            model.id == file_id,
+            model.is_draft == False,
+            TeacherSubject.teacher_id == teacher_id,
+            TeacherSubject.is_active == True
+        )
+    )
+    return result.scalar_one_or_none()
+
+
+async def count_published(session: AsyncSession, model: Type[CourseFile], teacher_subject_id: int) -> int:
+    """Count the published files of a teacher subject."""
+    result = await session.execute(
+        select(func.count(model.id)).where(
+            model.teacher_subject_id == teacher_subject_id,
+            model.is_draft == False
+        )
+    )
+    return result.scalar() or 0
+
+
+async def move_file(
+    session: AsyncSession,
+    model: Type[CourseFile],
+    file_id: int,
+    teacher_id: int,
+    position: Optional[int] = None,
+    offset: Optional[int] = None
+) -> Optional[Tuple[int, int, int]]:
+    """Move a file to a 1-based `position` (or by `offset`) in one statement.
+
+    Ownership is part of the WHERE clause. The published files of the
+    teacher subject are renumbered 1..N with a single UPDATE, shifting the
+    files between the old and the new position. Returns
+    (teacher_subject_id, old position, new position), or None when the file
+    is not one of the teacher's. Holds the teacher subject's order lock, like
+    insert_files, so concurrent moves and uploads see each other's numbering.
+    Does not commit.
+    """
+    teacher_subject_id = await session.scalar(select(model.teacher_subject_id).where(model.id == file_id))
+    if teacher_subject_id is None:
+        return None
+    await lock_order(session, model, teacher_subject_id)
+
+    table = model.__tablename__
+    result = await session.execute(
+        text(f"""
+            WITH target AS (
+                SELECT f.id, f.teacher_subject_id
+                FROM {table} f
+                JOIN teacher_subjects ts ON ts.id = f.teacher_subject_id
+                WHERE f.id = :file_id
+                  AND NOT f.is_draft
+                  AND ts.teacher_id = :teacher_id
+                  AND ts.is_active
+            ),
+            ranked AS (
+                SELECT f.id, ROW_NUMBER() OVER (ORDER BY f.display_order, f.id) AS position
+                FROM {table} f
+                JOIN target t ON f.teacher_subject_id = t.teacher_subject_id
+                WHERE NOT f.is_draft
+            ),
+            moving AS (
+                SELECT
+                    r.position AS old_position,
+                    LEAST(
+                        GREATEST(COALESCE(CAST(:position AS INTEGER), r.position + CAST(:offset AS INTEGER)), 1),
+                        (SELECT COUNT(*) FROM ranked)
+                    ) AS new_position
+                FROM ranked r
+                JOIN target t ON r.id = t.id
+            ),
+            reordered AS (
+                SELECT
+                    r.id,
+                    CASE
+                        WHEN r.position = m.old_position THEN m.new_position
+                        WHEN r.position > m.old_position AND r.position <= m.new_position THEN r.position - 1
+                        WHEN r.position < m.old_position AND r.position >= m.new_position THEN r.position + 1
+                        ELSE r.position
+                    END AS display_order
+                FROM ranked r
+                CROSS JOIN moving m
+            ),
+            updated AS (
+                UPDATE {table} f
+                SET display_order = reordered.display_order
+                FROM reordered
+                WHERE f.id = reordered.id
+                  AND f.display_order <> reordered.display_order
+                RETURNING f.id
+            )
+            SELECT t.teacher_subject_id, m.old_position, m.new_position
+            FROM target t
+            CROSS JOIN moving m
+        """),
+        {"file_id": file_id, "teacher_id": teacher_id, "position": position, "offset": offset or 0}
+    )
+    row = result.first()
+    return tuple(row) if row else None
@@ -0,0 +1,104 @@
+"""Publication outbox repository."""
+from datetime import timedelta
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
+from database.models import PublicationOutbox, Service, ServiceRequest
+from database.notifications import notify
+
+PUBLICATION_CHANNEL = "publication_queued"
+
+ITEM_MODELS = {"service": Service, "request": ServiceRequest}
+
+
+class PublicationRepository:
+    """Repository for the channel publication outbox."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def enqueue(self, item_type: str, item_id: int) -> None:
+        """Queue the channel post of an approved item, committing it with the caller's pending changes."""
+        await self.session.execute(
+            insert(PublicationOutbox)
+            .values(item_type=item_type, item_id=item_id)
+            .on_conflict_do_nothing(index_elements=["item_type", "item_id"])
+        )
+        await notify(self.session, PUBLICATION_CHANNEL)
+        await self.session.commit()
+
+    async def claim(self, limit: int, lease: float) -> List[Row]:
+        """Reserve due posts for `lease` seconds; returns (id, item_type, item_id, attempts) rows."""
+        due = (
+            select(PublicationOutbox.id)
+            .where(
+                PublicationOutbox.published_at.is_(None),
+                PublicationOutbox.next_attempt_at <= func.now()
+            )
+            .order_by(PublicationOutbox.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.session.execute(
+            update(PublicationOutbox)
+            .where(PublicationOutbox.id.in_(due))
+            .values(
+                next_attempt_at=func.now() + timedelta(seconds=lease),
+                attempts=PublicationOutbox.attempts + 1
+            )
+            .returning(
+                PublicationOutbox.id,
+                PublicationOutbox.item_type,
+                PublicationOutbox.item_id,
+                PublicationOutbox.attempts
+            )
+            .execution_options(synchronize_session=False)
+        )
+        rows = list(result.all())
+        await self.session.commit()
+        return rows
+
+    async def complete(self, entry_id: int, channel_message_id: Optional[int]) -> bool:
+        """Record the published post; returns False if the entry was already completed."""
+        result = await self.session.execute(
+            update(PublicationOutbox)
+            .where(PublicationOutbox.id == entry_id, PublicationOutbox.published_at.is_(None))
+            .values(published_at=func.now(), channel_message_id=channel_message_id, last_error=None)
+            .returning(PublicationOutbox.item_type, PublicationOutbox.item_id)
+            .execution_options(synchronize_session=False)
+        )
+        row = result.one_or_none()
+        if row is None:
+            await self.session.rollback()
+            return False
+
+        if channel_message_id is not None:
+            model = ITEM_MODELS[row.item_type]
+            await self.session.execute(
+                update(model)
+                .where(model.id == row.item_id)
+                .values(channel_message_id=channel_message_id)
+                .execution_options(synchronize_session=False)
+            )
+        await self.session.commit()
+        return True
+
+    async def get_published_message_id(self, entry_id: int) -> Optional[int]:
+        """Get the channel message recorded for a completed entry."""
+        result = await self.session.execute(
+            select(PublicationOutbox.channel_message_id)
+            .where(PublicationOutbox.id == entry_id, PublicationOutbox.published_at.isnot(None))
+        )
+        return result.scalar_one_or_none()
+
+    async def reschedule(self, entry_id: int, delay: float, error: str) -> None:
+        """Retry a failed post after `delay` seconds."""
+        await self.session.execute(
+            update(PublicationOutbox)
+            .where(PublicationOutbox.id == entry_id, PublicationOutbox.published_at.is_(None))
+            .values(next_attempt_at=func.now() + timedelta(seconds=delay), last_error=error[:1000])
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.commit()
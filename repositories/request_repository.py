@@ -1,7 +1,7 @@
 """Service request repository."""
 from typing import Optional, List
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func
 from sqlalchemy.orm import selectinload
 from database.models import ServiceRequest, RequestStatus
 
@@ -36,6 +36,13 @@ class ServiceRequestRepository:
         )
         return list(result.scalars().all())
     
+    async def count_by_requester(self, requester_id: int) -> int:
+        """Count requests by requester."""
+        result = await self.session.execute(
+            select(func.count(ServiceRequest.id)).where(ServiceRequest.requester_id == requester_id)
+        )
+        return result.scalar() or 0
+    
     async def get_published_requests(self, skip: int = 0, limit: int = 100) -> List[ServiceRequest]:
         """Get published requests."""
         result = await self.session.execute(
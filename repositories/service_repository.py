@@ -2,7 +2,7 @@
 from typing import Optional, List
 from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
+from sqlalchemy import select, and_, or_, func
 from sqlalchemy.orm import selectinload
 from database.models import Service, ServiceStatus, User
 
@@ -36,6 +36,13 @@ class ServiceRepository:
         )
         return list(result.scalars().all())
     
+    async def count_by_provider(self, provider_id: int) -> int:
+        """Count services by provider."""
+        result = await self.session.execute(
+            select(func.count(Service.id)).where(Service.provider_id == provider_id)
+        )
+        return result.scalar() or 0
+    
     async def get_published_services(
         self, 
         specialization: Optional[str] = None,
@@ -4,6 +4,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
 from sqlalchemy.orm import selectinload
 from database.models import Specialization
+from database.notifications import notify
+
+# Notified whenever specializations or subjects change (see services.reference_cache)
+REFERENCE_DATA_CHANNEL = "reference_data_changed"
 
 
 class SpecializationRepository:
@@ -15,6 +19,7 @@ class SpecializationRepository:
     async def create(self, specialization: Specialization) -> Specialization:
         """Create a new specialization."""
         self.session.add(specialization)
+        await notify(self.session, REFERENCE_DATA_CHANNEL)
         await self.session.commit()
         await self.session.refresh(specialization)
         return specialization
@@ -52,6 +57,7 @@ class SpecializationRepository:
     
     async def update(self, specialization: Specialization) -> Specialization:
         """Update specialization."""
+        await notify(self.session, REFERENCE_DATA_CHANNEL)
         await self.session.commit()
         await self.session.refresh(specialization)
         return specialization
@@ -59,6 +65,7 @@ class SpecializationRepository:
     async def delete(self, specialization: Specialization):
         """Delete specialization."""
         await self.session.delete(specialization)
+        await notify(self.session, REFERENCE_DATA_CHANNEL)
         await self.session.commit()
     
     async def deactivate(self, specialization_id: int) -> bool:
@@ -68,6 +75,7 @@ class SpecializationRepository:
             .where(Specialization.id == specialization_id)
             .values(is_active=False)
         )
+        await notify(self.session, REFERENCE_DATA_CHANNEL)
         await self.session.commit()
         return result.rowcount > 0
     
@@ -78,6 +86,7 @@ class SpecializationRepository:
             .where(Specialization.id == specialization_id)
             .values(is_active=True)
         )
+        await notify(self.session, REFERENCE_DATA_CHANNEL)
         await self.session.commit()
         return result.rowcount > 0
 
@@ -1,9 +1,11 @@
 """Subject repository."""
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, exists, and_
+from sqlalchemy import select, update, exists, and_, func
 from sqlalchemy.orm import selectinload
-from database.models import Subject, Specialization, TeacherSubject
+from database.models import Subject, Specialization, TeacherSubject, Assignment
+from database.notifications import notify
+from repositories.specialization_repository import REFERENCE_DATA_CHANNEL
 
 
 class SubjectRepository:
@@ -15,6 +17,7 @@ class SubjectRepository:
     async def create(self, subject: Subject) -> Subject:
         """Create a new subject."""
         self.session.add(subject)
+        await notify(self.session, REFERENCE_DATA_CHANNEL)
         await self.session.commit()
         await self.session.refresh(subject)
         return subject
@@ -44,6 +47,27 @@ class SubjectRepository:
         result = await self.session.execute(query)
         return list(result.scalars().all())
     
+    async def get_with_assignment_counts(self, specialization_id: int) -> List[Tuple[Subject, int]]:
+        """Get active subjects of a specialization that have assignments, with their assignment counts."""
+        result = await self.session.execute(
+            select(Subject, func.count(Assignment.id))
+            .join(TeacherSubject, and_(
+                TeacherSubject.subject_id == Subject.id,
+                TeacherSubject.is_active == True
+            ))
+            .join(Assignment, and_(
+                Assignment.teacher_subject_id == TeacherSubject.id,
+                Assignment.is_draft == False
+            ))
+            .where(
+                Subject.specialization_id == specialization_id,
+                Subject.is_active == True
+            )
+            .group_by(Subject.id)
+            .order_by(Subject.display_order.asc(), Subject.name.asc())
+        )
+        return [(subject, count) for subject, count in result.all()]
+    
     async def get_all(self, active_only: bool = False) -> List[Subject]:
         """Get all subjects."""
         query = select(Subject).options(selectinload(Subject.specialization))
@@ -55,6 +79,7 @@ class SubjectRepository:
     
     async def update(self, subject: Subject) -> Subject:
         """Update subject."""
+        await notify(self.session, REFERENCE_DATA_CHANNEL)
         await self.session.commit()
         await self.session.refresh(subject)
         return subject
@@ -62,6 +87,7 @@ class SubjectRepository:
     async def delete(self, subject: Subject):
         """Delete subject."""
         await self.session.delete(subject)
+        await notify(self.session, REFERENCE_DATA_CHANNEL)
         await self.session.commit()
     
     async def deactivate(self, subject_id: int) -> bool:
@@ -71,6 +97,7 @@ class SubjectRepository:
             .where(Subject.id == subject_id)
             .values(is_active=False)
         )
+        await notify(self.session, REFERENCE_DATA_CHANNEL)
         await self.session.commit()
         return result.rowcount > 0
     
@@ -81,6 +108,7 @@ class SubjectRepository:
             .where(Subject.id == subject_id)
             .values(is_active=True)
         )
+        await notify(self.session, REFERENCE_DATA_CHANNEL)
         await self.session.commit()
         return result.rowcount > 0
     
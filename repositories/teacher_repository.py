@@ -4,6 +4,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete
 from sqlalchemy.orm import selectinload
 from database.models import User, UserRole, TeacherSpecialization, TeacherSubject, Subject, Specialization
+from database.notifications import notify
+
+# Notified with the teacher id whenever a teacher's subjects change
+TEACHER_SUBJECTS_CHANNEL = "teacher_subjects_changed"
 
 
 class TeacherRepository:
@@ -163,6 +167,7 @@ class TeacherRepository:
             is_active=True
         )
         self.session.add(teacher_subject)
+        await notify(self.session, TEACHER_SUBJECTS_CHANNEL, str(teacher_id))
         await self.session.commit()
         await self.session.refresh(teacher_subject)
         return teacher_subject
@@ -175,6 +180,7 @@ class TeacherRepository:
                 TeacherSubject.subject_id == subject_id
             )
         )
+        await notify(self.session, TEACHER_SUBJECTS_CHANNEL, str(teacher_id))
         await self.session.commit()
         return result.rowcount > 0
     
@@ -187,6 +193,25 @@ class TeacherRepository:
         result = await self.session.execute(query)
         return list(result.scalars().all())
     
+    async def get_teacher_subject_ids(self, teacher_id: int) -> List[int]:
+        """Get the ids of a teacher's active teacher subjects."""
+        result = await self.session.execute(
+            select(TeacherSubject.id).where(
+                TeacherSubject.teacher_id == teacher_id,
+                TeacherSubject.is_active == True
+            )
+        )
+        return list(result.scalars().all())
+    
+    async def get_subject_by_teacher_subject(self, teacher_subject_id: int) -> Optional[Subject]:
+        """Get the subject of a teacher subject."""
+        result = await self.session.execute(
+            select(Subject)
+            .join(TeacherSubject, TeacherSubject.subject_id == Subject.id)
+            .where(TeacherSubject.id == teacher_subject_id)
+        )
+        return result.scalar_one_or_none()
+    
     async def deactivate_teacher_subject(self, teacher_id: int, subject_id: int) -> bool:
         """Deactivate a teacher-subject relationship."""
         from sqlalchemy import update
@@ -198,6 +223,7 @@ class TeacherRepository:
             )
             .values(is_active=False)
         )
+        await notify(self.session, TEACHER_SUBJECTS_CHANNEL, str(teacher_id))
         await self.session.commit()
         return result.rowcount > 0
 
@@ -0,0 +1,131 @@
+"""Buffered admin audit log.
+
+Moderation paths (bot admin callbacks, dashboard endpoints) call
+`audit_log.log(...)`, which only appends the entry to an in-memory buffer,
+so logging adds no database round trip to the admin action. A background
+task writes the buffer with one multi-row insert every
+AUDIT_LOG_FLUSH_INTERVAL seconds, or as soon as AUDIT_LOG_BATCH_SIZE entries
+are waiting. Each entry keeps the time of the action, not of the flush.
+Entries of a failed flush are kept for the next one (up to
+AUDIT_LOG_MAX_PENDING). After AUDIT_LOG_MAX_ATTEMPTS failures in a row the
+batch is written one entry at a time and an entry that still fails is
+dropped with a logged error, so one bad entry cannot block the log.
+`stop` flushes whatever is left on shutdown.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from config import config
+from database.base import AsyncSessionLocal
+from repositories.admin_repository import AdminRepository
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLogWriter:
+    """Buffer admin actions and write them in batches."""
+
+    def __init__(
+        self,
+        flush_interval: float = config.AUDIT_LOG_FLUSH_INTERVAL,
+        batch_size: int = config.AUDIT_LOG_BATCH_SIZE,
+        max_pending: int = config.AUDIT_LOG_MAX_PENDING,
+        max_attempts: int = config.AUDIT_LOG_MAX_ATTEMPTS
+    ):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.pending: List[dict] = []
+        self.failures = 0
+        self.wakeup = asyncio.Event()
+        self.stopping = False
+        self.task: Optional[asyncio.Task] = None
+
+    def log(
+        self,
+        admin_id: Optional[int],
+        action_type: str,
+        target_type: Optional[str] = None,
+        target_id: Optional[int] = None,
+        details: Optional[dict] = None
+    ) -> None:
+        """Queue an admin action; it is written with the next batch."""
+        if len(self.pending) >= self.max_pending:
+            logger.error(f"Audit log buffer full, dropping {action_type} by admin {admin_id}")
+            return
+
+        self.pending.append({
+            "admin_id": admin_id,
+            "action_type": action_type,
+            "target_type": target_type,
+            "target_id": target_id,
+            "details": details,
+            "created_at": datetime.now(timezone.utc),
+        })
+        if len(self.pending) >= self.batch_size:
+            self.wakeup.set()
+
+    async def write(self, entries: List[dict]) -> None:
+        """Insert entries with one multi-row insert."""
+        async with AsyncSessionLocal() as session:
+            await AdminRepository(session).log_actions(entries)
+
+    async def write_one_by_one(self, batch: List[dict]) -> None:
+        """Insert a batch entry by entry, dropping the entries that fail."""
+        for entry in batch:
+            try:
+                await self.write([entry])
+            except Exception as e:
+                logger.error(f"Dropping audit log entry {entry}: {e}")
+
+    async def flush(self) -> None:
+        """Write all queued entries."""
+        while self.pending:
+            batch = self.pending[:self.batch_size]
+            del self.pending[:len(batch)]
+            if self.failures >= self.max_attempts:
+                # The batch keeps failing; find and drop the entries that cannot be written
+                await self.write_one_by_one(batch)
+                self.failures = 0
+                continue
+            try:
+                await self.write(batch)
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Error writing {len(batch)} audit log entries (attempt {self.failures}): {e}")
+                # Keep them for the next flush
+                self.pending[:0] = batch[:max(self.max_pending - len(self.pending), 0)]
+                return
+            self.failures = 0
+
+    async def run(self) -> None:
+        """Flush on the interval or when a batch is full, until stopped."""
+        while not self.stopping:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            await self.flush()
+
+    async def start(self) -> None:
+        """Start flushing in the background."""
+        if self.task is None or self.task.done():
+            self.stopping = False
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop the background task and write the remaining entries."""
+        if self.task is not None:
+            # Let a flush in progress finish instead of cancelling it
+            self.stopping = True
+            self.wakeup.set()
+            await self.task
+            self.task = None
+        await self.flush()
+
+
+audit_log = AuditLogWriter()
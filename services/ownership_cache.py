@@ -0,0 +1,65 @@
+"""Per-process cache of the teacher subjects each teacher owns.
+
+Teacher panel callbacks only need to know whether a teacher_subject_id
+belongs to the teacher, so the active ids are cached per teacher and the
+check is a set lookup. TeacherRepository sends a notification whenever a
+teacher's subjects change (dashboard, registration), which drops that
+teacher's entry in every process; entries also expire after a TTL.
+"""
+import time
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import config
+from database.notifications import listener
+from repositories.teacher_repository import TeacherRepository, TEACHER_SUBJECTS_CHANNEL
+
+
+class TeacherOwnershipCache:
+    """Cache of active teacher_subject ids per teacher."""
+
+    def __init__(self, ttl: float = config.OWNERSHIP_CACHE_TTL, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries: Dict[int, Tuple[float, FrozenSet[int]]] = {}
+
+    def get(self, teacher_id: int) -> Optional[FrozenSet[int]]:
+        """Get the cached ids of a teacher, if still fresh."""
+        entry = self.entries.get(teacher_id)
+        if entry is None:
+            return None
+        expires_at, ids = entry
+        if expires_at < time.monotonic():
+            del self.entries[teacher_id]
+            return None
+        return ids
+
+    def set(self, teacher_id: int, ids: FrozenSet[int]) -> None:
+        """Cache the ids of a teacher."""
+        if len(self.entries) >= self.max_size:
+            self.entries.clear()
+        self.entries[teacher_id] = (time.monotonic() + self.ttl, ids)
+
+    def invalidate(self, payload: Optional[str] = None) -> None:
+        """Drop one teacher (payload is the teacher id) or everything (None/empty)."""
+        if payload:
+            self.entries.pop(int(payload), None)
+        else:
+            self.entries.clear()
+
+    async def get_owned(self, session: AsyncSession, teacher_id: int) -> FrozenSet[int]:
+        """Get the active teacher_subject ids of a teacher, loading them on a miss."""
+        ids = self.get(teacher_id)
+        if ids is None:
+            ids = frozenset(await TeacherRepository(session).get_teacher_subject_ids(teacher_id))
+            self.set(teacher_id, ids)
+        return ids
+
+    async def owns(self, session: AsyncSession, teacher_id: int, teacher_subject_id: int) -> bool:
+        """Check whether a teacher_subject belongs to the teacher."""
+        return teacher_subject_id in await self.get_owned(session, teacher_id)
+
+
+ownership_cache = TeacherOwnershipCache()
+listener.subscribe(TEACHER_SUBJECTS_CHANNEL, ownership_cache.invalidate)
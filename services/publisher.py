@@ -0,0 +1,214 @@
+"""Channel publisher for approved services and requests.
+
+Approving an item only sets its status and writes a publication_outbox row
+in the same transaction (PublicationRepository.enqueue), so the admin's
+button returns immediately. Every bot process runs a ChannelPublisher that
+wakes up on the outbox notification (or every PUBLICATION_POLL_INTERVAL
+seconds), claims due rows with SKIP LOCKED and a lease, posts them to
+SERVICES_CHANNEL_ID / REQUESTS_CHANNEL_ID and records the channel message id.
+Failed posts are retried with exponential backoff. If a lease expired while
+a slow post was being sent and the row was published twice, the copy whose
+completion loses is deleted from the channel, so each item keeps one post.
+A post whose completion fails (database error after the send) is deleted
+too, unless the completion turns out to be committed, before the retry.
+"""
+import asyncio
+import logging
+from typing import Optional, Sequence, cast
+
+from aiogram import Bot
+from aiogram.types import Message
+
+from config import config
+from database.base import AsyncSessionLocal
+from database.models import Service, ServiceRequest, ServiceStatus, RequestStatus
+from database.notifications import listener
+from repositories.publication_repository import PublicationRepository, PUBLICATION_CHANNEL
+from repositories.service_repository import ServiceRepository
+from repositories.request_repository import ServiceRequestRepository
+from services.service_service import ServiceService
+from services.request_service import RequestService
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_DELAY = 10
+
+
+async def send_service_post(bot: Bot, service: Service, price_text: str) -> Message:
+    """Post an approved service to the services channel."""
+    from handlers.keyboards import get_service_contact_keyboard
+
+    service_text = f"🎯 {service.title}\n\n"
+    service_text += f"📝 {service.description}\n\n"
+    service_text += f"💰 السعر: {price_text}\n"
+    service_text += f"🎓 التخصص: {service.specialization}\n"
+    service_text += "✅ طالب معتمد"
+
+    keyboard = get_service_contact_keyboard(int(service.id))  # type: ignore[arg-type]
+
+    if service.media_file_id:
+        media_id = str(service.media_file_id)  # type: ignore[arg-type]
+        if str(service.media_type) == "photo":
+            return await bot.send_photo(config.SERVICES_CHANNEL_ID, media_id, caption=service_text, reply_markup=keyboard)
+        # video
+        return await bot.send_video(config.SERVICES_CHANNEL_ID, media_id, caption=service_text, reply_markup=keyboard)
+    return await bot.send_message(config.SERVICES_CHANNEL_ID, service_text, reply_markup=keyboard)
+
+
+async def send_request_post(bot: Bot, request: ServiceRequest, budget_text: str) -> Message:
+    """Post an approved request to the requests channel."""
+    from handlers.keyboards import get_request_offer_keyboard
+
+    allowed_specs = cast(Sequence[str] | None, request.allowed_specializations)
+    specs_str = ", ".join(allowed_specs) if allowed_specs else "غير محددة"
+
+    request_text = "📋 طلب خدمة\n\n"
+    request_text += f"📌 {request.title}\n\n"
+    request_text += f"📝 {request.description}\n\n"
+    request_text += f"🎓 التخصصات المطلوبة: {specs_str}\n"
+    if request.preferred_gender:
+        gender_names = {"male": "ذكر", "female": "أنثى"}
+        gender_text = gender_names.get(str(request.preferred_gender), str(request.preferred_gender))
+        request_text += f"⚧️ الجنس المفضل: {gender_text}\n"
+    request_text += f"💰 الميزانية: {budget_text}"
+
+    keyboard = get_request_offer_keyboard(int(request.id))  # type: ignore[arg-type]
+    return await bot.send_message(config.REQUESTS_CHANNEL_ID, request_text, reply_markup=keyboard)
+
+
+class ChannelPublisher:
+    """Publish queued channel posts in the background."""
+
+    def __init__(
+        self,
+        poll_interval: float = config.PUBLICATION_POLL_INTERVAL,
+        batch_size: int = config.PUBLICATION_BATCH_SIZE,
+        lease: float = config.PUBLICATION_LEASE,
+        retry_max_delay: float = config.PUBLICATION_RETRY_MAX_DELAY
+    ):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.lease = lease
+        self.retry_max_delay = retry_max_delay
+        self.wakeup = asyncio.Event()
+        self.stopping = False
+        self.task: Optional[asyncio.Task] = None
+
+    def wake(self, payload: Optional[str] = None) -> None:
+        """Check the outbox now (a post was queued, or the listener reconnected)."""
+        self.wakeup.set()
+
+    def retry_delay(self, attempts: int) -> float:
+        """Exponential backoff for the next attempt."""
+        return min(RETRY_BASE_DELAY * 2 ** (attempts - 1), self.retry_max_delay)
+
+    async def was_recorded(self, entry_id: int, message_id: int) -> bool:
+        """Check, after a failed completion, whether it was committed anyway."""
+        try:
+            async with AsyncSessionLocal() as session:
+                return await PublicationRepository(session).get_published_message_id(entry_id) == message_id
+        except Exception as e:
+            logger.error(f"Error checking publication {entry_id}: {e}")
+            return False
+
+    async def delete_post(self, bot: Bot, channel_id: int, message_id: int) -> None:
+        """Remove a channel post that is not recorded for its item."""
+        try:
+            await bot.delete_message(channel_id, message_id)
+        except Exception as e:
+            logger.error(f"Error deleting duplicate channel post {message_id}: {e}")
+
+    async def publish(self, bot: Bot, entry_id: int, item_type: str, item_id: int) -> None:
+        """Post one item and record its channel message id."""
+        async with AsyncSessionLocal() as session:
+            if item_type == "service":
+                service = await ServiceRepository(session).get_by_id(item_id)
+                if service is None or cast(ServiceStatus, service.status) != ServiceStatus.PUBLISHED:
+                    # Removed or unpublished before its turn: nothing to post
+                    await PublicationRepository(session).complete(entry_id, None)
+                    return
+                channel_id = config.SERVICES_CHANNEL_ID
+                sent_message = await send_service_post(bot, service, ServiceService(session).format_price(service))
+                owner_chat_id = service.provider.telegram_id
+                notice = f"✅ تم قبول وموافقة خدمتك '{service.title}' وتم نشرها في القناة!"
+            else:
+                request = await ServiceRequestRepository(session).get_by_id(item_id)
+                if request is None or cast(RequestStatus, request.status) != RequestStatus.PUBLISHED:
+                    await PublicationRepository(session).complete(entry_id, None)
+                    return
+                channel_id = config.REQUESTS_CHANNEL_ID
+                sent_message = await send_request_post(bot, request, RequestService(session).format_budget(request))
+                owner_chat_id = request.requester.telegram_id
+                notice = f"✅ تم قبول طلبك '{request.title}' وتم نشره في القناة!"
+
+            try:
+                completed = await PublicationRepository(session).complete(entry_id, sent_message.message_id)
+            except Exception:
+                if not await self.was_recorded(entry_id, sent_message.message_id):
+                    # The retry posts it again; this copy must not stay in the channel
+                    await self.delete_post(bot, channel_id, sent_message.message_id)
+                raise
+
+            if not completed:
+                # Another process published it first
+                await self.delete_post(bot, channel_id, sent_message.message_id)
+                return
+
+        try:
+            await bot.send_message(owner_chat_id, notice)
+        except Exception:
+            pass
+
+    async def process_due(self, bot: Bot) -> int:
+        """Publish one batch of due posts; returns how many were claimed."""
+        async with AsyncSessionLocal() as session:
+            entries = await PublicationRepository(session).claim(self.batch_size, self.lease)
+
+        for entry in entries:
+            if self.stopping:
+                # Unsent claims are picked up again when their lease expires
+                break
+            try:
+                await self.publish(bot, entry.id, entry.item_type, entry.item_id)
+            except Exception as e:
+                delay = self.retry_delay(entry.attempts)
+                logger.error(f"Error publishing {entry.item_type} {entry.item_id} (attempt {entry.attempts}), retrying in {delay}s: {e}")
+                try:
+                    async with AsyncSessionLocal() as session:
+                        await PublicationRepository(session).reschedule(entry.id, delay, str(e))
+                except Exception as reschedule_error:
+                    # The lease expires and the post is claimed again
+                    logger.error(f"Error rescheduling publication {entry.id}: {reschedule_error}")
+        return len(entries)
+
+    async def run(self, bot: Bot) -> None:
+        """Publish until stopped."""
+        while not self.stopping:
+            self.wakeup.clear()
+            try:
+                if await self.process_due(bot) >= self.batch_size:
+                    continue
+            except Exception as e:
+                logger.error(f"Channel publisher error: {e}")
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self, bot: Bot) -> None:
+        """Start publishing in the background."""
+        if self.task is None or self.task.done():
+            self.stopping = False
+            self.task = asyncio.create_task(self.run(bot))
+
+    async def stop(self) -> None:
+        """Stop publishing after the post being sent, so it is not sent again."""
+        if self.task is not None:
+            self.stopping = True
+            self.wakeup.set()
+            await self.task
+            self.task = None
+
+
+publisher = ChannelPublisher()
+listener.subscribe(PUBLICATION_CHANNEL, publisher.wake)
@@ -0,0 +1,44 @@
+"""Rate limiting primitives."""
+import time
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate` tokens per second."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        """Add the tokens earned since the last update."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self, now: float) -> bool:
+        """Check for a token without taking it."""
+        self.refill(now)
+        return self.tokens >= 1
+
+    def consume(self, now: float) -> bool:
+        """Take one token if available."""
+        self.refill(now)
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def is_full(self, now: float) -> bool:
+        """Check whether the bucket has fully refilled (safe to forget)."""
+        self.refill(now)
+        return self.tokens >= self.capacity
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until one token is available."""
+        self.refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
@@ -0,0 +1,103 @@
+"""Per-process cache of reference data (specializations and subjects).
+
+Both tables change only when an admin edits them in the dashboard, yet they
+are read on nearly every registration, profile, request and e-learning step.
+The whole set is loaded once (at startup) with a dedicated session and the
+handlers read the detached rows from memory. SpecializationRepository and
+SubjectRepository send a notification on every change; each process then
+bumps its version and reloads on the next read. A load that overlaps an
+invalidation is discarded, so stale rows are never stored under a new version.
+"""
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from database.base import AsyncSessionLocal
+from database.models import Specialization, Subject
+from database.notifications import listener
+from repositories.specialization_repository import SpecializationRepository, REFERENCE_DATA_CHANNEL
+from repositories.subject_repository import SubjectRepository
+
+logger = logging.getLogger(__name__)
+
+
+class ReferenceDataCache:
+    """Specializations and subjects, reloaded when the dashboard changes them."""
+
+    def __init__(self):
+        self.version = 0
+        self.loaded_version: Optional[int] = None
+        self.lock = asyncio.Lock()
+        self.specializations: List[Specialization] = []
+        self.specializations_by_id: Dict[int, Specialization] = {}
+        self.subjects_by_id: Dict[int, Subject] = {}
+        self.subjects_by_specialization: Dict[int, List[Subject]] = {}
+
+    def invalidate(self, payload: Optional[str] = None) -> None:
+        """Mark the cached data as stale."""
+        self.version += 1
+
+    async def load(self) -> None:
+        """Load all specializations and subjects (including inactive ones)."""
+        version = self.version
+        async with AsyncSessionLocal() as session:
+            specializations = await SpecializationRepository(session).get_all()
+            subjects = await SubjectRepository(session).get_all()
+
+        if version != self.version:
+            # Changed while loading; the next read loads again
+            return
+
+        subjects_by_specialization: Dict[int, List[Subject]] = {}
+        for subject in subjects:
+            subjects_by_specialization.setdefault(subject.specialization_id, []).append(subject)
+
+        self.specializations = specializations
+        self.specializations_by_id = {spec.id: spec for spec in specializations}
+        self.subjects_by_id = {subject.id: subject for subject in subjects}
+        self.subjects_by_specialization = subjects_by_specialization
+        self.loaded_version = version
+
+    async def ensure_loaded(self) -> None:
+        """Load the data if it is missing or stale."""
+        if self.loaded_version == self.version:
+            return
+        async with self.lock:
+            if self.loaded_version != self.version:
+                await self.load()
+
+    async def preload(self) -> None:
+        """Load the data at startup; failures are retried on first use."""
+        try:
+            await self.ensure_loaded()
+        except Exception as e:
+            logger.error(f"Error preloading reference data: {e}")
+
+    async def get_specializations(self, active_only: bool = True) -> List[Specialization]:
+        """Get specializations ordered by display_order."""
+        await self.ensure_loaded()
+        if active_only:
+            return [spec for spec in self.specializations if spec.is_active]
+        return list(self.specializations)
+
+    async def get_specialization(self, specialization_id: int) -> Optional[Specialization]:
+        """Get a specialization by ID (active or not)."""
+        await self.ensure_loaded()
+        return self.specializations_by_id.get(specialization_id)
+
+    async def get_subjects(self, specialization_id: int, active_only: bool = True) -> List[Subject]:
+        """Get the subjects of a specialization ordered by display_order."""
+        await self.ensure_loaded()
+        subjects = self.subjects_by_specialization.get(specialization_id, [])
+        if active_only:
+            return [subject for subject in subjects if subject.is_active]
+        return list(subjects)
+
+    async def get_subject(self, subject_id: int) -> Optional[Subject]:
+        """Get a subject by ID (active or not), with its specialization loaded."""
+        await self.ensure_loaded()
+        return self.subjects_by_id.get(subject_id)
+
+
+reference_cache = ReferenceDataCache()
+listener.subscribe(REFERENCE_DATA_CHANNEL, reference_cache.invalidate)
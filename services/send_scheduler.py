@@ -0,0 +1,184 @@
+"""Outbound Telegram send scheduler.
+
+Every Bot API call goes through SendSchedulerMiddleware (registered on the
+bot session). Calls that post messages to a chat wait for a slot from
+SendScheduler, which enforces a global budget and per-chat budgets (stricter
+for groups and channels) and serves interactive replies before bulk
+deliveries. Flood-control errors (RetryAfter) pause the affected chat and
+the call is retried.
+"""
+import asyncio
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple, Union
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+
+from config import config
+from services.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 10
+
+send_priority: ContextVar[int] = ContextVar("send_priority", default=PRIORITY_INTERACTIVE)
+
+ChatId = Union[int, str]
+
+# Non "Send*" methods that post messages and count against chat limits
+MESSAGE_METHODS = frozenset({"CopyMessage", "CopyMessages", "ForwardMessage", "ForwardMessages"})
+
+
+@contextmanager
+def bulk_delivery():
+    """Send everything inside the block with bulk (lowest) priority."""
+    token = send_priority.set(PRIORITY_BULK)
+    try:
+        yield
+    finally:
+        send_priority.reset(token)
+
+
+def is_message_method(method) -> bool:
+    """Check whether a Bot API method posts a message to a chat."""
+    name = type(method).__name__
+    return (name.startswith("Send") and name != "SendChatAction") or name in MESSAGE_METHODS
+
+
+def is_group_chat(chat_id: ChatId) -> bool:
+    """Groups, supergroups and channels have negative ids or @usernames."""
+    return isinstance(chat_id, str) or chat_id < 0
+
+
+class SendScheduler:
+    """Grant message slots by priority within global and per-chat budgets."""
+
+    SWEEP_THRESHOLD = 10000
+
+    def __init__(
+        self,
+        global_rate: float = config.SEND_GLOBAL_RATE,
+        chat_rate: float = config.SEND_CHAT_RATE,
+        chat_burst: int = config.SEND_CHAT_BURST,
+        group_rate: float = config.SEND_GROUP_RATE,
+        group_burst: int = config.SEND_GROUP_BURST
+    ):
+        self.global_bucket = TokenBucket(global_rate, max(int(global_rate), 1))
+        self.chat_limits = (chat_rate, chat_burst)
+        self.group_limits = (group_rate, group_burst)
+        self.chat_buckets: Dict[ChatId, TokenBucket] = {}
+        self.blocked_until: Dict[ChatId, float] = {}
+        self.queue: List[Tuple[int, int, ChatId, asyncio.Future]] = []
+        self.counter = itertools.count()
+        self.wakeup = asyncio.Event()
+        self.worker: Optional[asyncio.Task] = None
+
+    async def acquire(self, chat_id: ChatId, priority: int = PRIORITY_INTERACTIVE) -> None:
+        """Wait until a message may be sent to the chat."""
+        future = asyncio.get_running_loop().create_future()
+        self.queue.append((priority, next(self.counter), chat_id, future))
+
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.create_task(self.run())
+        self.wakeup.set()
+
+        await future
+
+    def backoff(self, chat_id: ChatId, retry_after: float) -> None:
+        """Pause a chat after Telegram's flood control."""
+        self.blocked_until[chat_id] = time.monotonic() + retry_after
+
+    def get_chat_bucket(self, chat_id: ChatId) -> TokenBucket:
+        """Get or create the budget of a chat."""
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self.chat_buckets) >= self.SWEEP_THRESHOLD:
+                self.sweep()
+            rate, burst = self.group_limits if is_group_chat(chat_id) else self.chat_limits
+            bucket = self.chat_buckets[chat_id] = TokenBucket(rate, burst)
+        return bucket
+
+    def sweep(self) -> None:
+        """Forget chat budgets that have fully refilled."""
+        now = time.monotonic()
+        for chat_id in [chat_id for chat_id, bucket in self.chat_buckets.items() if bucket.is_full(now)]:
+            del self.chat_buckets[chat_id]
+
+    def chat_wait(self, chat_id: ChatId, now: float) -> float:
+        """Seconds until the chat may receive a message."""
+        blocked = self.blocked_until.get(chat_id)
+        if blocked is not None:
+            if blocked > now:
+                return blocked - now
+            del self.blocked_until[chat_id]
+        return self.get_chat_bucket(chat_id).wait_time(now)
+
+    def grant(self, now: float) -> float:
+        """Release the best ready request; return how long to wait otherwise."""
+        earliest = None
+        for entry in sorted(self.queue):
+            _, _, chat_id, future = entry
+            if future.done():
+                # Caller was cancelled while waiting
+                self.queue.remove(entry)
+                return 0.0
+
+            wait = self.chat_wait(chat_id, now)
+            if wait <= 0:
+                self.queue.remove(entry)
+                self.global_bucket.consume(now)
+                self.get_chat_bucket(chat_id).consume(now)
+                future.set_result(None)
+                return 0.0
+
+            earliest = wait if earliest is None else min(earliest, wait)
+        return earliest or 0.0
+
+    async def run(self) -> None:
+        """Grant slots until the queue is empty."""
+        while self.queue:
+            now = time.monotonic()
+            delay = self.global_bucket.wait_time(now)
+            if delay <= 0:
+                delay = self.grant(now)
+                if delay <= 0:
+                    continue
+
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+
+class SendSchedulerMiddleware(BaseRequestMiddleware):
+    """Bot session middleware routing message sends through a SendScheduler."""
+
+    def __init__(self, scheduler: SendScheduler, max_retries: int = config.SEND_MAX_RETRIES):
+        self.scheduler = scheduler
+        self.max_retries = max_retries
+
+    async def __call__(self, make_request, bot, method):
+        chat_id = getattr(method, "chat_id", None)
+        scheduled = chat_id is not None and is_message_method(method)
+
+        attempt = 0
+        while True:
+            if scheduled:
+                await self.scheduler.acquire(chat_id, send_priority.get())
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                logger.warning(f"Flood control on {type(method).__name__} (chat {chat_id}), retrying in {e.retry_after}s")
+                if scheduled:
+                    self.scheduler.backoff(chat_id, e.retry_after)
+                else:
+                    await asyncio.sleep(e.retry_after)
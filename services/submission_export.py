@@ -0,0 +1,253 @@
+"""Export of student assignment submissions as ZIP archives.
+
+Submission files are downloaded one at a time through the Bot API file
+endpoint into a temporary directory, compressed into a ZIP archive on disk
+and sent to the teacher as documents. Archives are split into parts so each
+stays under the upload limit, and every part carries a CSV manifest of the
+students and files it contains. A file that cannot be downloaded or
+archived is skipped and listed in the manifest with its failure status.
+
+Files come from a file source: BotFileSource downloads them through the bot
+session (a local Bot API server or a stand-in set with TELEGRAM_API_URL is
+used as-is), LocalFileSource copies them from EXPORT_FILES_DIR so exports can
+be run without Telegram.
+"""
+import asyncio
+import csv
+import io
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from typing import List, Optional, Protocol, Sequence, Tuple
+
+from aiogram import Bot
+from aiogram.types import FSInputFile
+
+from config import config
+from database.models import AssignmentSubmission
+from services.send_scheduler import bulk_delivery
+
+MANIFEST_NAME = "manifest.csv"
+MANIFEST_HEADER = ["file", "student_name", "student_number", "original_file_name", "submitted_at", "status"]
+STATUS_OK = "ok"
+STATUS_FAILED = "download_failed"
+STATUS_ARCHIVE_FAILED = "archive_failed"
+
+# Local header, data descriptor and central directory record of one entry
+ENTRY_OVERHEAD = 200
+
+UNSAFE_NAME_CHARS = re.compile(r'[\\/:*?"<>|\x00-\x1f]+')
+
+
+class FileSource(Protocol):
+    """Where the exporter gets submission files from."""
+
+    async def fetch(self, file_id: str, destination: str) -> str:
+        """Save a file to `destination`; return a path whose extension names its type."""
+        ...
+
+
+def safe_name(value: str, max_length: int = 80) -> str:
+    """Make a string usable as a file name inside the archive."""
+    value = UNSAFE_NAME_CHARS.sub("_", value).strip(" ._")
+    return value[:max_length] or "file"
+
+
+class ArchivePart:
+    """One ZIP archive on disk with the manifest rows of its entries."""
+
+    def __init__(self, number: int, path: str):
+        self.number = number
+        self.path = path
+        self.file = open(path, "w+b")
+        self.zip = zipfile.ZipFile(self.file, "w", compression=zipfile.ZIP_DEFLATED)
+        self.rows: List[list] = []
+        self.entries = 0
+        self.submission_ids: List[int] = []
+
+    @property
+    def size(self) -> int:
+        """Bytes written so far."""
+        return self.file.tell()
+
+    async def add(self, source_path: str, entry_name: str) -> None:
+        """Compress a downloaded file into the archive without blocking the loop."""
+        await asyncio.to_thread(self.zip.write, source_path, entry_name)
+        self.entries += 1
+
+    def close(self) -> None:
+        """Write the manifest and finish the archive."""
+        manifest = io.StringIO()
+        writer = csv.writer(manifest)
+        writer.writerow(MANIFEST_HEADER)
+        writer.writerows(self.rows)
+        # BOM so spreadsheet apps detect UTF-8 (Arabic names)
+        self.zip.writestr(MANIFEST_NAME, manifest.getvalue().encode("utf-8-sig"))
+        self.zip.close()
+        self.file.close()
+
+
+class BotFileSource:
+    """Download submission files through the Bot API file endpoint."""
+
+    def __init__(self, bot: Bot, timeout: int = 120):
+        self.bot = bot
+        self.timeout = timeout
+
+    async def fetch(self, file_id: str, destination: str) -> str:
+        """Stream a file to `destination`; return its Bot API file path."""
+        telegram_file = await self.bot.get_file(file_id)
+        await self.bot.download_file(telegram_file.file_path, destination=destination, timeout=self.timeout)
+        return telegram_file.file_path
+
+
+class LocalFileSource:
+    """Copy submission files from a directory, where each is named by its file id (any extension)."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    async def fetch(self, file_id: str, destination: str) -> str:
+        """Copy a file to `destination`; return its name in the directory."""
+        for name in os.listdir(self.directory):
+            if os.path.splitext(name)[0] == file_id:
+                await asyncio.to_thread(shutil.copyfile, os.path.join(self.directory, name), destination)
+                return name
+        raise FileNotFoundError(f"No file for {file_id} in {self.directory}")
+
+
+class SubmissionExporter:
+    """Download submissions and deliver them to a chat as ZIP archive parts."""
+
+    def __init__(
+        self,
+        bot: Bot,
+        file_source: Optional[FileSource] = None,
+        max_part_size: int = config.EXPORT_PART_MAX_BYTES,
+        temp_dir: Optional[str] = config.EXPORT_TEMP_DIR or None,
+        download_timeout: int = 120
+    ):
+        self.bot = bot
+        if file_source is None:
+            if config.EXPORT_FILES_DIR:
+                file_source = LocalFileSource(config.EXPORT_FILES_DIR)
+            else:
+                file_source = BotFileSource(bot, download_timeout)
+        self.file_source = file_source
+        self.max_part_size = max_part_size
+        self.temp_dir = temp_dir
+
+    def entry_name(self, idx: int, submission: AssignmentSubmission, file_path: str) -> str:
+        """Build the archive entry name of a submission."""
+        student = submission.student
+        student_number = safe_name(student.student_id or "", 30)
+        file_name = safe_name(submission.file_name or f"submission_{submission.id}")
+
+        # Photos and some documents are stored without an extension
+        if not os.path.splitext(file_name)[1]:
+            file_name += os.path.splitext(file_path)[1]
+
+        return f"{idx:03d}_{student_number}_{file_name}"
+
+    def manifest_row(self, entry_name: str, submission: AssignmentSubmission, status: str) -> list:
+        """Build the manifest row of a submission."""
+        student = submission.student
+        submitted_at = submission.updated_at or submission.created_at
+        return [
+            entry_name,
+            student.full_name or "",
+            student.student_id or "",
+            submission.file_name or "",
+            submitted_at.isoformat() if submitted_at else "",
+            status
+        ]
+
+    async def download(self, submission: AssignmentSubmission, directory: str) -> Tuple[str, str]:
+        """Fetch a submission file to disk; return (local path, source file path)."""
+        local_path = os.path.join(directory, f"download_{submission.id}")
+        file_path = await self.file_source.fetch(submission.file_id, local_path)
+        return local_path, file_path
+
+    async def send_part(self, chat_id: int, part: ArchivePart, archive_name: str) -> bool:
+        """Finish an archive part and send it to the chat."""
+        part.close()
+        try:
+            await self.bot.send_document(
+                chat_id=chat_id,
+                document=FSInputFile(part.path, filename=f"{archive_name}_{part.number}.zip"),
+                caption=f"🗂 الجزء {part.number} - {part.entries} ملف",
+                request_timeout=300
+            )
+            return True
+        except Exception as e:
+            print(f"Error sending export part {part.number}: {e}")
+            return False
+        finally:
+            os.remove(part.path)
+
+    async def export(
+        self,
+        chat_id: int,
+        submissions: Sequence[AssignmentSubmission],
+        archive_name: str
+    ) -> Tuple[int, int, List[int]]:
+        """Export submissions (with `student` loaded) to a chat.
+
+        Returns (number of exported files, number of archive parts sent, ids
+        of the submissions that could not be downloaded, archived or sent).
+        """
+        archive_name = safe_name(archive_name)
+        exported = 0
+        sent_parts = 0
+        failed_ids: List[int] = []
+
+        with tempfile.TemporaryDirectory(dir=self.temp_dir) as directory, bulk_delivery():
+            part = ArchivePart(1, os.path.join(directory, "part_1.zip"))
+
+            for idx, submission in enumerate(submissions, 1):
+                try:
+                    local_path, file_path = await self.download(submission, directory)
+                except Exception as e:
+                    print(f"Error downloading submission {submission.id}: {e}")
+                    part.rows.append(self.manifest_row("", submission, STATUS_FAILED))
+                    failed_ids.append(submission.id)
+                    continue
+
+                entry_name = self.entry_name(idx, submission, file_path)
+                try:
+                    # Start a new part when this file would push the current one over the limit
+                    expected_size = part.size + os.path.getsize(local_path) + ENTRY_OVERHEAD + len(entry_name.encode())
+                    if part.entries and expected_size > self.max_part_size:
+                        if await self.send_part(chat_id, part, archive_name):
+                            sent_parts += 1
+                        else:
+                            exported -= part.entries
+                            failed_ids.extend(part.submission_ids)
+                        number = part.number + 1
+                        part = ArchivePart(number, os.path.join(directory, f"part_{number}.zip"))
+
+                    try:
+                        await part.add(local_path, entry_name)
+                    except Exception as e:
+                        print(f"Error archiving submission {submission.id}: {e}")
+                        part.rows.append(self.manifest_row("", submission, STATUS_ARCHIVE_FAILED))
+                        failed_ids.append(submission.id)
+                        continue
+                    part.rows.append(self.manifest_row(entry_name, submission, STATUS_OK))
+                    part.submission_ids.append(submission.id)
+                    exported += 1
+                finally:
+                    os.remove(local_path)
+
+            if part.entries or part.rows:
+                if await self.send_part(chat_id, part, archive_name):
+                    sent_parts += 1
+                else:
+                    exported -= part.entries
+                    failed_ids.extend(part.submission_ids)
+            else:
+                part.close()
+
+        return exported, sent_parts, failed_ids
@@ -18,6 +18,15 @@ MIGRATIONS = [
     ("migrate_add_teacher_tables.py", "إضافة نظام الأساتذة والمواد"),
     ("migrate_registration_flow.py", "تحديث نظام التسجيل (VISITOR role + أعمدة جديدة)"),
     ("migrate_enum_data.py", "تحديث بيانات enum"),
+    ("migrate_add_display_order_indexes.py", "إضافة فهارس ترتيب المحاضرات والوظائف"),
+    ("migrate_unique_submissions.py", "منع تكرار حلول الوظائف لنفس الطالب"),
+    ("migrate_add_submission_export_watermarks.py", "تتبع آخر تنزيل لحلول الطلاب"),
+    ("migrate_add_draft_files.py", "حفظ ملفات المحاضرات والوظائف أثناء الرفع"),
+    ("migrate_add_file_unique_ids.py", "منع تكرار الملفات المرفوعة"),
+    ("migrate_contact_request_indexes.py", "فهارس طلبات التواصل ومنع تكرارها"),
+    ("migrate_add_foreign_key_indexes.py", "فهارس المفاتيح الأجنبية والحالات"),
+    ("migrate_admin_logs_nullable_admin.py", "سجل عمليات المشرفين من لوحة التحكم"),
+    ("migrate_add_publication_outbox.py", "نشر الخدمات والطلبات في القنوات عبر طابور"),
 ]
 
 async def run_migration(script, description):
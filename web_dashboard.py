@@ -20,11 +20,14 @@ from repositories.user_repository import UserRepository
 from repositories.specialization_repository import SpecializationRepository
 from repositories.subject_repository import SubjectRepository
 from repositories.teacher_repository import TeacherRepository
+from repositories.publication_repository import PublicationRepository
 from config import config
 import bcrypt
 import os
 from aiogram import Bot
 from aiogram.exceptions import TelegramBadRequest
+from services.send_scheduler import SendScheduler, SendSchedulerMiddleware, bulk_delivery
+from services.audit_log import audit_log
 
 app = FastAPI(title="DTC Job Bot Dashboard")
 security = HTTPBasic()
@@ -40,6 +43,20 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 # Session storage (in production, use Redis or database)
 sessions = {}
 
+# Outbound send budget shared by all dashboard calls; the bot processes use the rest
+send_scheduler = SendScheduler(global_rate=config.SEND_GLOBAL_RATE * config.DASHBOARD_SEND_SHARE)
+
+
+def create_dashboard_bot() -> Bot:
+    """Create a bot whose calls go through the dashboard's send budget."""
+    bot = Bot(token=config.BOT_TOKEN)
+    bot.session.middleware(SendSchedulerMiddleware(send_scheduler))
+    return bot
+
+# Buffered admin audit log
+app.add_event_handler("startup", audit_log.start)
+app.add_event_handler("shutdown", audit_log.stop)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against hash."""
@@ -51,6 +68,23 @@ def get_session(request: Request) -> Optional[str]:
     return request.cookies.get("session_id")
 
 
+def log_admin_action(
+    session: dict,
+    action_type: str,
+    target_type: str,
+    target_id: int,
+    details: Optional[dict] = None
+):
+    """Queue an audit log entry for the logged-in dashboard admin."""
+    audit_log.log(
+        session.get("user_id"),
+        action_type,
+        target_type,
+        target_id,
+        {"source": "dashboard", "email": session.get("email"), **(details or {})}
+    )
+
+
 async def get_db():
     """Get database session."""
     async with AsyncSessionLocal() as session:
@@ -374,6 +408,15 @@ async def update_user(
     
     await user_repo.update(user)
     
+    updated_fields = {
+        "full_name": full_name, "email": email, "phone_number": phone_number, "student_id": student_id,
+        "specialization": specialization, "is_student": is_student, "is_active": is_active
+    }
+    log_admin_action(
+        session, "update_user", "user", user_id,
+        {"fields": [name for name, value in updated_fields.items() if value is not None]}
+    )
+    
     return {"status": "success", "message": "تم تحديث بيانات المستخدم بنجاح"}
 
 
@@ -408,7 +451,7 @@ async def broadcast_message(
     db: AsyncSession = Depends(get_db)
 ):
     """Broadcast message to users."""
-    bot = Bot(token=config.BOT_TOKEN)
+    bot = create_dashboard_bot()
     user_repo = UserRepository(db)
     
     # Get target users
@@ -427,17 +470,18 @@ async def broadcast_message(
     success_count = 0
     failed_count = 0
     
-    for user in users:
-        try:
-            telegram_id: int = int(user.telegram_id)  # type: ignore
-            await bot.send_message(telegram_id, message)
-            success_count += 1
-        except (TelegramBadRequest, Exception) as e:
-            failed_count += 1
-            # If user blocked bot, mark as inactive
-            if "blocked" in str(e).lower() or "chat not found" in str(e).lower():
-                user.is_active = False  # type: ignore
-                await user_repo.update(user)
+    with bulk_delivery():
+        for user in users:
+            try:
+                telegram_id: int = int(user.telegram_id)  # type: ignore
+                await bot.send_message(telegram_id, message)
+                success_count += 1
+            except (TelegramBadRequest, Exception) as e:
+                failed_count += 1
+                # If user blocked bot, mark as inactive
+                if "blocked" in str(e).lower() or "chat not found" in str(e).lower():
+                    user.is_active = False  # type: ignore
+                    await user_repo.update(user)
     
     await bot.session.close()
     
@@ -467,12 +511,13 @@ async def ban_user(
     # Ban user
     user.is_active = False  # type: ignore
     await user_repo.update(user)
+    log_admin_action(session, "ban_user", "user", user_id)
     
     # If user is a student, delete all their services
     if bool(user.is_student):
         services = await service_repo.get_by_provider(user_id, limit=10000)
         deleted_count = 0
-        bot = Bot(token=config.BOT_TOKEN)
+        bot = create_dashboard_bot()
         
         for service in services:
             # Delete from channel if published
@@ -489,6 +534,7 @@ async def ban_user(
             deleted_count += 1
         
         await bot.session.close()
+        log_admin_action(session, "delete_user_services", "user", user_id, {"deleted_services": deleted_count})
         
         return {
             "status": "success",
@@ -519,6 +565,7 @@ async def unban_user(
     
     user.is_active = True  # type: ignore
     await user_repo.update(user)
+    log_admin_action(session, "unban_user", "user", user_id)
     
     return {
         "status": "success",
@@ -543,7 +590,9 @@ async def approve_service(
         raise HTTPException(status_code=400, detail="Service is not pending")
     
     service.status = ServiceStatus.PUBLISHED  # type: ignore
-    await service_repo.update(service)
+    # Committed with the outbox row; the bot's publisher posts it to the channel
+    await PublicationRepository(db).enqueue("service", service_id)
+    log_admin_action(session, "approve_service", "service", service_id)
     
     return {"status": "success", "message": "Service approved"}
 
@@ -566,6 +615,7 @@ async def reject_service(
     
     service.status = ServiceStatus.REJECTED  # type: ignore
     await service_repo.update(service)
+    log_admin_action(session, "reject_service", "service", service_id)
     
     return {"status": "success", "message": "Service rejected"}
 
@@ -587,7 +637,8 @@ async def approve_request(
         raise HTTPException(status_code=400, detail="Request is not pending")
     
     request.status = RequestStatus.PUBLISHED  # type: ignore
-    await request_repo.update(request)
+    await PublicationRepository(db).enqueue("request", request_id)
+    log_admin_action(session, "approve_request", "request", request_id)
     
     return {"status": "success", "message": "Request approved"}
 
@@ -610,6 +661,7 @@ async def reject_request(
     
     request.status = RequestStatus.REJECTED  # type: ignore
     await request_repo.update(request)
+    log_admin_action(session, "reject_request", "request", request_id)
     
     return {"status": "success", "message": "Request rejected"}
 
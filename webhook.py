@@ -0,0 +1,158 @@
+"""Webhook entry point for the bot.
+
+Runs an aiohttp server that receives updates from Telegram and feeds them
+into the dispatcher with bounded concurrency. Configure with the WEBHOOK_*
+settings; WEBHOOK_SECRET is required, so only Telegram can post updates. Set
+TELEGRAM_API_URL to run against a local Bot API server, or against
+fake_telegram_server.py to try the bot without Telegram.
+"""
+import asyncio
+import logging
+import ssl
+import sys
+from hmac import compare_digest
+from typing import Optional, Set
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import FSInputFile
+from aiogram.webhook.aiohttp_server import setup_application
+
+from config import config
+from database.base import init_db
+from main import create_bot, create_dispatcher
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class BoundedWebhookHandler:
+    """Accept webhook requests and process updates with a concurrency limit.
+
+    A request is acknowledged as soon as a processing slot is free, so when
+    all slots are busy Telegram sees slower responses and backs off instead
+    of the process piling up unbounded tasks.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, secret_token: str, max_concurrency: int = 64):
+        if not secret_token:
+            raise ValueError("A webhook secret token is required")
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.secret_token = secret_token
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.tasks: Set[asyncio.Task] = set()
+
+    def register(self, app: web.Application, path: str) -> None:
+        """Register the handler route and graceful shutdown on the app."""
+        app.router.add_post(path, self.handle)
+        app.on_shutdown.append(self.close)
+
+    def verify_secret(self, request: web.Request) -> bool:
+        """Check the secret token header sent by Telegram."""
+        return compare_digest(request.headers.get(SECRET_HEADER, ""), self.secret_token)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Handle one webhook request."""
+        if not self.verify_secret(request):
+            return web.Response(status=401, text="Unauthorized")
+
+        try:
+            update = await request.json()
+        except ValueError:
+            return web.Response(status=400, text="Bad Request")
+
+        await self.semaphore.acquire()
+        task = asyncio.create_task(self.process_update(update))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return web.Response()
+
+    async def process_update(self, update: dict) -> None:
+        """Feed a raw update into the dispatcher and release the slot."""
+        try:
+            await self.dispatcher.feed_raw_update(self.bot, update)
+        except Exception as e:
+            logger.error(f"Error processing update {update.get('update_id')}: {e}", exc_info=True)
+        finally:
+            self.semaphore.release()
+
+    async def close(self, app: web.Application) -> None:
+        """Wait for in-flight updates before the server stops."""
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
+
+def get_ssl_context() -> Optional[ssl.SSLContext]:
+    """Build an SSL context when local TLS termination is configured."""
+    if not (config.WEBHOOK_SSL_CERT and config.WEBHOOK_SSL_KEY):
+        return None
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(config.WEBHOOK_SSL_CERT, config.WEBHOOK_SSL_KEY)
+    return context
+
+
+def create_app(bot: Bot, dp: Dispatcher) -> web.Application:
+    """Create the aiohttp application serving the webhook."""
+    app = web.Application()
+
+    handler = BoundedWebhookHandler(
+        dp,
+        bot,
+        secret_token=config.WEBHOOK_SECRET,
+        max_concurrency=config.WEBHOOK_MAX_CONCURRENCY
+    )
+    handler.register(app, config.WEBHOOK_PATH)
+
+    async def on_app_startup(app: web.Application):
+        # Runs before dp.emit_startup, so the dispatcher's startup hooks
+        # (listener, cache preload, audit log, publisher) find the schema ready
+        logger.info("Initializing database...")
+        await init_db()
+        logger.info("Database initialized.")
+
+    async def on_startup(bot: Bot):
+        if not config.WEBHOOK_BASE_URL:
+            logger.warning("WEBHOOK_BASE_URL is not set, skipping setWebhook.")
+            return
+
+        # Self-signed certificates must be uploaded to Telegram
+        certificate = FSInputFile(config.WEBHOOK_SSL_CERT) if config.WEBHOOK_SSL_CERT else None
+        await bot.set_webhook(
+            url=config.WEBHOOK_BASE_URL.rstrip("/") + config.WEBHOOK_PATH,
+            certificate=certificate,
+            secret_token=config.WEBHOOK_SECRET,
+            allowed_updates=dp.resolve_used_update_types(),
+            max_connections=min(max(config.WEBHOOK_MAX_CONCURRENCY, 1), 100)
+        )
+        logger.info("Webhook registered.")
+
+    app.on_startup.append(on_app_startup)
+    dp.startup.register(on_startup)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+def run():
+    """Run the webhook server."""
+    if not config.WEBHOOK_SECRET:
+        # Without it anyone who finds the URL can post fake updates
+        logger.error("WEBHOOK_SECRET is not set, refusing to start the webhook server.")
+        sys.exit(1)
+
+    bot = create_bot()
+    dp = create_dispatcher()
+    app = create_app(bot, dp)
+
+    logger.info(f"Webhook server starting on {config.WEBHOOK_HOST}:{config.WEBHOOK_PORT}{config.WEBHOOK_PATH}")
+    web.run_app(
+        app,
+        host=config.WEBHOOK_HOST,
+        port=config.WEBHOOK_PORT,
+        ssl_context=get_ssl_context()
+    )
+
+
+if __name__ == "__main__":
+    run()
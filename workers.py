@@ -0,0 +1,186 @@
+"""Multi-worker bot runtime.
+
+The front process long-polls Telegram and routes every update to one of
+BOT_WORKERS worker processes by the id of the user who sent it. Each worker
+runs its own dispatcher, so all updates of a user land in the same process:
+FSM state (MemoryStorage) stays consistent and per-user ordering is kept.
+Process-local caches must not be shared between workers; they are kept
+per process and invalidated through the database.
+"""
+import asyncio
+import logging
+import multiprocessing
+from typing import Dict, List, Optional
+
+from aiogram import Bot, Dispatcher
+
+from config import config
+from database.base import init_db
+from main import create_bot, create_dispatcher
+
+logger = logging.getLogger(__name__)
+
+
+def get_update_user_id(update: dict) -> Optional[int]:
+    """Get the id used to shard a raw update (sender, falling back to chat)."""
+    for key, payload in update.items():
+        if key == "update_id" or not isinstance(payload, dict):
+            continue
+
+        user = payload.get("from") or payload.get("user")
+        if user:
+            return user["id"]
+
+        chat = payload.get("chat") or (payload.get("message") or {}).get("chat")
+        if chat:
+            return chat["id"]
+    return None
+
+
+def get_shard(update: dict, workers: int) -> int:
+    """Pick the worker index for a raw update."""
+    user_id = get_update_user_id(update)
+    if user_id is None:
+        return 0
+    return abs(user_id) % workers
+
+
+class OrderedUpdateRunner:
+    """Run updates concurrently while keeping order per user.
+
+    A concurrency slot is taken only once an update may actually run (its
+    user's previous update is done), so one user's backlog cannot starve
+    other users. The number of scheduled updates is bounded separately.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, max_concurrency: int = 32, max_pending: int = 1000):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.slots = asyncio.Semaphore(max_concurrency)
+        self.pending = asyncio.Semaphore(max_pending)
+        self.tails: Dict[int, asyncio.Task] = {}
+
+    async def submit(self, update: dict) -> None:
+        """Schedule an update after the previous update of the same user."""
+        await self.pending.acquire()
+
+        key = get_update_user_id(update) or 0
+        previous = self.tails.get(key)
+        task = asyncio.create_task(self.run(previous, update))
+        self.tails[key] = task
+        task.add_done_callback(lambda done: self.release(key, done))
+
+    async def run(self, previous: Optional[asyncio.Task], update: dict) -> None:
+        """Wait for the user's previous update, then process this one."""
+        if previous is not None:
+            await asyncio.wait([previous])
+        async with self.slots:
+            try:
+                await self.dispatcher.feed_raw_update(self.bot, update)
+            except Exception as e:
+                logger.error(f"Error processing update {update.get('update_id')}: {e}", exc_info=True)
+
+    def release(self, key: int, task: asyncio.Task) -> None:
+        """Free the queue place and forget the user once their last update is done."""
+        self.pending.release()
+        if self.tails.get(key) is task:
+            del self.tails[key]
+
+    async def drain(self) -> None:
+        """Wait for all scheduled updates."""
+        if self.tails:
+            await asyncio.gather(*self.tails.values(), return_exceptions=True)
+
+
+async def run_worker(index: int, queue: multiprocessing.Queue, workers: int) -> None:
+    """Consume routed updates in a worker process."""
+    # The bot's part of the global send budget is shared by all workers
+    bot = create_bot(send_rate=config.SEND_GLOBAL_RATE * (1 - config.DASHBOARD_SEND_SHARE) / workers)
+    dp = create_dispatcher()
+    runner = OrderedUpdateRunner(
+        dp, bot,
+        max_concurrency=config.WORKER_MAX_CONCURRENCY,
+        max_pending=config.WORKER_MAX_PENDING
+    )
+    loop = asyncio.get_running_loop()
+
+    await dp.emit_startup(bot=bot, worker_index=index)
+    logger.info(f"Worker {index} started.")
+    try:
+        while True:
+            update = await loop.run_in_executor(None, queue.get)
+            if update is None:
+                break
+            await runner.submit(update)
+        await runner.drain()
+    finally:
+        await dp.emit_shutdown(bot=bot, worker_index=index)
+        await bot.session.close()
+        logger.info(f"Worker {index} stopped.")
+
+
+def worker_main(index: int, queue: multiprocessing.Queue, workers: int) -> None:
+    """Worker process entry point."""
+    try:
+        asyncio.run(run_worker(index, queue, workers))
+    except KeyboardInterrupt:
+        pass
+
+
+async def poll_updates(bot: Bot, queues: List[multiprocessing.Queue], allowed_updates: List[str]) -> None:
+    """Long-poll Telegram and route raw updates to worker queues."""
+    offset = None
+    while True:
+        try:
+            updates = await bot.get_updates(offset=offset, timeout=30, allowed_updates=allowed_updates)
+        except Exception as e:
+            logger.error(f"Failed to fetch updates: {e}")
+            await asyncio.sleep(1)
+            continue
+
+        for update in updates:
+            raw = update.model_dump(mode="json", by_alias=True, exclude_none=True)
+            queues[get_shard(raw, len(queues))].put(raw)
+            offset = update.update_id + 1
+
+
+async def run_front(queues: List[multiprocessing.Queue]) -> None:
+    """Run the routing front process."""
+    logger.info("Initializing database...")
+    await init_db()
+    logger.info("Database initialized.")
+
+    bot = create_bot()
+    allowed_updates = create_dispatcher().resolve_used_update_types()
+    try:
+        await bot.delete_webhook()
+        logger.info(f"Routing updates to {len(queues)} workers...")
+        await poll_updates(bot, queues, allowed_updates)
+    finally:
+        await bot.session.close()
+
+
+def run(workers: int = config.BOT_WORKERS) -> None:
+    """Start worker processes and the routing front."""
+    context = multiprocessing.get_context("spawn")
+    queues = [context.Queue() for _ in range(workers)]
+    processes = [
+        context.Process(target=worker_main, args=(index, queue, workers), name=f"bot-worker-{index}")
+        for index, queue in enumerate(queues)
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        asyncio.run(run_front(queues))
+    except KeyboardInterrupt:
+        logger.info("Bot stopped by user.")
+    finally:
+        for queue in queues:
+            queue.put(None)
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    run()